@@ -0,0 +1,172 @@
+"""
+Adjusted Efficiency Ratings
+KenPom-style opponent- and home-court-adjusted offense, defense and tempo
+
+Every game gives two observations, one per offense:
+
+    points per 100 possessions = league avg + offense[team] + defense[opponent] ± home
+
+and one tempo observation when possessions can be estimated:
+
+    possessions = league avg + tempo[team1] + tempo[team2]
+
+Both systems are solved as damped sparse least squares (scipy lsqr) over
+all teams at once, so a team's rating reflects who it played, not just its
+raw per-100 numbers. Damping pulls teams with few games toward average and
+keeps disconnected groups of teams solvable.
+
+team1 is recorded as the home team (see models.BoxScore). The home-court
+term is estimated from the data, so its sign follows however the sources
+actually order the two teams.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import lsqr
+from sqlalchemy import text
+
+from models import db
+from ranking_calculator import estimate_possessions_array
+
+# Regularization strength: roughly sqrt of the number of phantom
+# average games each team is pulled toward
+DAMPING = 2.0
+
+# Possessions assumed for games scraped without shooting stats, until
+# enough games with stats exist to measure the league average
+DEFAULT_POSSESSIONS = 56.0
+
+GAME_QUERY = '''
+    SELECT team1_id, team2_id, team1_score, team2_score,
+           team1_fga, team1_fta, team1_to, team2_fga, team2_fta, team2_to
+    FROM box_score
+    WHERE team1_id IS NOT NULL AND team2_id IS NOT NULL AND team1_id != team2_id
+'''
+
+
+def load_rated_games():
+    """Box score columns needed by the solver as NumPy arrays (needs app context)"""
+    rows = db.session.execute(text(GAME_QUERY)).fetchall()
+    columns = list(zip(*rows)) if rows else [()] * 10
+    team1, team2, score1, score2, fga1, fta1, to1, fga2, fta2, to2 = (
+        np.nan_to_num(np.array(column, dtype=np.float64)) for column in columns
+    )
+
+    # Average both sides' estimates when both teams reported stats
+    side_possessions = np.vstack((
+        estimate_possessions_array(fga1, fta1, to1),
+        estimate_possessions_array(fga2, fta2, to2)
+    ))
+    measured = ~np.isnan(side_possessions)
+    counts = measured.sum(axis=0)
+    possessions = np.full(len(team1), np.nan)
+    np.divide(np.nansum(side_possessions, axis=0), counts, out=possessions, where=counts > 0)
+
+    return {
+        'team1_id': team1.astype(np.int64),
+        'team2_id': team2.astype(np.int64),
+        'team1_score': score1,
+        'team2_score': score2,
+        'possessions': possessions
+    }
+
+
+def _solve(columns, values, target, n_unknowns, damping):
+    """Damped least squares where each (columns[k], values[k]) pair adds one nonzero per row"""
+    rows = np.concatenate([np.arange(len(target))] * len(columns))
+    matrix = csr_matrix(
+        (np.concatenate(values), (rows, np.concatenate(columns))),
+        shape=(len(target), n_unknowns)
+    )
+    return lsqr(matrix, target, damp=damping, atol=1e-8, btol=1e-8)[0]
+
+
+def solve_adjusted_efficiency(games, damping=DAMPING):
+    """
+    Solve adjusted offense, defense, tempo and strength of schedule
+
+    Args:
+        games: Arrays from load_rated_games()
+        damping: lsqr damping (see DAMPING)
+
+    Returns: (ratings, home_advantage)
+        ratings: dict of team_id -> {adj_offensive_eff, adj_defensive_eff,
+                 adj_net_rating, adj_tempo, sos_rating, games}
+                 adj_tempo is None for teams with no games with stats
+        home_advantage: home-court edge in points per 100 possessions
+    """
+    game_count = len(games['team1_id'])
+    if not game_count:
+        return {}, 0.0
+
+    team_ids, team_index = np.unique(
+        np.concatenate((games['team1_id'], games['team2_id'])), return_inverse=True
+    )
+    team_count = len(team_ids)
+    team1, team2 = team_index[:game_count], team_index[game_count:]
+
+    possessions = games['possessions']
+    measured = ~np.isnan(possessions)
+    league_tempo = possessions[measured].mean() if measured.any() else DEFAULT_POSSESSIONS
+    possessions = np.where(measured, possessions, league_tempo)
+
+    # Efficiency: one row per offense; unknowns are [offense | defense | home]
+    offense = np.concatenate((team1, team2))
+    defense = np.concatenate((team2, team1))
+    home = np.concatenate((np.ones(game_count), -np.ones(game_count)))
+    points = np.concatenate((games['team1_score'], games['team2_score']))
+    efficiency = points / np.concatenate((possessions, possessions)) * 100
+
+    league_eff = efficiency.mean()
+    ones = np.ones(len(offense))
+    solution = _solve(
+        [offense, defense + team_count, np.full(len(offense), 2 * team_count)],
+        [ones, ones, home],
+        efficiency - league_eff,
+        2 * team_count + 1,
+        damping
+    )
+    adj_off = league_eff + solution[:team_count]
+    adj_def = league_eff + solution[team_count:2 * team_count]
+    home_advantage = 2 * solution[-1]
+    adj_net = adj_off - adj_def
+
+    # Tempo: only games where possessions were actually estimated
+    adj_tempo = np.full(team_count, np.nan)
+    if measured.any():
+        tempo1, tempo2 = team1[measured], team2[measured]
+        ones = np.ones(len(tempo1))
+        tempo = _solve(
+            [tempo1, tempo2], [ones, ones],
+            games['possessions'][measured] - league_tempo,
+            team_count, damping
+        )
+        has_tempo = np.bincount(np.concatenate((tempo1, tempo2)), minlength=team_count) > 0
+        adj_tempo[has_tempo] = league_tempo + tempo[has_tempo]
+
+    # Strength of schedule: average adjusted net rating of opponents faced
+    games_played = np.bincount(offense, minlength=team_count)
+    sos = np.bincount(offense, weights=adj_net[defense], minlength=team_count) / games_played
+
+    ratings = {}
+    for index, team_id in enumerate(team_ids.tolist()):
+        tempo = adj_tempo[index]
+        ratings[team_id] = {
+            'adj_offensive_eff': round(float(adj_off[index]), 1),
+            'adj_defensive_eff': round(float(adj_def[index]), 1),
+            'adj_net_rating': round(float(adj_net[index]), 1),
+            'adj_tempo': None if np.isnan(tempo) else round(float(tempo), 1),
+            'sos_rating': round(float(sos[index]), 1),
+            'games': int(games_played[index])
+        }
+
+    return ratings, float(home_advantage)
+
+
+def adjusted_ratings(games=None):
+    """Adjusted ratings for every team in the database (needs app context unless games are given)"""
+    if games is None:
+        games = load_rated_games()
+    ratings, home_advantage = solve_adjusted_efficiency(games)
+    print(f"Solved adjusted ratings for {len(ratings)} teams (home court: {home_advantage:+.1f} per 100)")
+    return ratings
@@ -1,10 +1,21 @@
-from flask import Flask, render_template, jsonify, redirect, url_for, request, flash
+from flask import Flask, render_template, jsonify, redirect, url_for, request, flash, Response, stream_with_context
 import numpy as np
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import os
 import json
 from pathlib import Path
 from models import db, BoxScore
+from rankings_store import rankings_repository, get_classification_teams, CLASSIFICATIONS
+from response_cache import cached_json_response, page_cache
+from pagination import keyset_page, clamp_page_size
+from box_score_export import export_lines, FORMATS as EXPORT_FORMATS
+from team_search import ensure_team_search_index, team_filter
+from migrations import run_migrations, current_version
+from teams import find_team, team_game_log  # also registers the BoxScore team id hook
+from team_stats import update_rankings_for_teams  # also registers the season aggregate hooks
+from playoff_simulation import load_playoff_odds
+from rank_matrices import load_rank_matrix, list_rank_matrices, alternate_engine, what_if
 
 app = Flask(__name__)
 app.config['ENV'] = os.getenv('FLASK_ENV', 'production')
@@ -21,15 +32,21 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
 )
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Default page sizes for box score listings (override with ?limit=)
+app.config['BOXSCORES_PAGE_SIZE'] = int(os.getenv('BOXSCORES_PAGE_SIZE', 100))
+app.config['API_BOXSCORES_PAGE_SIZE'] = int(os.getenv('API_BOXSCORES_PAGE_SIZE', 50))
+
 # Initialize database
 db.init_app(app)
 
 # Create tables
 with app.app_context():
     db.create_all()
+    run_migrations()
+    ensure_team_search_index()
 
 # Data file path
-DATA_FILE = Path(__file__).parent / 'data' / 'rankings.json'
+DATA_FILE = rankings_repository.data_file
 
 # ONE-TIME: Force reload - DISABLED (caused file deletion)
 # try:
@@ -68,116 +85,31 @@ check_and_update_rankings()
 # from ensure_rankings_stats import ensure_rankings_have_stats
 # ensure_rankings_have_stats()
 
-CLASSIFICATIONS = {
-    'AAAAAA': 'Class 6A (UIL)',
-    'AAAAA': 'Class 5A (UIL)',
-    'AAAA': 'Class 4A (UIL)',
-    'AAA': 'Class 3A (UIL)',
-    'AA': 'Class 2A (UIL)',
-    'A': 'Class 1A (UIL)',
-    'TAPPS_6A': 'TAPPS 6A / SPC 4A',
-    'TAPPS_5A': 'TAPPS 5A / SPC 3A',
-    'TAPPS_4A': 'TAPPS 4A',
-    'TAPPS_3A': 'TAPPS 3A',
-    'TAPPS_2A': 'TAPPS 2A',
-    'TAPPS_1A': 'TAPPS 1A'
-}
-
 
 def load_rankings_data():
-    """Load rankings from JSON file"""
-    try:
-        print(f"Looking for rankings file at: {DATA_FILE}")
-        print(f"File exists: {DATA_FILE.exists()}")
-        if DATA_FILE.exists():
-            with open(DATA_FILE, 'r') as f:
-                data = json.load(f)
-                print(f"Successfully loaded rankings data with {len(data.get('uil', {}))} UIL classifications")
-                return data
-        else:
-            print(f"Rankings file not found at {DATA_FILE}")
-    except Exception as e:
-        print(f"Error loading rankings: {e}")
-        import traceback
-        traceback.print_exc()
-    return None
+    """Load rankings from the shared in-memory store"""
+    return rankings_repository.get()
 
 
 def get_last_update():
     """Get last update timestamp"""
-    data = load_rankings_data()
-    if data and 'last_updated' in data:
-        try:
-            dt = datetime.fromisoformat(data['last_updated'])
-            return dt.strftime('%B %d, %Y at %I:%M %p')
-        except:
-            pass
-    return datetime.now().strftime('%B %d, %Y')
+    return rankings_repository.last_update()
 
 @app.route('/')
 def index():
-    return render_template('index.html',
-                         classifications=CLASSIFICATIONS,
-                         last_update=get_last_update())
+    return page_cache.get_or_render('index', None, lambda: render_template(
+        'index.html',
+        classifications=CLASSIFICATIONS,
+        last_update=get_last_update()
+    ))
 
 @app.route('/rankings/<classification>')
 def classification_rankings(classification):
     if classification not in CLASSIFICATIONS:
         return "Classification not found", 404
 
-    # Load data
-    data = load_rankings_data()
-    teams = []
-
-    if data:
-        # Determine if this is a TAPPS or UIL classification
-        if classification.startswith('TAPPS_'):
-            # Get TAPPS classification rankings
-            raw_teams = data.get('private', {}).get(classification, [])
-        else:
-            # Get UIL classification rankings
-            raw_teams = data.get('uil', {}).get(classification, [])
-
-        # Always show complete rankings: UIL Top 25, TAPPS Top 10
-        max_rank = 10 if classification.startswith('TAPPS_') else 25
-
-        # Sort teams by rank (None ranks go to end)
-        sorted_teams = sorted(raw_teams, key=lambda x: x.get('rank') if x.get('rank') is not None else 9999)
-
-        # Process teams - take only those with ranks 1 through max_rank
-        for team_data in sorted_teams:
-            team_rank = team_data.get('rank')
-
-            # Only include teams with valid rank within limit (1-25 or 1-10)
-            if team_rank is None or team_rank < 1 or team_rank > max_rank:
-                continue
-
-            team = {
-                'rank': team_rank,
-                'team_name': team_data.get('team_name', 'Unknown'),
-                'wins': team_data.get('wins'),
-                'losses': team_data.get('losses'),
-                'record': '',
-                'district': team_data.get('district', ''),
-                'ppg': team_data.get('ppg'),
-                'opp_ppg': team_data.get('opp_ppg'),
-                'games': team_data.get('games'),
-                # Placeholder analytics - will be calculated from game data later
-                'net_rating': None,
-                'adj_offensive_eff': None,
-                'adj_defensive_eff': None,
-                'adj_tempo': None,
-                'sos_rating': None
-            }
-
-            # Format record if available
-            if team['wins'] is not None and team['losses'] is not None:
-                team['record'] = f"{team['wins']}-{team['losses']}"
-
-            teams.append(team)
-
-        # Ensure teams are sorted by rank for display
-        teams.sort(key=lambda x: x['rank'])
+    # Precomputed at publish time: already filtered to ranked teams and ordered
+    teams = rankings_repository.classification_view(classification)
 
     # If no data, show message
     if not teams:
@@ -191,11 +123,62 @@ def classification_rankings(classification):
             'adj_defensive_eff': None
         }]
 
-    return render_template('classification.html',
-                         classification=classification,
-                         classification_name=CLASSIFICATIONS[classification],
-                         teams=teams,
-                         last_update=get_last_update())
+    return page_cache.get_or_render('classification', classification, lambda: render_template(
+        'classification.html',
+        classification=classification,
+        classification_name=CLASSIFICATIONS[classification],
+        teams=teams,
+        last_update=get_last_update()
+    ))
+
+@app.route('/api/rankings')
+def api_rankings():
+    """API endpoint returning all rankings as JSON"""
+    data = load_rankings_data()
+
+    if not data:
+        return jsonify({'error': 'Unable to load rankings'}), 500
+
+    return cached_json_response('all', lambda data: data)
+
+
+@app.route('/api/rankings/<classification>')
+def api_classification(classification):
+    """API endpoint for specific classification"""
+    data = load_rankings_data()
+
+    if not data:
+        return jsonify({'error': 'Unable to load rankings'}), 500
+
+    if not get_classification_teams(data, classification):
+        return jsonify({'error': f'Classification {classification} not found'}), 404
+
+    return cached_json_response(
+        ('classification', classification),
+        lambda data: {
+            'classification': classification,
+            'teams': get_classification_teams(data, classification),
+            'last_updated': data.get('last_updated')
+        }
+    )
+
+@app.route('/api/playoff-odds/<classification>')
+def api_playoff_odds(classification):
+    """API endpoint for simulated district title, playoff berth and state title odds"""
+    if classification not in CLASSIFICATIONS:
+        return jsonify({'error': f'Classification {classification} not found'}), 404
+
+    # Computed by the scheduler's daily job (playoff_simulation.py), never in a request
+    odds = load_playoff_odds()
+    if odds is None:
+        return jsonify({'error': 'Playoff odds have not been computed yet'}), 503
+
+    return jsonify({
+        'classification': classification,
+        'simulations': odds['simulations'],
+        'generated_at': odds['generated_at'],
+        'teams': odds['classifications'].get(classification, [])
+    })
 
 @app.route('/methodology')
 def methodology():
@@ -276,10 +259,9 @@ def submit_boxscore():
             db.session.add(box_score)
             db.session.commit()
 
-            # Update rankings with the new game immediately
+            # Update the two teams' rankings entries immediately
             try:
-                from update_rankings_with_records import update_rankings_with_records
-                update_rankings_with_records()
+                update_rankings_for_teams([box_score.team1_id, box_score.team2_id])
                 flash('Box score submitted and rankings updated successfully!', 'success')
             except Exception as e:
                 print(f"Warning: Could not update rankings: {e}")
@@ -287,6 +269,9 @@ def submit_boxscore():
 
             return redirect(url_for('submit_boxscore'))
 
+        except IntegrityError:
+            db.session.rollback()
+            flash('This game has already been submitted with that score for that date.', 'error')
         except Exception as e:
             db.session.rollback()
             flash(f'Error submitting box score: {str(e)}', 'error')
@@ -296,38 +281,110 @@ def submit_boxscore():
 
 @app.route('/boxscores')
 def view_boxscores():
-    """View all box scores"""
+    """View box scores, newest first, one page at a time"""
     # Get filter parameters
     classification = request.args.get('classification')
     team = request.args.get('team')
+    cursor = request.args.get('cursor')
+    page_size = clamp_page_size(request.args.get('limit', type=int),
+                                app.config['BOXSCORES_PAGE_SIZE'])
 
-    query = BoxScore.query.order_by(BoxScore.game_date.desc())
+    query = BoxScore.query
 
     if classification:
         query = query.filter_by(classification=classification)
 
     if team:
-        query = query.filter(
-            (BoxScore.team1_name.ilike(f'%{team}%')) |
-            (BoxScore.team2_name.ilike(f'%{team}%'))
-        )
+        query = query.filter(team_filter(team))
+
+    try:
+        boxscores, next_cursor = keyset_page(query, cursor, page_size)
+    except ValueError:
+        return "Invalid cursor", 400
 
-    boxscores = query.limit(100).all()
+    next_url = None
+    if next_cursor:
+        next_url = url_for('view_boxscores', **{**request.args.to_dict(), 'cursor': next_cursor})
 
     return render_template('boxscores.html',
                          boxscores=boxscores,
+                         next_url=next_url,
                          classifications=CLASSIFICATIONS)
 
 
 @app.route('/api/boxscores/<classification>')
 def api_boxscores(classification):
-    """API endpoint to get box scores for a classification"""
-    boxscores = BoxScore.query.filter_by(classification=classification)\
-        .order_by(BoxScore.game_date.desc())\
-        .limit(50)\
-        .all()
+    """
+    API endpoint to get box scores for a classification
 
-    return jsonify([bs.to_dict() for bs in boxscores])
+    Paginated newest first: pass ?limit= for the page size and the
+    X-Next-Cursor value back as ?cursor= to get the following page.
+    """
+    cursor = request.args.get('cursor')
+    page_size = clamp_page_size(request.args.get('limit', type=int),
+                                app.config['API_BOXSCORES_PAGE_SIZE'])
+
+    query = BoxScore.query.filter_by(classification=classification)
+
+    try:
+        boxscores, next_cursor = keyset_page(query, cursor, page_size)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    response = jsonify([bs.to_dict() for bs in boxscores])
+    if next_cursor:
+        next_url = url_for('api_boxscores', classification=classification,
+                           cursor=next_cursor, limit=page_size, _external=True)
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
+
+
+@app.route('/api/export/boxscores')
+def export_boxscores():
+    """
+    Stream every box score as NDJSON (default) or CSV
+
+    ?format=ndjson|csv, ?since=YYYY-MM-DD (games on/after) or an id (rows after)
+    """
+    export_format = request.args.get('format', 'ndjson')
+    try:
+        lines = export_lines(export_format, request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = Response(stream_with_context(lines), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename=box_scores.{export_format}'
+    return response
+
+
+@app.route('/api/teams/<path:team>/games')
+def api_team_games(team):
+    """API endpoint for one team's season: chronological games with running record"""
+    team_row = find_team(team)
+    if not team_row:
+        return jsonify({'error': f'Team {team} not found'}), 404
+
+    games = team_game_log(team_row)
+
+    return jsonify({
+        'team': team_row.to_dict(),
+        'record': games[-1]['record'] if games else '0-0',
+        'games': games
+    })
+
+
+@app.route('/teams/<path:team>')
+def view_team(team):
+    """Team page: season game log with running record"""
+    team_row = find_team(team)
+    if not team_row:
+        return "Team not found", 404
+
+    return render_template('team.html',
+                         team=team_row,
+                         games=team_game_log(team_row),
+                         classifications=CLASSIFICATIONS)
 
 
 @app.route('/debug')
@@ -341,55 +398,57 @@ def debug_info():
         'files_in_current_dir': os.listdir('.'),
         'files_in_data_dir': os.listdir('data') if os.path.exists('data') else 'data/ not found',
         'rankings_file_size': os.path.getsize(DATA_FILE) if DATA_FILE.exists() else 'N/A',
-        'games_in_database': BoxScore.query.count()
+        'games_in_database': BoxScore.query.count(),
+        'schema_version': current_version(),
+        'page_cache': page_cache.stats()
     }
-    if DATA_FILE.exists():
-        with open(DATA_FILE, 'r') as f:
-            data = json.load(f)
-            info['rankings_has_data'] = 'uil' in data
-            uil_6a_teams = data.get('uil', {}).get('AAAAAA', [])
-            info['uil_6a_count'] = len(uil_6a_teams)
-            info['last_updated'] = data.get('last_updated', 'N/A')
-
-            # Count teams by rank status
-            ranked_6a = [t for t in uil_6a_teams if t.get('rank') is not None and 1 <= t.get('rank') <= 25]
-            unranked_6a = [t for t in uil_6a_teams if t.get('rank') is None or t.get('rank') < 1 or t.get('rank') > 25]
-            info['uil_6a_ranked_count'] = len(ranked_6a)
-            info['uil_6a_unranked_count'] = len(unranked_6a)
-            if unranked_6a:
-                info['uil_6a_unranked_teams'] = [{'name': t['team_name'], 'rank': t.get('rank')} for t in unranked_6a[:10]]
-
-            # Count teams with records
-            teams_with_records = sum(
-                1 for classification in data['uil'].values()
-                for team in classification
-                if team.get('wins') is not None
-            )
-            info['teams_with_records'] = teams_with_records
-
-            # Sample teams with records
-            sample_teams = []
-            for classification in data['uil'].values():
-                for team in classification:
-                    if team.get('wins') is not None and len(sample_teams) < 5:
-                        sample_teams.append({
-                            'name': team['team_name'],
-                            'record': f"{team.get('wins', 0)}-{team.get('losses', 0)}",
-                            'ppg': team.get('ppg'),
-                            'district': team.get('district')
-                        })
-            info['sample_teams_with_records'] = sample_teams
-
-            # Check TAPPS districts
-            tapps_with_districts = 0
-            tapps_total = 0
-            for classification in data['private'].values():
-                for team in classification:
-                    tapps_total += 1
-                    if team.get('district'):
-                        tapps_with_districts += 1
-            info['tapps_teams_total'] = tapps_total
-            info['tapps_teams_with_districts'] = tapps_with_districts
+    data = load_rankings_data()
+    if data:
+        info['rankings_version'] = rankings_repository.version
+        info['rankings_has_data'] = 'uil' in data
+        uil_6a_teams = data.get('uil', {}).get('AAAAAA', [])
+        info['uil_6a_count'] = len(uil_6a_teams)
+        info['last_updated'] = data.get('last_updated', 'N/A')
+
+        # Count teams by rank status
+        ranked_6a = [t for t in uil_6a_teams if t.get('rank') is not None and 1 <= t.get('rank') <= 25]
+        unranked_6a = [t for t in uil_6a_teams if t.get('rank') is None or t.get('rank') < 1 or t.get('rank') > 25]
+        info['uil_6a_ranked_count'] = len(ranked_6a)
+        info['uil_6a_unranked_count'] = len(unranked_6a)
+        if unranked_6a:
+            info['uil_6a_unranked_teams'] = [{'name': t['team_name'], 'rank': t.get('rank')} for t in unranked_6a[:10]]
+
+        # Count teams with records
+        teams_with_records = sum(
+            1 for classification in data['uil'].values()
+            for team in classification
+            if team.get('wins') is not None
+        )
+        info['teams_with_records'] = teams_with_records
+
+        # Sample teams with records
+        sample_teams = []
+        for classification in data['uil'].values():
+            for team in classification:
+                if team.get('wins') is not None and len(sample_teams) < 5:
+                    sample_teams.append({
+                        'name': team['team_name'],
+                        'record': f"{team.get('wins', 0)}-{team.get('losses', 0)}",
+                        'ppg': team.get('ppg'),
+                        'district': team.get('district')
+                    })
+        info['sample_teams_with_records'] = sample_teams
+
+        # Check TAPPS districts
+        tapps_with_districts = 0
+        tapps_total = 0
+        for classification in data['private'].values():
+            for team in classification:
+                tapps_total += 1
+                if team.get('district'):
+                    tapps_with_districts += 1
+        info['tapps_teams_total'] = tapps_total
+        info['tapps_teams_with_districts'] = tapps_with_districts
 
     return jsonify(info)
 
@@ -425,23 +484,36 @@ def import_games_from_json():
             return jsonify({'success': False, 'error': 'No data provided'}), 400
 
         imported = 0
-        skipped = 0
+        new_games = []
+        duplicates = []  # Games already in the database or earlier in this batch
+        seen = set()
 
         for game_dict in games_data:
-            # Check if game already exists
+            game_date = datetime.fromisoformat(game_dict['game_date']).date()
+            key = (game_date, game_dict['team1_name'], game_dict['team2_name'],
+                   game_dict['team1_score'], game_dict['team2_score'])
+
+            if key in seen:
+                duplicates.append({**game_dict, 'duplicate_of': 'batch'})
+                continue
+            seen.add(key)
+
+            # Same date, teams and scores as a stored game
             existing = BoxScore.query.filter_by(
-                game_date=datetime.fromisoformat(game_dict['game_date']).date(),
+                game_date=game_date,
                 team1_name=game_dict['team1_name'],
-                team2_name=game_dict['team2_name']
+                team2_name=game_dict['team2_name'],
+                team1_score=game_dict['team1_score'],
+                team2_score=game_dict['team2_score']
             ).first()
 
             if existing:
-                skipped += 1
+                duplicates.append({**game_dict, 'duplicate_of': existing.id})
                 continue
 
             # Create new game
             game = BoxScore(
-                game_date=datetime.fromisoformat(game_dict['game_date']).date(),
+                game_date=game_date,
                 team1_name=game_dict['team1_name'],
                 team1_score=game_dict['team1_score'],
                 team2_name=game_dict['team2_name'],
@@ -449,18 +521,21 @@ def import_games_from_json():
                 classification=game_dict.get('classification', '')
             )
             db.session.add(game)
+            new_games.append(game)
             imported += 1
 
         db.session.commit()
 
-        # Update rankings with the new games
-        from update_rankings_with_records import update_rankings_with_records
-        update_rankings_with_records()
+        # Update rankings entries for the teams in the new games
+        update_rankings_for_teams(
+            {game.team1_id for game in new_games} | {game.team2_id for game in new_games}
+        )
 
         return jsonify({
             'success': True,
             'imported': imported,
-            'skipped': skipped,
+            'skipped': len(duplicates),
+            'duplicates': duplicates,
             'total_games_in_db': BoxScore.query.count()
         })
     except Exception as e:
@@ -493,17 +568,46 @@ def update_rankings_now():
         }), 500
 
 
+@app.route('/what-if-weights', methods=['GET', 'POST'])
+def what_if_weights():
+    """
+    Re-rank a saved source rank matrix under other weights and caps
+
+    GET lists the saved matrices. POST a JSON body with any of: matrix (name,
+    default newest), weights / max_rank / min_games (source -> value) and
+    caps (list of {source, cap, when, within}; omit to keep the current ones).
+    Returns the re-ranked diff against the published ranking.
+    """
+    if request.method == 'GET':
+        return jsonify({'matrices': list_rank_matrices()})
+
+    options = request.get_json(silent=True) or {}
+    try:
+        matrix, engine, meta = load_rank_matrix(options.get('matrix'))
+        alternate = alternate_engine(
+            engine,
+            weights=options.get('weights'),
+            max_ranks=options.get('max_rank'),
+            min_games=options.get('min_games'),
+            caps=options.get('caps')
+        )
+        diff = what_if(matrix, engine, alternate)
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'matrix': meta,
+        'engine': alternate.to_dict(),
+        **diff
+    })
+
+
 @app.route('/dump-6a-ranks', methods=['GET'])
 def dump_6a_ranks():
     """Dump all UIL 6A team ranks for debugging"""
     try:
-        import json
-        from pathlib import Path
-
-        data_file = Path(__file__).parent / 'data' / 'rankings.json'
-
-        with open(data_file, 'r') as f:
-            data = json.load(f)
+        data = load_rankings_data()
 
         teams = data['uil']['AAAAAA']
 
@@ -0,0 +1,283 @@
+"""
+Benchmark the memoized SchoolNameNormalizer against the uncached one
+
+Runs normalize(), extract_city(), extract_school_base_name() and
+are_duplicates() over the distinct team names in the database (each name
+compared with its 20 alphabetical neighbours, as deduplication does) and
+checks that both implementations give identical answers. Times the memoized
+normalizer with an empty cache and again once every name is cached.
+
+Then times deduplicate_schools() on the same names, checks its groups
+against union-find over every pair of names, and times it again on a
+synthetic list of --scale times as many names (suffix, spelling and
+numbered variants of each one). The database is opened read-only.
+
+Usage: python benchmark_school_name_normalizer.py [path/to/tbbas.db] [--neighbours N] [--scale N]
+"""
+
+import argparse
+import logging
+import random
+import re
+import sqlite3
+import time
+from datetime import datetime
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import school_name_normalizer
+from school_name_normalizer import SchoolNameNormalizer
+
+DEFAULT_DB = Path(__file__).parent / 'instance' / 'tbbas.db'
+
+logger = logging.getLogger('school_name_normalizer')
+
+
+class LegacySchoolNameNormalizer(SchoolNameNormalizer):
+    """The previous implementation, copied verbatim: every call re-normalizes its inputs"""
+
+    def normalize(self, school_name):
+        """
+        Normalize a school name to a standard format
+        Returns: normalized name (lowercase, no suffixes, expanded city names)
+        """
+        if not school_name:
+            return ""
+
+        original = school_name
+        name = school_name.lower().strip()
+
+        # Remove common punctuation
+        name = re.sub(r'[.,\-\'"]', ' ', name)
+
+        # Normalize whitespace
+        name = ' '.join(name.split())
+
+        # Expand city abbreviations at the beginning
+        words = name.split()
+        if words and words[0] in self.CITY_ABBREVIATIONS:
+            words[0] = self.CITY_ABBREVIATIONS[words[0]]
+            name = ' '.join(words)
+
+        # Remove school suffixes from the end
+        for suffix in self.SCHOOL_SUFFIXES:
+            if name.endswith(' ' + suffix):
+                name = name[:-len(suffix)-1].strip()
+
+        logger.debug(f"Normalized: '{original}' -> '{name}'")
+        return name
+
+    def extract_city(self, school_name):
+        """
+        Try to extract city name from school name
+        Returns: city name or None
+        """
+        normalized = self.normalize(school_name)
+        words = normalized.split()
+
+        if not words:
+            return None
+
+        # Check if first word(s) are a known city
+        # Try two-word cities first
+        if len(words) >= 2:
+            two_word = f"{words[0]} {words[1]}"
+            for city, variations in self.CITY_EXPANSIONS.items():
+                if two_word in variations:
+                    return city
+
+        # Try one-word cities
+        if words[0] in self.CITY_ABBREVIATIONS.values():
+            return words[0]
+
+        for city, variations in self.CITY_EXPANSIONS.items():
+            if words[0] in variations:
+                return city
+
+        return None
+
+    def extract_school_base_name(self, school_name):
+        """
+        Extract the base school name (without city prefix)
+        e.g., "Arlington Sam Houston" -> "sam houston"
+        """
+        normalized = self.normalize(school_name)
+        city = self.extract_city(school_name)
+
+        if city:
+            # Remove city from beginning
+            for variation in self.CITY_EXPANSIONS.get(city, [city]):
+                if normalized.startswith(variation + ' '):
+                    return normalized[len(variation)+1:].strip()
+
+        return normalized
+
+    def similarity_score(self, name1, name2):
+        """
+        Calculate similarity score between two school names (0-1)
+        Uses sequence matching on normalized names
+        """
+        norm1 = self.normalize(name1)
+        norm2 = self.normalize(name2)
+
+        return SequenceMatcher(None, norm1, norm2).ratio()
+
+    def are_duplicates(self, name1, name2, threshold=0.90):
+        """
+        Determine if two school names refer to the same school
+        Uses fuzzy matching and city detection
+        """
+        if not name1 or not name2:
+            return False
+
+        # Exact match after normalization
+        norm1 = self.normalize(name1)
+        norm2 = self.normalize(name2)
+
+        if norm1 == norm2:
+            return True
+
+        # High similarity score
+        similarity = self.similarity_score(name1, name2)
+        if similarity >= threshold:
+            return True
+
+        # Check if they have the same base name and city
+        city1 = self.extract_city(name1)
+        city2 = self.extract_city(name2)
+        base1 = self.extract_school_base_name(name1)
+        base2 = self.extract_school_base_name(name2)
+
+        if city1 and city2 and base1 and base2:
+            if city1 == city2 and base1 == base2:
+                return True
+
+        return False
+
+
+def load_team_names(db_path):
+    """Distinct team names from box scores"""
+    conn = sqlite3.connect(f'file:{Path(db_path).resolve()}?mode=ro', uri=True)
+    names = [row[0] for row in conn.execute(
+        'SELECT team1_name FROM box_score UNION SELECT team2_name FROM box_score'
+    ) if row[0]]
+    conn.close()
+    return sorted(names)
+
+
+def workload(normalizer, names, neighbours):
+    """Every answer the benchmark compares"""
+    keys = [
+        (normalizer.normalize(name), normalizer.extract_city(name), normalizer.extract_school_base_name(name))
+        for name in names
+    ]
+    duplicates = [
+        (i, j)
+        for i in range(len(names))
+        for j in range(i + 1, min(i + 1 + neighbours, len(names)))
+        if normalizer.are_duplicates(names[i], names[j])
+    ]
+    return keys, duplicates
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def benchmark(names, neighbours):
+    pairs = sum(min(neighbours, len(names) - i - 1) for i in range(len(names)))
+    print(f"\n{len(names):,} distinct team names, {pairs:,} are_duplicates() pairs")
+
+    legacy_time, legacy = timed(lambda: workload(LegacySchoolNameNormalizer(), names, neighbours))
+
+    school_name_normalizer._normalize.cache_clear()
+    school_name_normalizer._name_keys.cache_clear()
+    normalizer = SchoolNameNormalizer()
+    cold_time, cold = timed(lambda: workload(normalizer, names, neighbours))
+    warm_time, warm = timed(lambda: workload(normalizer, names, neighbours))
+
+    matches = legacy == cold == warm
+    print(f"  uncached:          {legacy_time * 1000:8.1f} ms")
+    print(f"  memoized (cold):   {cold_time * 1000:8.1f} ms  ({legacy_time / cold_time:.1f}x)")
+    print(f"  memoized (warm):   {warm_time * 1000:8.1f} ms  ({legacy_time / warm_time:.1f}x)")
+    print(f"  duplicate pairs:   {len(legacy[1]):,}")
+    print(f"  identical answers: {'✓' if matches else '✗'}")
+    return matches
+
+
+def exhaustive_deduplicate(normalizer, names):
+    """deduplicate_schools() groups found by comparing every pair of names"""
+    parent = list(range(len(names)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j and normalizer.are_duplicates(names[i], names[j]):
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for i, name in enumerate(names):
+        groups.setdefault(find(i), []).append(name)
+    return [normalizer.find_canonical_name(group) for group in groups.values()]
+
+
+def synthetic_names(names, scale, seed=0):
+    """scale variants of every name, shuffled"""
+    rng = random.Random(seed)
+    variants = []
+    for copy in range(scale):
+        for name in names:
+            roll = rng.random()
+            if roll < 0.5:
+                variants.append(name + rng.choice([' HS', ' High School', '']))
+            elif roll < 0.7:
+                variants.append(name.replace('a', 'e', 1))
+            else:
+                variants.append(f'{name} {copy}')
+    rng.shuffle(variants)
+    return variants
+
+
+def benchmark_deduplicate(names, scale):
+    normalizer = SchoolNameNormalizer()
+
+    blocked_time, blocked = timed(lambda: normalizer.deduplicate_schools(names))
+    exhaustive_time, exhaustive = timed(lambda: exhaustive_deduplicate(normalizer, names))
+
+    matches = blocked == exhaustive
+    print(f"\ndeduplicate_schools(), {len(names):,} names -> {len(blocked):,} schools")
+    print(f"  every pair:        {exhaustive_time * 1000:8.1f} ms")
+    print(f"  blocked:           {blocked_time * 1000:8.1f} ms  ({exhaustive_time / blocked_time:.1f}x)")
+    print(f"  identical groups:  {'✓' if matches else '✗'}")
+
+    synthetic = synthetic_names(names, scale)
+    synthetic_time, deduplicated = timed(lambda: normalizer.deduplicate_schools(synthetic))
+    print(f"\ndeduplicate_schools(), {len(synthetic):,} synthetic names ({scale}x) -> {len(deduplicated):,} schools")
+    print(f"  blocked:           {synthetic_time * 1000:8.1f} ms")
+    return matches
+
+
+if __name__ == '__main__':
+    logging.getLogger('school_name_normalizer').setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db_path', nargs='?', default=str(DEFAULT_DB))
+    parser.add_argument('--neighbours', type=int, default=20)
+    parser.add_argument('--scale', type=int, default=9)
+    args = parser.parse_args()
+
+    print(f"Benchmark started {datetime.now().isoformat(timespec='seconds')}")
+
+    names = load_team_names(args.db_path)
+    ok = benchmark(names, args.neighbours)
+    ok = benchmark_deduplicate(names, args.scale) and ok
+
+    if not ok:
+        raise SystemExit("\nFAILED: answers differ between implementations")
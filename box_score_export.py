@@ -0,0 +1,139 @@
+"""
+Box Score Export
+Streams box_score as NDJSON or CSV without loading the table into memory
+
+Rows are read in id order through a server-side cursor (yield_per) and
+written one line at a time, so memory stays flat whatever the table size.
+`since` makes pulls incremental: an ISO date exports games on or after that
+date, an integer exports rows with a larger id than the last one mirrored.
+
+Usage: python box_score_export.py [--format ndjson|csv] [--since DATE|ID] [-o FILE]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+from datetime import date
+
+from sqlalchemy import select
+
+from models import db, BoxScore
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows fetched per round trip; also the most ORM objects alive at once
+BATCH_SIZE = 1000
+
+CSV_COLUMNS = [column.name for column in BoxScore.__table__.columns]
+
+
+def parse_since(since):
+    """
+    Parse a since= value into a filter criterion
+
+    Returns: SQLAlchemy criterion, or None if since is empty
+    Raises: ValueError if since is neither an ISO date nor an integer id
+    """
+    if not since:
+        return None
+    if since.isdigit():
+        return BoxScore.id > int(since)
+    return BoxScore.game_date >= date.fromisoformat(since)
+
+
+def iter_box_scores(since=None):
+    """Box scores in id order, fetched BATCH_SIZE rows at a time (needs app context)"""
+    statement = select(BoxScore).order_by(BoxScore.id)
+
+    criterion = parse_since(since)
+    if criterion is not None:
+        statement = statement.where(criterion)
+
+    return db.session.execute(
+        statement.execution_options(yield_per=BATCH_SIZE)
+    ).scalars()
+
+
+def iter_ndjson(box_scores):
+    """One JSON object per line, in the same shape as BoxScore.to_dict()"""
+    for box_score in box_scores:
+        yield json.dumps(box_score.to_dict()) + '\n'
+
+
+def iter_csv(box_scores):
+    """Header line, then one flat row per box score using the table's column names"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+
+    for box_score in box_scores:
+        row = []
+        for name in CSV_COLUMNS:
+            value = getattr(box_score, name)
+            row.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        writer.writerow(row)
+        yield flush()
+
+
+def export_lines(format='ndjson', since=None):
+    """
+    Generator of export lines
+
+    Raises: ValueError for an unknown format or a malformed since value
+            (checked before the first row is read)
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r} (expected one of {', '.join(FORMATS)})")
+
+    box_scores = iter_box_scores(since)
+    return iter_ndjson(box_scores) if format == 'ndjson' else iter_csv(box_scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export box scores as NDJSON or CSV')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+    parser.add_argument('--since', help='ISO date (games on/after) or box score id (rows after)')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    args = parser.parse_args()
+
+    # Keep app startup messages out of an export written to stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        from app import app
+
+    with app.app_context():
+        try:
+            lines = export_lines(args.format, args.since)
+        except ValueError as e:
+            parser.error(str(e))
+
+        out = open(args.output, 'w', newline='') if args.output else sys.stdout
+        try:
+            count = 0
+            for line in lines:
+                out.write(line)
+                count += 1
+        finally:
+            if args.output:
+                out.close()
+
+    if args.output:
+        rows = count - 1 if args.format == 'csv' else count
+        print(f"✓ Exported {rows} box scores to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Check that the hot box_score queries are served by an index
+
+Runs EXPLAIN QUERY PLAN for each query the app and ranking jobs issue on
+every request/run and fails if any of them falls back to a full table scan.
+
+Usage: python check_query_plans.py [path/to/tbbas.db]
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+DEFAULT_DB = Path(__file__).parent / 'instance' / 'tbbas.db'
+
+# (description, sql, params)
+HOT_QUERIES = [
+    (
+        '/boxscores first page (newest first)',
+        'SELECT * FROM box_score ORDER BY game_date DESC, id DESC LIMIT 101',
+        ()
+    ),
+    (
+        '/boxscores next page (keyset cursor)',
+        '''SELECT * FROM box_score
+           WHERE game_date < ? OR (game_date = ? AND id < ?)
+           ORDER BY game_date DESC, id DESC LIMIT 101''',
+        ('2025-12-01', '2025-12-01', 5000)
+    ),
+    (
+        '/api/boxscores/<classification> (keyset cursor)',
+        '''SELECT * FROM box_score
+           WHERE classification = ? AND (game_date < ? OR (game_date = ? AND id < ?))
+           ORDER BY game_date DESC, id DESC LIMIT 51''',
+        ('AAAAAA', '2025-12-01', '2025-12-01', 5000)
+    ),
+    (
+        'RankingCalculator classification filter',
+        'SELECT * FROM box_score WHERE classification = ?',
+        ('AAAAAA',)
+    ),
+    (
+        'Duplicate check (save_games_to_db, /import-games-from-json)',
+        'SELECT id FROM box_score WHERE game_date = ? AND team1_name = ? AND team2_name = ? LIMIT 1',
+        ('2025-12-02', 'Allen', 'Plano')
+    ),
+    (
+        'Team games by exact name (fill_missing_data.get_team_stats_from_db)',
+        'SELECT COUNT(*) FROM box_score WHERE team1_name = ? OR team2_name = ?',
+        ('Allen', 'Allen')
+    ),
+    (
+        'Team game log (/api/teams/<team>/games)',
+        'SELECT * FROM box_score WHERE team1_id = ? OR team2_id = ? ORDER BY game_date, id',
+        (219, 219)
+    ),
+]
+
+
+def uses_index(plan_rows):
+    """True if no step of the plan is a bare full scan of box_score"""
+    for row in plan_rows:
+        detail = row[-1]
+        if detail.startswith('SCAN box_score') and 'USING' not in detail:
+            return False
+    return True
+
+
+def check_query_plans(db_path=DEFAULT_DB):
+    """Print each hot query's plan; return True if every one uses an index"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    all_ok = True
+    for description, sql, params in HOT_QUERIES:
+        plan = cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+        ok = uses_index(plan)
+        all_ok = all_ok and ok
+
+        print(f"{'✓' if ok else '✗'} {description}")
+        for row in plan:
+            print(f"    {row[-1]}")
+
+    conn.close()
+    return all_ok
+
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB
+    if not check_query_plans(db_path):
+        print("\nFAILED: some hot queries scan the full box_score table")
+        sys.exit(1)
+    print("\nAll hot queries use an index")
@@ -0,0 +1,170 @@
+"""
+Consensus Rankings
+Weighted consensus of any number of ranked sources, for every classification at once
+
+A RankMatrix holds one row per team (across all classifications) and one
+column per source, with NaN where a source doesn't rank the team. A
+ConsensusEngine describes how to combine the columns:
+
+    Source  name, weight, and coverage rules - a rank only counts if it is
+            within max_rank and the team has at least min_games box scores
+    Cap     limit one source's rank when other sources agree the team is
+            good (e.g. calculated rank capped at 30 when TABC and MaxPreps
+            both have the team in their top 15)
+
+The consensus is the weighted average of the ranks that count, normalized
+by the weights present, computed for all rows in one NumPy pass. Building
+the matrix (name matching, database lookups) is done once by the caller,
+so trying other weights or caps only re-runs ConsensusEngine.rank().
+"""
+
+import numpy as np
+
+
+class Source:
+    """One ranked source and the rules for when its rank counts"""
+
+    def __init__(self, name, weight=1.0, max_rank=None, min_games=0):
+        self.name = name
+        self.weight = weight
+        self.max_rank = max_rank
+        self.min_games = min_games
+
+    def to_dict(self):
+        return {'name': self.name, 'weight': self.weight,
+                'max_rank': self.max_rank, 'min_games': self.min_games}
+
+
+class Cap:
+    """Cap `source` at `cap` when every source in `when` ranks the team within `within`"""
+
+    def __init__(self, source, cap, when, within):
+        self.source = source
+        self.cap = cap
+        self.when = tuple(when)
+        self.within = within
+
+    def to_dict(self):
+        return {'source': self.source, 'cap': self.cap, 'when': list(self.when), 'within': self.within}
+
+
+class RankMatrix:
+    """
+    Team x source rank matrix plus what's needed to turn scores back into rankings
+
+    Args:
+        sources: Column names, in the order the engine averages them
+        rows: List of dicts with classification, team_name, ranks
+              (source -> rank or None), games (optional) and payload
+              (optional dict copied into the output entry)
+        limits: dict of classification -> number of teams to keep (all if missing)
+    """
+
+    def __init__(self, sources, rows, limits=None):
+        self.sources = list(sources)
+        self.rows = rows
+        self.limits = dict(limits or {})
+
+        self.classifications = list(dict.fromkeys(row['classification'] for row in rows))
+        class_index = {classification: i for i, classification in enumerate(self.classifications)}
+        self.class_index = np.array([class_index[row['classification']] for row in rows], dtype=np.int64)
+
+        self.ranks = np.array([
+            [np.nan if row['ranks'].get(source) is None else row['ranks'][source] for source in self.sources]
+            for row in rows
+        ], dtype=np.float64).reshape(len(rows), len(self.sources))
+        self.games = np.array([row.get('games') or 0 for row in rows], dtype=np.float64)
+
+    def column(self, source):
+        return self.sources.index(source)
+
+    def to_dict(self):
+        return {'sources': self.sources, 'rows': self.rows, 'limits': self.limits}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['sources'], data['rows'], data.get('limits'))
+
+
+class ConsensusEngine:
+    """
+    Weighted consensus over a RankMatrix
+
+    Args:
+        sources: List of Source; each must be a column of the matrices ranked
+        caps: List of Cap rules, applied to the raw ranks before averaging
+        unranked: Score for teams no counted source ranks (None drops them)
+        decimals: Round scores to this many places before sorting (None keeps them exact)
+    """
+
+    def __init__(self, sources, caps=(), unranked=None, decimals=None):
+        self.sources = list(sources)
+        self.caps = list(caps)
+        self.unranked = unranked
+        self.decimals = decimals
+
+    def to_dict(self):
+        return {
+            'sources': [source.to_dict() for source in self.sources],
+            'caps': [cap.to_dict() for cap in self.caps],
+            'unranked': self.unranked,
+            'decimals': self.decimals
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            [Source(**source) for source in data['sources']],
+            [Cap(**cap) for cap in data.get('caps', [])],
+            data.get('unranked'),
+            data.get('decimals')
+        )
+
+    def scores(self, matrix):
+        """Consensus score per matrix row (NaN for rows dropped as unranked)"""
+        columns = [matrix.column(source.name) for source in self.sources]
+        ranks = matrix.ranks[:, columns]
+
+        for cap in self.caps:
+            column = [source.name for source in self.sources].index(cap.source)
+            agree = np.ones(len(ranks), dtype=bool)
+            for name in cap.when:
+                agree &= matrix.ranks[:, matrix.column(name)] <= cap.within
+            capped = agree & ~np.isnan(ranks[:, column])
+            ranks[capped, column] = np.minimum(ranks[capped, column], cap.cap)
+
+        counted = ~np.isnan(ranks)
+        for i, source in enumerate(self.sources):
+            if source.max_rank is not None:
+                counted[:, i] &= ranks[:, i] <= source.max_rank
+            if source.min_games:
+                counted[:, i] &= matrix.games >= source.min_games
+
+        weights = np.where(counted, [source.weight for source in self.sources], 0.0)
+        total_weight = weights.sum(axis=1)
+        weighted = np.where(counted, ranks * weights, 0.0).sum(axis=1)
+
+        scores = np.full(len(ranks), np.nan if self.unranked is None else float(self.unranked))
+        np.divide(weighted, total_weight, out=scores, where=total_weight > 0)
+        if self.decimals is not None:
+            scores = np.round(scores, self.decimals)
+        return scores
+
+    def rank(self, matrix):
+        """
+        Rank every classification in the matrix
+
+        Ties keep matrix row order. Returns: dict of classification ->
+        list of (row index, score) in rank order, cut to the matrix limits
+        """
+        scores = self.scores(matrix)
+        kept = np.flatnonzero(~np.isnan(scores))
+        order = kept[np.lexsort((kept, scores[kept], matrix.class_index[kept]))]
+
+        ranked = {classification: [] for classification in matrix.classifications}
+        for row in order.tolist():
+            classification = matrix.rows[row]['classification']
+            teams = ranked[classification]
+            if len(teams) < matrix.limits.get(classification, len(matrix.rows)):
+                teams.append((row, float(scores[row])))
+        return ranked
@@ -7,6 +7,9 @@ NOTE: Weights are applied internally only - not displayed on website
 import json
 from datetime import datetime
 from pathlib import Path
+from rankings_store import publish_rankings
+from consensus import ConsensusEngine, RankMatrix, Source
+from rank_matrices import save_rank_matrix
 
 
 def load_rankings_file(filename):
@@ -113,133 +116,121 @@ def normalize_team_name(name, is_private=False):
     return name
 
 
-def merge_classification_rankings(tabc_teams, maxpreps_teams, gaso_teams, classification, max_teams=25):
-    """
-    Merge rankings from three sources using weighted average:
-    - TABC: 50%
-    - MaxPreps: 40%
-    - GASO: 10%
+# Weights: TABC 50%, MaxPreps 40%, GASO 10% - a source's rank only counts
+# inside its top 50; teams no source counts get UNRANKED
+TABC_WEIGHT = 0.50
+MAXPREPS_WEIGHT = 0.40
+GASO_WEIGHT = 0.10
+UNRANKED = 999
 
-    Args:
-        tabc_teams: List of teams from TABC rankings
-        maxpreps_teams: List of teams from MaxPreps rankings
-        gaso_teams: List of teams from GASO rankings
-        classification: Classification code (e.g., 'AAAAAA')
-        max_teams: Maximum teams to return (25 for UIL, 10 for TAPPS)
+SOURCES = ['tabc', 'maxpreps', 'gaso']
 
-    Returns:
-        List of merged team rankings
+WEIGHTED_ENGINE = ConsensusEngine(
+    [
+        Source('tabc', TABC_WEIGHT, max_rank=50),
+        Source('maxpreps', MAXPREPS_WEIGHT, max_rank=50),
+        Source('gaso', GASO_WEIGHT, max_rank=50),
+    ],
+    unranked=UNRANKED,
+    decimals=2
+)
+
+
+def classification_rows(tabc_teams, maxpreps_teams, gaso_teams, classification):
+    """
+    Match one classification's teams across sources into RankMatrix rows
+
+    TABC names are authoritative. For TAPPS, teams only MaxPreps or GASO
+    rank are skipped (they don't have records).
     """
     team_data = {}
     is_tapps = classification.startswith('TAPPS')
 
-    # Process TABC rankings (50% weight) - TABC names are authoritative
+    # TABC names are used as canonical
     for team in tabc_teams:
         normalized = normalize_team_name(team['team_name'], is_private=is_tapps)
         if normalized not in team_data:
             team_data[normalized] = {
-                'team_name': team['team_name'],  # Use TABC name as canonical
                 'classification': classification,
-            }
-        team_data[normalized]['tabc_rank'] = team['rank']
-        team_data[normalized]['tabc_wins'] = team.get('wins', 0)
-        team_data[normalized]['tabc_losses'] = team.get('losses', 0)
-
-    # Process MaxPreps rankings (40% weight)
-    for team in maxpreps_teams:
-        normalized = normalize_team_name(team['team_name'], is_private=is_tapps)
-        if normalized in team_data:
-            # Match found - add MaxPreps rank
-            team_data[normalized]['maxpreps_rank'] = team['rank']
-        elif not is_tapps:
-            # For UIL only: add as new team if no TABC match
-            team_data[normalized] = {
                 'team_name': team['team_name'],
-                'classification': classification,
-                'maxpreps_rank': team['rank']
+                'ranks': {},
+                'payload': {}
             }
-        # For TAPPS: skip MaxPreps-only teams (they don't have records)
+        team_data[normalized]['ranks']['tabc'] = team['rank']
+        team_data[normalized]['payload'] = {'wins': team.get('wins', 0), 'losses': team.get('losses', 0)}
+
+    for source, teams in (('maxpreps', maxpreps_teams), ('gaso', gaso_teams)):
+        for team in teams:
+            normalized = normalize_team_name(team['team_name'], is_private=is_tapps)
+            if normalized in team_data:
+                # Match found - add this source's rank
+                team_data[normalized]['ranks'][source] = team['rank']
+            elif not is_tapps:
+                # For UIL only: add as new team if no TABC match
+                team_data[normalized] = {
+                    'classification': classification,
+                    'team_name': team['team_name'],
+                    'ranks': {source: team['rank']},
+                    'payload': {}
+                }
+
+    return list(team_data.values())
+
+
+def rank_weighted_matrix(matrix, engine=WEIGHTED_ENGINE):
+    """
+    Consensus rankings for every classification in the matrix
 
-    # Process GASO rankings (10% weight)
-    for team in gaso_teams:
-        normalized = normalize_team_name(team['team_name'], is_private=is_tapps)
-        if normalized in team_data:
-            # Match found - add GASO rank
-            team_data[normalized]['gaso_rank'] = team['rank']
-        elif not is_tapps:
-            # For UIL only: add as new team if no TABC match
-            team_data[normalized] = {
-                'team_name': team['team_name'],
+    Returns: dict of classification -> list of ranked team dicts
+    """
+    merged = {}
+    for classification, ranked in engine.rank(matrix).items():
+        teams = []
+        for rank, (row_index, consensus_rank) in enumerate(ranked, 1):
+            row = matrix.rows[row_index]
+            # Use TABC record as authoritative (they track official records)
+            wins = row['payload'].get('wins', 0)
+            losses = row['payload'].get('losses', 0)
+            teams.append({
+                'rank': rank,
+                'team_name': row['team_name'],
+                'wins': wins,
+                'losses': losses,
+                'record': f"{wins}-{losses}" if wins or losses else "",
                 'classification': classification,
-                'gaso_rank': team['rank']
-            }
-        # For TAPPS: skip GASO-only teams (they don't have records)
-
-    # Calculate weighted average rankings
-    # Weights: TABC 50%, MaxPreps 40%, GASO 10%
-    TABC_WEIGHT = 0.50
-    MAXPREPS_WEIGHT = 0.40
-    GASO_WEIGHT = 0.10
-
-    final_teams = []
-
-    for normalized, data in team_data.items():
-        tabc_rank = data.get('tabc_rank')
-        maxpreps_rank = data.get('maxpreps_rank')
-        gaso_rank = data.get('gaso_rank')
+                'consensus_rank': UNRANKED if consensus_rank == UNRANKED else consensus_rank,
+                # Store source ranks for reference (not displayed on website)
+                'tabc_rank': row['ranks'].get('tabc'),
+                'maxpreps_rank': row['ranks'].get('maxpreps'),
+                'gaso_rank': row['ranks'].get('gaso'),
+            })
+        merged[classification] = teams
+    return merged
 
-        # Collect available ranks and their weights
-        available_ranks = []
-        total_weight = 0
 
-        if tabc_rank is not None and tabc_rank <= 50:
-            available_ranks.append((tabc_rank, TABC_WEIGHT))
-            total_weight += TABC_WEIGHT
-
-        if maxpreps_rank is not None and maxpreps_rank <= 50:
-            available_ranks.append((maxpreps_rank, MAXPREPS_WEIGHT))
-            total_weight += MAXPREPS_WEIGHT
+def merge_classification_rankings(tabc_teams, maxpreps_teams, gaso_teams, classification, max_teams=25):
+    """
+    Merge rankings from three sources using weighted average:
+    - TABC: 50%
+    - MaxPreps: 40%
+    - GASO: 10%
 
-        if gaso_rank is not None and gaso_rank <= 50:
-            available_ranks.append((gaso_rank, GASO_WEIGHT))
-            total_weight += GASO_WEIGHT
+    Args:
+        tabc_teams: List of teams from TABC rankings
+        maxpreps_teams: List of teams from MaxPreps rankings
+        gaso_teams: List of teams from GASO rankings
+        classification: Classification code (e.g., 'AAAAAA')
+        max_teams: Maximum teams to return (25 for UIL, 10 for TAPPS)
 
-        # Calculate weighted average (normalize weights if not all sources available)
-        if available_ranks and total_weight > 0:
-            weighted_sum = sum(rank * weight for rank, weight in available_ranks)
-            consensus_rank = weighted_sum / total_weight
-        else:
-            # Not ranked by any source in top 50
-            consensus_rank = 999
-
-        # Use TABC record as authoritative (they track official records)
-        wins = data.get('tabc_wins', 0)
-        losses = data.get('tabc_losses', 0)
-
-        final_teams.append({
-            'rank': 0,  # Will be assigned after sorting
-            'team_name': data['team_name'],
-            'wins': wins,
-            'losses': losses,
-            'record': f"{wins}-{losses}" if wins or losses else "",
-            'classification': classification,
-            'consensus_rank': round(consensus_rank, 2),
-            # Store source ranks for reference (not displayed on website)
-            'tabc_rank': tabc_rank,
-            'maxpreps_rank': maxpreps_rank,
-            'gaso_rank': gaso_rank,
-        })
-
-    # Sort by consensus rank (weighted average)
-    final_teams.sort(key=lambda x: x['consensus_rank'])
-
-    # Assign final sequential ranks (1, 2, 3, ...) and limit to max_teams
-    result = []
-    for i, team in enumerate(final_teams[:max_teams], 1):
-        team['rank'] = i
-        result.append(team)
-
-    return result
+    Returns:
+        List of merged team rankings
+    """
+    matrix = RankMatrix(
+        SOURCES,
+        classification_rows(tabc_teams, maxpreps_teams, gaso_teams, classification),
+        {classification: max_teams}
+    )
+    return rank_weighted_matrix(matrix).get(classification, [])
 
 
 def merge_all_rankings():
@@ -285,35 +276,33 @@ def merge_all_rankings():
         'private': {}
     }
 
-    # UIL classifications - Top 25
+    # One matrix for all classifications: UIL top 25, TAPPS top 10
     uil_classes = ['AAAAAA', 'AAAAA', 'AAAA', 'AAA', 'AA', 'A']
-    for classification in uil_classes:
-        tabc_teams = tabc.get('uil', {}).get(classification, [])
-        maxpreps_teams = maxpreps.get('uil', {}).get(classification, [])
-        gaso_teams = gaso.get('uil', {}).get(classification, [])
+    tapps_classes = ['TAPPS_6A', 'TAPPS_5A', 'TAPPS_4A', 'TAPPS_3A', 'TAPPS_2A', 'TAPPS_1A']
 
-        merged = merge_classification_rankings(
-            tabc_teams, maxpreps_teams, gaso_teams,
-            classification, max_teams=25
-        )
-        final_rankings['uil'][classification] = merged
+    rows = []
+    limits = {}
+    for league, classes, max_teams in (('uil', uil_classes, 25), ('private', tapps_classes, 10)):
+        for classification in classes:
+            rows += classification_rows(
+                tabc.get(league, {}).get(classification, []),
+                maxpreps.get(league, {}).get(classification, []),
+                gaso.get(league, {}).get(classification, []),
+                classification
+            )
+            limits[classification] = max_teams
+
+    matrix = RankMatrix(SOURCES, rows, limits)
+    save_rank_matrix('weighted', matrix, WEIGHTED_ENGINE)
+    merged = rank_weighted_matrix(matrix)
 
-        print(f"  UIL {classification}: {len(merged)} teams")
+    for classification in uil_classes:
+        final_rankings['uil'][classification] = merged.get(classification, [])
+        print(f"  UIL {classification}: {len(final_rankings['uil'][classification])} teams")
 
-    # TAPPS classifications - Top 10
-    tapps_classes = ['TAPPS_6A', 'TAPPS_5A', 'TAPPS_4A', 'TAPPS_3A', 'TAPPS_2A', 'TAPPS_1A']
     for classification in tapps_classes:
-        tabc_teams = tabc.get('private', {}).get(classification, [])
-        maxpreps_teams = maxpreps.get('private', {}).get(classification, [])
-        gaso_teams = gaso.get('private', {}).get(classification, [])
-
-        merged = merge_classification_rankings(
-            tabc_teams, maxpreps_teams, gaso_teams,
-            classification, max_teams=10
-        )
-        final_rankings['private'][classification] = merged
-
-        print(f"  {classification}: {len(merged)} teams")
+        final_rankings['private'][classification] = merged.get(classification, [])
+        print(f"  {classification}: {len(final_rankings['private'][classification])} teams")
 
     print()
     print("=" * 60)
@@ -324,9 +313,8 @@ def merge_all_rankings():
 
 
 def save_rankings(rankings, output_file='data/rankings.json'):
-    """Save merged rankings to file"""
-    with open(output_file, 'w') as f:
-        json.dump(rankings, f, indent=2)
+    """Save merged rankings to file along with per-classification view models"""
+    publish_rankings(rankings, output_file)
     print(f"\nSaved to {output_file}")
 
 
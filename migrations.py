@@ -0,0 +1,180 @@
+"""
+Database Migrations
+Versioned schema changes applied on startup after db.create_all()
+
+db.create_all() only creates missing tables, so changes to existing tables
+(indexes, constraints, new columns) are listed here in order. Each migration
+runs once; applied versions are recorded in the schema_migrations table.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from models import db, PLACEHOLDER_GAME_FILTER, TeamSeasonStats
+from teams import backfill_team_ids
+from team_stats import rebuild_team_season_stats, create_team_stats_triggers
+
+
+def _quarantine_box_scores(conn, ids, reason):
+    """Move box_score rows into box_score_quarantine (same columns plus why and when)"""
+    if not ids:
+        return 0
+
+    conn.execute(text('''
+        CREATE TABLE IF NOT EXISTS box_score_quarantine AS
+        SELECT * FROM box_score WHERE 0
+    '''))
+    columns = {column['name'] for column in inspect(conn).get_columns('box_score_quarantine')}
+    for column, column_type in (('quarantine_reason', 'VARCHAR(50)'), ('quarantined_at', 'DATETIME')):
+        if column not in columns:
+            conn.execute(text(f'ALTER TABLE box_score_quarantine ADD COLUMN {column} {column_type}'))
+
+    # Only the columns both tables have, in case box_score gained some since
+    shared = [column['name'] for column in inspect(conn).get_columns('box_score') if column['name'] in columns]
+    column_list = ', '.join(shared)
+    moved = 0
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ', '.join(f':id{i}' for i in range(len(chunk)))
+        params = {f'id{i}': game_id for i, game_id in enumerate(chunk)}
+        conn.execute(
+            text(f'''
+                INSERT INTO box_score_quarantine ({column_list}, quarantine_reason, quarantined_at)
+                SELECT {column_list}, :reason, :now FROM box_score WHERE id IN ({placeholders})
+            '''),
+            {**params, 'reason': reason, 'now': datetime.utcnow()}
+        )
+        moved += conn.execute(text(f'DELETE FROM box_score WHERE id IN ({placeholders})'), params).rowcount
+    return moved
+
+
+def _box_score_game_identity(conn):
+    """
+    Unique index on (date, teams, scores) for games against real opponents
+
+    Only exact repeats (same date, teams and scores) block the index; all
+    but the lowest id of each are moved to box_score_quarantine rather than
+    deleted. Same-day games with different scores are kept as separate
+    games, and games against placeholder opponents (PLACEHOLDER_OPPONENTS)
+    are left alone.
+    """
+    repeats = [row[0] for row in conn.execute(text(f'''
+        SELECT id FROM box_score
+        WHERE {PLACEHOLDER_GAME_FILTER}
+          AND id NOT IN (
+            SELECT MIN(id) FROM box_score
+            WHERE {PLACEHOLDER_GAME_FILTER}
+            GROUP BY game_date, team1_name, team2_name, team1_score, team2_score
+          )
+        ORDER BY id
+    '''))]
+    moved = _quarantine_box_scores(conn, repeats, 'duplicate')
+    if moved:
+        print(f"  Moved {moved} repeated games to box_score_quarantine before adding unique constraint")
+
+    conn.execute(text('DROP INDEX IF EXISTS uq_box_score_game'))
+    conn.execute(text(f'''
+        CREATE UNIQUE INDEX uq_box_score_game
+        ON box_score (game_date, team1_name, team2_name, team1_score, team2_score)
+        WHERE {PLACEHOLDER_GAME_FILTER}
+    '''))
+
+
+def _box_score_indexes(conn):
+    """Composite indexes for the hot box_score queries plus a unique game identity"""
+    _box_score_game_identity(conn)
+
+    conn.execute(text('''
+        CREATE INDEX IF NOT EXISTS ix_box_score_date_id
+        ON box_score (game_date, id)
+    '''))
+    conn.execute(text('''
+        CREATE INDEX IF NOT EXISTS ix_box_score_classification_date_id
+        ON box_score (classification, game_date, id)
+    '''))
+    conn.execute(text('''
+        CREATE INDEX IF NOT EXISTS ix_box_score_team1_name
+        ON box_score (team1_name)
+    '''))
+    conn.execute(text('''
+        CREATE INDEX IF NOT EXISTS ix_box_score_team2_name
+        ON box_score (team2_name)
+    '''))
+
+
+def _team_ids(conn):
+    """team1_id/team2_id foreign keys on box_score, backfilled from the team names"""
+    columns = {column['name'] for column in inspect(conn).get_columns('box_score')}
+    for side in ('team1', 'team2'):
+        if f'{side}_id' not in columns:
+            conn.execute(text(f'ALTER TABLE box_score ADD COLUMN {side}_id INTEGER REFERENCES team(id)'))
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_box_score_{side}_id ON box_score ({side}_id)'))
+
+    aliases = backfill_team_ids(conn)
+    print(f"  Resolved {aliases} team names to team ids")
+
+
+def _team_season_stats(conn):
+    """team_season_stats table, filled from the games already in box_score"""
+    TeamSeasonStats.__table__.create(conn, checkfirst=True)
+    rows = rebuild_team_season_stats(conn)
+    print(f"  Built season totals for {rows} team seasons")
+
+
+def _team_season_stats_triggers(conn):
+    """Keep team_season_stats current from the database itself, for writes that bypass the ORM"""
+    if conn.dialect.name != 'sqlite':
+        return
+    create_team_stats_triggers(conn)
+    # Pick up anything raw sqlite3 scripts wrote since the table was built
+    backfill_team_ids(conn)
+    rebuild_team_season_stats(conn)
+
+
+# (version, description, function) - append only, never renumber
+MIGRATIONS = [
+    (1, 'box_score indexes and unique game identity', _box_score_indexes),
+    (2, 'team table and box_score team ids', _team_ids),
+    (3, 'team season aggregates', _team_season_stats),
+    (4, 'team season aggregate triggers', _team_season_stats_triggers),
+    (5, 'unique game identity includes scores, placeholder games exempt', _box_score_game_identity),
+]
+
+
+def run_migrations():
+    """Apply any migrations newer than the database's recorded version (needs app context)"""
+    with db.engine.begin() as conn:
+        conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description VARCHAR(200) NOT NULL,
+                applied_at DATETIME NOT NULL
+            )
+        '''))
+        applied = {row[0] for row in conn.execute(text('SELECT version FROM schema_migrations'))}
+
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+
+        print(f"Applying migration {version}: {description}")
+        with db.engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text('''
+                    INSERT INTO schema_migrations (version, description, applied_at)
+                    VALUES (:version, :description, :applied_at)
+                '''),
+                {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+            )
+
+
+def current_version():
+    """Highest applied migration version (0 if none)"""
+    with db.engine.connect() as conn:
+        try:
+            version = conn.execute(text('SELECT MAX(version) FROM schema_migrations')).scalar()
+        except Exception:
+            return 0
+    return version or 0
@@ -7,9 +7,104 @@ from datetime import datetime
 
 db = SQLAlchemy()
 
+# Stand-in opponents MaxPreps uses for unlisted teams; one team can play several
+# of them on the same day, so their games are exempt from the unique game identity
+PLACEHOLDER_OPPONENTS = ('NVTO', 'Non Varsity Opponent', 'Varsity Opponent',
+                         'Tournament Opponent', 'Tournament Team', 'Unknown Opponent')
+PLACEHOLDER_GAME_FILTER = (
+    f"team1_name NOT IN {PLACEHOLDER_OPPONENTS!r} AND team2_name NOT IN {PLACEHOLDER_OPPONENTS!r}"
+)
+
+
+class Team(db.Model):
+    """A school's team, identified by a canonical name"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # Canonical display name
+    name_key = db.Column(db.String(100), nullable=False, unique=True)  # See teams.team_key()
+    classification = db.Column(db.String(20))
+    district = db.Column(db.String(20))
+
+    aliases = db.relationship('TeamAlias', backref='team', lazy=True)
+
+    def __repr__(self):
+        return f'<Team {self.name}>'
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'classification': self.classification,
+            'district': self.district,
+            'aliases': sorted(alias.name for alias in self.aliases)
+        }
+
+
+class TeamAlias(db.Model):
+    """An exact team name as it appears in box scores, pointing at its Team"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<TeamAlias {self.name} -> {self.team_id}>'
+
+
+class TeamSeasonStats(db.Model):
+    """Running season totals for one team, updated by each game's delta (see team_stats.py)"""
+    __table_args__ = (
+        db.UniqueConstraint('team_id', 'season', name='uq_team_season_stats'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    season = db.Column(db.Integer, nullable=False)  # Year the season starts (2025 = 2025-26)
+    games = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    points_for = db.Column(db.Integer, nullable=False, default=0)
+    points_against = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TeamSeasonStats {self.team_id} {self.season}: {self.wins}-{self.losses}>'
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'team_id': self.team_id,
+            'season': self.season,
+            'games': self.games,
+            'wins': self.wins,
+            'losses': self.losses,
+            'points_for': self.points_for,
+            'points_against': self.points_against
+        }
+
+
+class RatingCheckpoint(db.Model):
+    """Team ratings at the end of one week, for resuming the replay (see rating_engine.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    week_end = db.Column(db.Date, nullable=False, unique=True)  # Sunday ending the week
+    fingerprint = db.Column(db.String(200), nullable=False)  # Summary of that week's games
+    ratings = db.Column(db.Text, nullable=False)  # JSON: team_id -> [rating, rd, games]
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RatingCheckpoint {self.week_end}>'
+
 
 class BoxScore(db.Model):
     """Box score for a game"""
+    # Kept in step with migrations.py so fresh databases match migrated ones
+    __table_args__ = (
+        db.Index('uq_box_score_game', 'game_date', 'team1_name', 'team2_name', 'team1_score', 'team2_score',
+                 unique=True, sqlite_where=db.text(PLACEHOLDER_GAME_FILTER)),
+        db.Index('ix_box_score_date_id', 'game_date', 'id'),
+        db.Index('ix_box_score_classification_date_id', 'classification', 'game_date', 'id'),
+        db.Index('ix_box_score_team1_name', 'team1_name'),
+        db.Index('ix_box_score_team2_name', 'team2_name'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
 
     # Game info
@@ -18,6 +113,7 @@ class BoxScore(db.Model):
 
     # Team 1 (Home)
     team1_name = db.Column(db.String(100), nullable=False)
+    team1_id = db.Column(db.Integer, db.ForeignKey('team.id'), index=True)  # Set at ingest (see teams.py)
     team1_score = db.Column(db.Integer, nullable=False)
     team1_fg = db.Column(db.Integer)  # Field goals made
     team1_fga = db.Column(db.Integer)  # Field goals attempted
@@ -33,6 +129,7 @@ class BoxScore(db.Model):
 
     # Team 2 (Away)
     team2_name = db.Column(db.String(100), nullable=False)
+    team2_id = db.Column(db.Integer, db.ForeignKey('team.id'), index=True)
     team2_score = db.Column(db.Integer, nullable=False)
     team2_fg = db.Column(db.Integer)
     team2_fga = db.Column(db.Integer)
@@ -60,6 +157,7 @@ class BoxScore(db.Model):
             'game_date': self.game_date.isoformat() if self.game_date else None,
             'classification': self.classification,
             'team1_name': self.team1_name,
+            'team1_id': self.team1_id,
             'team1_score': self.team1_score,
             'team1_stats': {
                 'fg': f"{self.team1_fg or 0}/{self.team1_fga or 0}",
@@ -72,6 +170,7 @@ class BoxScore(db.Model):
                 'to': self.team1_to or 0
             },
             'team2_name': self.team2_name,
+            'team2_id': self.team2_id,
             'team2_score': self.team2_score,
             'team2_stats': {
                 'fg': f"{self.team2_fg or 0}/{self.team2_fga or 0}",
@@ -0,0 +1,203 @@
+"""
+Name Resolver
+Precompiled rankings name -> (canonical school, district) lookup
+
+Built once from data/uil_schools.json, MANUAL_DISTRICTS and the
+abbreviation tables, and answers the same way update_rankings_with_records()
+used to search them:
+
+1. The manual mapping for the exact name
+2. For each search variation (school_abbreviations.get_search_variations):
+   its manual mapping, then the UIL name as written, lowercased, or normalized
+3. Fuzzy fallback: for each variation longer than 4 characters, the first
+   UIL name, in file order, that contains it; if that school has no district
+   the search moves on to the next variation
+
+The UIL names of each classification are joined into one string, so the
+fuzzy step is a single str.find() instead of a loop over every school.
+Answers are memoized per (name, classification). The compiled index and
+the memo are saved to instance/name_resolver.json and reused as long as the
+hash of the inputs (including this module's source) matches.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from manual_district_mappings import MANUAL_DISTRICTS
+from school_abbreviations import CITY_ABBREVIATIONS, SCHOOL_ABBREVIATIONS, SPECIAL_CASES, get_search_variations
+from school_name_normalizer import SchoolNameNormalizer
+
+UIL_SCHOOLS_FILE = Path(__file__).parent / 'data' / 'uil_schools.json'
+CACHE_FILE = Path(__file__).parent / 'instance' / 'name_resolver.json'
+
+UIL_CLASS_CODES = {'6A': 'AAAAAA', '5A': 'AAAAA', '4A': 'AAAA', '3A': 'AAA', '2A': 'AA', '1A': 'A'}
+
+# Fuzzy search never matches across two names
+_SEPARATOR = '\x00'
+
+
+def input_hash(uil_file=UIL_SCHOOLS_FILE):
+    """
+    Hash of everything a compiled resolver depends on
+
+    Covers the data tables plus the source of the modules that build and
+    answer from them, so a change to the variations, normalization or the
+    lookup rules themselves invalidates the saved answers too.
+    """
+    digest = hashlib.sha1()
+    digest.update(uil_file.read_bytes() if uil_file.exists() else b'')
+    for table in (MANUAL_DISTRICTS, CITY_ABBREVIATIONS, SCHOOL_ABBREVIATIONS, SPECIAL_CASES):
+        digest.update(repr(sorted(table.items())).encode())
+    for module in ('school_name_normalizer.py', 'school_abbreviations.py', 'name_resolver.py'):
+        digest.update(Path(__file__).with_name(module).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def compile_uil_entries(uil_file=UIL_SCHOOLS_FILE):
+    """
+    (name variant, classification, school name, district) for every UIL school
+
+    Variants are the name as written, normalized and lowercased; a later
+    school with the same variant replaces the earlier one but keeps its
+    position, as with a dict. Schools without a district are kept (with an
+    empty district) since they still take part in the lookup order.
+    """
+    if not uil_file.exists():
+        print("Warning: UIL schools data not found - districts will not be added")
+        return []
+
+    with open(uil_file, 'r') as f:
+        uil_data = json.load(f)
+
+    normalizer = SchoolNameNormalizer()
+    entries = {}
+    for classification, schools in uil_data.items():
+        class_code = UIL_CLASS_CODES.get(classification, classification)
+        for school in schools:
+            school_name = school['school_name']
+            normalized = normalizer.normalize(school_name).lower()
+            for variant in (school_name, normalized, school_name.lower()):
+                entries[(variant, class_code)] = (school_name, school['district'])
+
+    return [[variant, class_code, school, district] for (variant, class_code), (school, district) in entries.items()]
+
+
+class NameResolver:
+    """Rankings name -> (canonical school, district) for UIL classifications"""
+
+    def __init__(self, entries, resolved=None, source_hash=None):
+        self.entries = entries
+        self.source_hash = source_hash
+        self.normalizer = SchoolNameNormalizer()
+
+        self.exact = {}
+        names_by_class = {}
+        for variant, class_code, school, district in entries:
+            self.exact[(variant, class_code)] = (school, district)
+            names_by_class.setdefault(class_code, []).append((variant.lower(), school, district))
+
+        # Per classification: joined lowercase names, each name's start offset, and its answer
+        self.haystacks = {}
+        for class_code, names in names_by_class.items():
+            starts, offset = [], 0
+            for name, _, _ in names:
+                starts.append(offset)
+                offset += len(name) + 1
+            self.haystacks[class_code] = (
+                _SEPARATOR.join(name for name, _, _ in names),
+                starts,
+                [(school, district) for _, school, district in names]
+            )
+
+        self.resolved = resolved or {}
+        self._new = 0
+        self._variations = {}
+
+    def variations(self, name):
+        """Memoized get_search_variations()"""
+        if name not in self._variations:
+            self._variations[name] = get_search_variations(name)
+        return self._variations[name]
+
+    def _fuzzy(self, variation, classification):
+        """First UIL name (in file order) containing variation"""
+        haystack = self.haystacks.get(classification)
+        if haystack is None:
+            return None
+        text, starts, answers = haystack
+        position = text.find(variation)
+        if position < 0:
+            return None
+        return answers[bisect.bisect_right(starts, position) - 1]
+
+    def _resolve(self, name, classification):
+        district = MANUAL_DISTRICTS.get((name, classification))
+        if district:
+            return (name, district)
+
+        variations = self.variations(name)
+        for variation in variations:
+            district = MANUAL_DISTRICTS.get((variation, classification))
+            if district:
+                return (variation, district)
+
+            for probe in (variation, variation.lower(), self.normalizer.normalize(variation).lower()):
+                match = self.exact.get((probe, classification))
+                if match and match[1]:
+                    return match
+
+        for variation in variations:
+            if len(variation) <= 4:  # Skip very short variations
+                continue
+            # Only the first containing name counts, even if it has no district
+            match = self._fuzzy(variation.lower(), classification)
+            if match and match[1]:
+                return match
+
+        return None
+
+    def resolve(self, name, classification):
+        """(canonical school, district) for a rankings name, or None"""
+        by_name = self.resolved.setdefault(classification, {})
+        if name not in by_name:
+            match = self._resolve(name, classification)
+            by_name[name] = list(match) if match else None
+            self._new += 1
+        match = by_name[name]
+        return tuple(match) if match else None
+
+    def district(self, name, classification):
+        match = self.resolve(name, classification)
+        return match[1] if match else None
+
+    def save(self, cache_file=CACHE_FILE):
+        """Write the index and memo if anything new was resolved"""
+        if not self._new:
+            return
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write a temp file and rename it, so readers never see a partial cache
+        temp_file = cache_file.with_name(f'{cache_file.name}.{os.getpid()}.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump({'input_hash': self.source_hash, 'entries': self.entries, 'resolved': self.resolved}, f)
+        os.replace(temp_file, cache_file)
+        self._new = 0
+
+
+def load_name_resolver(uil_file=UIL_SCHOOLS_FILE, cache_file=CACHE_FILE):
+    """Resolver from the disk cache, recompiled when the inputs have changed"""
+    source_hash = input_hash(uil_file)
+    try:
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        if cached.get('input_hash') == source_hash:
+            return NameResolver(cached['entries'], cached['resolved'], source_hash)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    resolver = NameResolver(compile_uil_entries(uil_file), source_hash=source_hash)
+    resolver._new = 1  # Persist the compiled index even before any lookups
+    print(f"Compiled name resolver from {len(resolver.entries)} UIL name variants")
+    return resolver
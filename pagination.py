@@ -0,0 +1,72 @@
+"""
+Keyset Pagination for Box Scores
+Pages through box_score newest-first on (game_date, id) without OFFSET
+"""
+
+from datetime import date
+
+from sqlalchemy import and_, or_
+
+from models import BoxScore
+
+# Hard ceiling on ?limit= so one request can't pull the whole table
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(box_score):
+    """Cursor pointing just past a box score: 'YYYY-MM-DD_id'"""
+    return f"{box_score.game_date.isoformat()}_{box_score.id}"
+
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor produced by encode_cursor
+
+    Returns: (game_date, id) tuple
+    Raises: ValueError if the cursor is malformed
+    """
+    game_date, _, box_score_id = cursor.partition('_')
+    return date.fromisoformat(game_date), int(box_score_id)
+
+
+def clamp_page_size(limit, default):
+    """Requested page size limited to 1..MAX_PAGE_SIZE (default if not given)"""
+    if limit is None:
+        return default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_page(query, cursor=None, page_size=50):
+    """
+    Fetch one page of box scores, newest first
+
+    Ordering is (game_date DESC, id DESC), which is stable even when many
+    games share a date. Each page seeks directly past the previous cursor,
+    so deep pages cost the same as the first.
+
+    Args:
+        query: BoxScore query with any filters already applied
+        cursor: Cursor string from a previous page (or None for the first page)
+        page_size: Maximum number of games to return
+
+    Returns:
+        (box_scores, next_cursor) - next_cursor is None on the last page
+    Raises:
+        ValueError if the cursor is malformed
+    """
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            BoxScore.game_date < cursor_date,
+            and_(BoxScore.game_date == cursor_date, BoxScore.id < cursor_id)
+        ))
+
+    rows = query.order_by(BoxScore.game_date.desc(), BoxScore.id.desc())\
+        .limit(page_size + 1)\
+        .all()
+
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1])
+
+    return rows, None
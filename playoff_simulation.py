@@ -0,0 +1,380 @@
+"""
+Playoff Simulation
+Monte Carlo district title, playoff berth and state title odds per team
+
+Teams are grouped into districts from Team.district (set from
+manual_district_mappings / tapps_district_mappings when the team was
+created), falling back to tapps_district_mappings or name_resolver.py
+(manual mappings plus data/uil_schools.json) for each of the team's names.
+District play is a double round robin; every pairing not yet played twice
+this season is simulated, with win probabilities from the Glicko ratings
+in rating_engine.py.
+
+The top PLAYOFF_TEAMS_PER_DISTRICT of each district make the playoffs.
+Ties in the standings are broken at random. Brackets pair neighbouring
+districts (1 & 2, 3 & 4, ...), with each district champion facing the
+other district's fourth-place team as in the UIL bi-district round. The
+bracket is then played out by single elimination.
+
+Each chunk of simulations is one NumPy pass over (simulations x games).
+Chunks are spread over a process pool and summed.
+
+The odds are computed by this script (run from the scheduler's daily job
+after the rating update) and saved to data/playoff_odds.json; the web app
+only reads that file (load_playoff_odds).
+
+Usage: python playoff_simulation.py [--simulations N] [--workers N] [--classification AAAAAA] [--no-save]
+"""
+
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import text
+
+from name_resolver import load_name_resolver
+from rating_engine import update_ratings, Q
+from tapps_district_mappings import get_tapps_district
+from team_stats import season_for
+
+ODDS_FILE = Path(__file__).parent / 'data' / 'playoff_odds.json'
+
+DEFAULT_SIMULATIONS = int(os.getenv('PLAYOFF_SIMULATIONS', 10000))
+CHUNK_SIZE = 1000
+DISTRICT_ROUNDS = 2  # Each pair of district opponents meets twice
+PLAYOFF_TEAMS_PER_DISTRICT = 4
+
+
+def district_assignments(connection, resolver=None):
+    """
+    District of every team that has one
+
+    Returns: dict of team_id -> (classification, district)
+    """
+    if resolver is None:
+        resolver = load_name_resolver()
+
+    names = {}
+    for team_id, name in connection.execute(text('SELECT team_id, name FROM team_alias')):
+        names.setdefault(team_id, []).append(name)
+
+    assignments = {}
+    for team_id, name, classification, district in connection.execute(
+        text('SELECT id, name, classification, district FROM team')
+    ):
+        if not classification or classification == 'Unknown':
+            continue
+        if district:
+            assignments[team_id] = (classification, str(district))
+            continue
+
+        lookup = get_tapps_district if classification.startswith('TAPPS_') else resolver.district
+        for candidate in [name] + names.get(team_id, []):
+            district = lookup(candidate, classification)
+            if district:
+                assignments[team_id] = (classification, str(district))
+                break
+
+    resolver.save()
+    return assignments
+
+
+def _district_sort_key(district):
+    return (0, int(district), '') if str(district).isdigit() else (1, 0, str(district))
+
+
+def _bracket_slots(district_count):
+    """
+    (district index, place) for every bracket line, in bracket order
+
+    Neighbouring districts a, b meet in the bi-district round as a1-b4,
+    b2-a3, b1-a4, a2-b3; a district without a partner gets byes. The
+    bracket is padded to a power of two with (-1, -1) byes.
+    """
+    slots = []
+    for a in range(0, district_count, 2):
+        b = a + 1 if a + 1 < district_count else -1
+        for district, place, opponent, opponent_place in (
+            (a, 0, b, 3), (b, 1, a, 2), (b, 0, a, 3), (a, 1, b, 2)
+        ):
+            slots.append((district, place) if district >= 0 else (-1, -1))
+            slots.append((opponent, opponent_place) if opponent >= 0 else (-1, -1))
+
+    size = 1 << max(0, math.ceil(math.log2(max(len(slots), 1))))
+    slots += [(-1, -1)] * (size - len(slots))
+    return np.array(slots, dtype=np.int64).reshape(-1, 2)
+
+
+def build_simulation_inputs(connection, ratings=None, assignments=None, season=None):
+    """
+    Everything the simulation needs for each classification
+
+    Returns: dict of classification -> dict of NumPy arrays and team metadata
+             (team_ids, rating, rd, district index, district names, current
+             district wins/losses, remaining games, bracket slots)
+    """
+    if ratings is None:
+        ratings = update_ratings(connection)
+    if assignments is None:
+        assignments = district_assignments(connection)
+
+    if season is None:
+        latest = connection.execute(text('SELECT MAX(game_date) FROM box_score')).scalar()
+        season = season_for(datetime.fromisoformat(str(latest)).date()) if latest else None
+
+    team_names = dict(connection.execute(text('SELECT id, name FROM team')).fetchall())
+
+    by_classification = {}
+    for team_id, (classification, district) in assignments.items():
+        by_classification.setdefault(classification, {}).setdefault(district, []).append(team_id)
+
+    # District games already played this season, per unordered pair
+    played = {}
+    if season is not None:
+        rows = connection.execute(text('''
+            SELECT team1_id, team2_id, team1_score, team2_score FROM box_score
+            WHERE team1_id IS NOT NULL AND team2_id IS NOT NULL AND team1_id != team2_id
+              AND game_date >= :start AND game_date < :end
+        '''), {'start': f'{season}-08-01', 'end': f'{season + 1}-08-01'})
+        for team1_id, team2_id, team1_score, team2_score in rows:
+            if team1_id in assignments and assignments.get(team1_id) == assignments.get(team2_id):
+                played.setdefault(frozenset((team1_id, team2_id)), []).append(
+                    team1_id if team1_score > team2_score else team2_id if team2_score > team1_score else None
+                )
+
+    inputs = {}
+    for classification, districts in sorted(by_classification.items()):
+        district_names = sorted(districts, key=_district_sort_key)
+        team_ids = [team_id for district in district_names for team_id in sorted(districts[district])]
+        index = {team_id: i for i, team_id in enumerate(team_ids)}
+        district_index = np.array(
+            [district_names.index(assignments[team_id][1]) for team_id in team_ids], dtype=np.int64
+        )
+
+        wins = np.zeros(len(team_ids))
+        losses = np.zeros(len(team_ids))
+        remaining = []
+        for district in district_names:
+            members = sorted(districts[district])
+            for a, team_a in enumerate(members):
+                for team_b in members[a + 1:]:
+                    results = played.get(frozenset((team_a, team_b)), [])
+                    for winner in results:
+                        for team_id in (team_a, team_b):
+                            if team_id == winner:
+                                wins[index[team_id]] += 1
+                            else:
+                                losses[index[team_id]] += 1
+                    remaining += [(index[team_a], index[team_b])] * max(0, DISTRICT_ROUNDS - len(results))
+
+        rated = [ratings.get(team_id) for team_id in team_ids]
+        inputs[classification] = {
+            'team_ids': team_ids,
+            'team_names': [team_names.get(team_id, str(team_id)) for team_id in team_ids],
+            'district_names': district_names,
+            'district': district_index,
+            'rating': np.array([r['rating'] if r else 1500.0 for r in rated]),
+            'rd': np.array([r['rd'] if r else 350.0 for r in rated]),
+            'wins': wins,
+            'losses': losses,
+            'remaining': np.array(remaining, dtype=np.int64).reshape(-1, 2),
+            'bracket': _bracket_slots(len(district_names)),
+        }
+
+    return inputs
+
+
+def win_probability(rating_a, rd_a, rating_b, rd_b):
+    """Glicko expected score of a against b, with both teams' uncertainty"""
+    g = 1 / np.sqrt(1 + 3 * Q ** 2 * (rd_a ** 2 + rd_b ** 2) / math.pi ** 2)
+    return 1 / (1 + 10 ** (-g * (rating_a - rating_b) / 400))
+
+
+def _simulate_classification(data, simulations, rng):
+    """Counts of (district titles, playoff berths, state titles) per team over one chunk"""
+    team_count = len(data['team_ids'])
+    rating, rd, district = data['rating'], data['rd'], data['district']
+    wins = np.broadcast_to(data['wins'], (simulations, team_count)).copy()
+
+    remaining = data['remaining']
+    if len(remaining):
+        team1, team2 = remaining[:, 0], remaining[:, 1]
+        p = win_probability(rating[team1], rd[team1], rating[team2], rd[team2])
+        team1_won = (rng.random((simulations, len(remaining))) < p).astype(np.float64)
+        ones = np.ones(len(remaining))
+        shape = (len(remaining), team_count)
+        team1_games = csr_matrix((ones, (np.arange(len(remaining)), team1)), shape=shape)
+        team2_games = csr_matrix((ones, (np.arange(len(remaining)), team2)), shape=shape)
+        wins += team1_games.T.dot(team1_won.T).T + team2_games.T.dot((1 - team1_won).T).T
+
+    # Place within district: sort by (district, -wins, random tiebreak) in one pass
+    key = district * (wins.max() + 2) - wins - rng.random((simulations, team_count)) * 0.5
+    order = np.argsort(key, axis=1)
+    group_start = np.searchsorted(district, np.arange(district.max() + 1))
+    place = np.empty_like(order)
+    rows = np.arange(simulations)[:, None]
+    place[rows, order] = np.arange(team_count)[None, :] - group_start[district[order]]
+
+    district_titles = (place == 0).sum(axis=0)
+    qualified = place < PLAYOFF_TEAMS_PER_DISTRICT
+    berths = qualified.sum(axis=0)
+
+    # Team index at each (district, place), -1 where a district is short of teams
+    seeds = np.full((simulations, len(data['district_names']), PLAYOFF_TEAMS_PER_DISTRICT), -1)
+    sim_index, team_index = np.nonzero(qualified)
+    seeds[sim_index, district[team_index], place[sim_index, team_index]] = team_index
+
+    bracket = data['bracket']
+    lines = np.where(
+        bracket[:, 0] >= 0,
+        seeds[:, np.maximum(bracket[:, 0], 0), np.maximum(bracket[:, 1], 0)],
+        -1
+    )
+    while lines.shape[1] > 1:
+        a, b = lines[:, 0::2], lines[:, 1::2]
+        safe_a, safe_b = np.maximum(a, 0), np.maximum(b, 0)
+        a_won = rng.random(a.shape) < win_probability(rating[safe_a], rd[safe_a], rating[safe_b], rd[safe_b])
+        lines = np.where(a < 0, b, np.where(b < 0, a, np.where(a_won, a, b)))
+
+    champions = lines[:, 0]
+    state_titles = np.bincount(champions[champions >= 0], minlength=team_count)
+    return district_titles, berths, state_titles
+
+
+def simulate_chunk(inputs, simulations, seed):
+    """Run `simulations` seasons for every classification (process pool entry point)"""
+    rng = np.random.default_rng(seed)
+    return {
+        classification: _simulate_classification(data, simulations, rng)
+        for classification, data in inputs.items()
+    }
+
+
+def run_simulations(inputs, simulations=DEFAULT_SIMULATIONS, workers=None, seed=None):
+    """
+    Simulate the rest of the season `simulations` times
+
+    Chunks of CHUNK_SIZE simulations run in a process pool (inline with
+    workers=1), each with its own seed spawned from `seed`.
+
+    Returns: dict of classification -> list of team dicts (team_id, team_name,
+             district, rating, district_wins, district_losses, district_title,
+             playoff_berth, state_title probabilities), best state odds first
+    """
+    chunks = [CHUNK_SIZE] * (simulations // CHUNK_SIZE)
+    if simulations % CHUNK_SIZE:
+        chunks.append(simulations % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    workers = workers or min(len(chunks), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate_chunk, [inputs] * len(chunks), chunks, seeds))
+    else:
+        results = [simulate_chunk(inputs, size, chunk_seed) for size, chunk_seed in zip(chunks, seeds)]
+
+    probabilities = {}
+    for classification, data in inputs.items():
+        district_titles, berths, state_titles = (
+            sum(result[classification][k] for result in results) / simulations for k in range(3)
+        )
+        teams = [
+            {
+                'team_id': team_id,
+                'team_name': data['team_names'][i],
+                'district': data['district_names'][data['district'][i]],
+                'rating': round(float(data['rating'][i]), 1),
+                'district_wins': int(data['wins'][i]),
+                'district_losses': int(data['losses'][i]),
+                'district_title': round(float(district_titles[i]), 4),
+                'playoff_berth': round(float(berths[i]), 4),
+                'state_title': round(float(state_titles[i]), 4)
+            }
+            for i, team_id in enumerate(data['team_ids'])
+        ]
+        teams.sort(key=lambda x: (-x['state_title'], -x['playoff_berth'], x['team_name']))
+        probabilities[classification] = teams
+
+    return probabilities
+
+
+def playoff_probabilities(connection, simulations=DEFAULT_SIMULATIONS, workers=None, seed=None):
+    """Build inputs from the database and run the simulations"""
+    inputs = build_simulation_inputs(connection)
+    games = sum(len(data['remaining']) for data in inputs.values())
+    teams = sum(len(data['team_ids']) for data in inputs.values())
+    print(f"Simulating {simulations} seasons: {teams} teams in districts, {games} district games left")
+    return run_simulations(inputs, simulations, workers, seed)
+
+
+def save_playoff_odds(probabilities, simulations, odds_file=ODDS_FILE):
+    """Write the odds to a temp file and rename it over odds_file"""
+    odds_file = Path(odds_file)
+    odds_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = odds_file.with_name(f'{odds_file.name}.{os.getpid()}.tmp')
+    with open(temp_file, 'w') as f:
+        json.dump({
+            'generated_at': datetime.now().isoformat(),
+            'simulations': simulations,
+            'classifications': probabilities
+        }, f)
+    os.replace(temp_file, odds_file)
+    print(f"Saved playoff odds to {odds_file}")
+
+
+_loaded = {}  # path -> (mtime, odds)
+
+
+def load_playoff_odds(odds_file=ODDS_FILE):
+    """Saved odds (generated_at, simulations, classifications), or None if never computed"""
+    odds_file = Path(odds_file)
+    try:
+        mtime = odds_file.stat().st_mtime_ns
+    except OSError:
+        return None
+
+    cached = _loaded.get(odds_file)
+    if cached is None or cached[0] != mtime:
+        with open(odds_file, 'r') as f:
+            cached = (mtime, json.load(f))
+        _loaded[odds_file] = cached
+    return cached[1]
+
+
+def main():
+    from rating_engine import open_database
+
+    parser = argparse.ArgumentParser(description='Simulate district and playoff odds')
+    parser.add_argument('--simulations', type=int, default=DEFAULT_SIMULATIONS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--classification', default=None)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--no-save', action='store_true', help=f'print only, leave {ODDS_FILE.name} alone')
+    args = parser.parse_args()
+
+    engine = open_database()
+    with engine.begin() as connection:
+        probabilities = playoff_probabilities(connection, args.simulations, args.workers, args.seed)
+
+    if not args.no_save:
+        save_playoff_odds(probabilities, args.simulations)
+
+    for classification, teams in probabilities.items():
+        if args.classification and classification != args.classification:
+            continue
+        print(f"\n{classification}")
+        for team in teams[:args.top]:
+            print(f"  {team['team_name']:<35} D{team['district']:<4} "
+                  f"district {team['district_title']:6.1%}  playoffs {team['playoff_berth']:6.1%}  "
+                  f"state {team['state_title']:6.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Rank Matrix Store and What-If Weights
+Saves each run's source rank matrix and re-ranks it under other weights and caps
+
+Every weekly update (update_weekly_rankings.py) and weighted merge
+(merge_rankings_weighted.py) saves the RankMatrix it ranked, together with
+the ConsensusEngine it used, to data/rank_matrices/<kind>_<date>.json.
+what_if() re-runs consensus on a saved matrix with some weights, coverage
+rules or caps changed, and diffs the result against the published ranking.
+It needs no scraping or database access, so it takes milliseconds.
+
+Usage: python rank_matrices.py [name] [--weight tabc=2] [--max-rank gaso=25]
+                               [--min-games calculated=10] [--cap calculated=40]
+                               [--cap-within 20] [--no-caps] [--all]
+"""
+
+import argparse
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+from consensus import Cap, ConsensusEngine, RankMatrix, Source
+
+MATRIX_DIR = Path(__file__).parent / 'data' / 'rank_matrices'
+
+_loaded = {}  # path -> (mtime, matrix, engine, meta)
+
+
+def save_rank_matrix(kind, matrix, engine, week=None, directory=MATRIX_DIR):
+    """Write a matrix and the engine that ranked it; returns the file path"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    week = week or date.today()
+    path = directory / f'{kind}_{week.isoformat()}.json'
+    with open(path, 'w') as f:
+        json.dump({
+            'kind': kind,
+            'week': week.isoformat(),
+            'created_at': datetime.now().isoformat(),
+            'engine': engine.to_dict(),
+            'matrix': matrix.to_dict()
+        }, f)
+
+    print(f"Saved {kind} rank matrix ({len(matrix.rows)} teams) to {path}")
+    return path
+
+
+def list_rank_matrices(directory=MATRIX_DIR):
+    """Saved matrix names, newest week first"""
+    names = [path.stem for path in Path(directory).glob('*.json')]
+    return sorted(names, key=lambda name: (name.rsplit('_', 1)[-1], name), reverse=True)
+
+
+def load_rank_matrix(name=None, directory=MATRIX_DIR):
+    """
+    (matrix, engine, meta) for a saved matrix name, or the newest one
+
+    Parsed files are kept in memory until they change on disk.
+    Raises ValueError for unknown names.
+    """
+    names = list_rank_matrices(directory)
+    if name is None:
+        if not names:
+            raise ValueError("No saved rank matrices")
+        name = names[0]
+    elif name not in names:
+        raise ValueError(f"Unknown rank matrix: {name}")
+
+    path = Path(directory) / f'{name}.json'
+    mtime = path.stat().st_mtime_ns
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        meta = {'name': name, 'kind': data['kind'], 'week': data['week'], 'created_at': data['created_at']}
+        cached = (mtime, RankMatrix.from_dict(data['matrix']), ConsensusEngine.from_dict(data['engine']), meta)
+        _loaded[path] = cached
+
+    return cached[1:]
+
+
+def alternate_engine(engine, weights=None, max_ranks=None, min_games=None, caps=None):
+    """
+    Copy of engine with some source rules or the caps replaced
+
+    Args:
+        weights, max_ranks, min_games: dicts of source name -> new value
+        caps: list of Cap (or Cap dicts) replacing the engine's caps, None to keep them
+
+    Raises ValueError for sources the engine doesn't have.
+    """
+    data = engine.to_dict()
+    known = {source['name'] for source in data['sources']}
+
+    for field, changes in (('weight', weights), ('max_rank', max_ranks), ('min_games', min_games)):
+        unknown = set(changes or {}) - known
+        if unknown:
+            raise ValueError(f"Unknown source(s): {', '.join(sorted(unknown))}")
+        for source in data['sources']:
+            if source['name'] in (changes or {}):
+                source[field] = changes[source['name']]
+
+    if caps is not None:
+        data['caps'] = [cap.to_dict() if isinstance(cap, Cap) else dict(cap) for cap in caps]
+        for cap in data['caps']:
+            if cap['source'] not in known or not set(cap['when']) <= known:
+                raise ValueError(f"Cap refers to an unknown source: {cap}")
+
+    return ConsensusEngine.from_dict(data)
+
+
+def what_if(matrix, engine, alternate):
+    """
+    Diff the ranking under `alternate` against the one from `engine`
+
+    Returns: dict with 'changed' (number of teams whose rank changed) and
+             'classifications': classification -> list of dicts (team_name,
+             rank, previous_rank, change, score, previous_score) in new rank
+             order, followed by teams that dropped out (rank None)
+    """
+    before = {
+        classification: {row: (rank, score) for rank, (row, score) in enumerate(ranked, 1)}
+        for classification, ranked in engine.rank(matrix).items()
+    }
+    after = alternate.rank(matrix)
+
+    changed = 0
+    classifications = {}
+    for classification, ranked in after.items():
+        previous = before.get(classification, {})
+        teams = []
+        for rank, (row, score) in enumerate(ranked, 1):
+            previous_rank, previous_score = previous.get(row, (None, None))
+            teams.append({
+                'team_name': matrix.rows[row]['team_name'],
+                'rank': rank,
+                'previous_rank': previous_rank,
+                'change': None if previous_rank is None else previous_rank - rank,
+                'score': round(score, 2),
+                'previous_score': None if previous_score is None else round(previous_score, 2)
+            })
+
+        now_ranked = {row for row, _ in ranked}
+        for row, (previous_rank, previous_score) in previous.items():
+            if row not in now_ranked:
+                teams.append({
+                    'team_name': matrix.rows[row]['team_name'],
+                    'rank': None,
+                    'previous_rank': previous_rank,
+                    'change': None,
+                    'score': None,
+                    'previous_score': round(previous_score, 2)
+                })
+
+        changed += sum(1 for team in teams if team['rank'] != team['previous_rank'])
+        classifications[classification] = teams
+
+    return {'changed': changed, 'classifications': classifications}
+
+
+def _parse_pairs(pairs, cast):
+    """['tabc=2', ...] -> {'tabc': 2.0, ...}"""
+    values = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition('=')
+        if not value:
+            raise SystemExit(f"Expected SOURCE=VALUE, got {pair!r}")
+        values[name] = cast(value)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-rank a saved rank matrix under other weights and caps')
+    parser.add_argument('name', nargs='?', help='saved matrix (default: newest); see --list')
+    parser.add_argument('--list', action='store_true', help='list saved matrices')
+    parser.add_argument('--weight', action='append', help='SOURCE=WEIGHT')
+    parser.add_argument('--max-rank', action='append', help='SOURCE=N (ranks beyond N are ignored)')
+    parser.add_argument('--min-games', action='append', help='SOURCE=N (needs N database games)')
+    parser.add_argument('--cap', action='append', help='SOURCE=N (new cap value for that source)')
+    parser.add_argument('--cap-within', type=int, help='new "both sources in top N" threshold for every cap')
+    parser.add_argument('--no-caps', action='store_true', help='drop every cap')
+    parser.add_argument('--all', action='store_true', help='show unchanged teams too')
+    args = parser.parse_args()
+
+    if args.list:
+        for name in list_rank_matrices():
+            print(name)
+        return
+
+    matrix, engine, meta = load_rank_matrix(args.name)
+
+    caps = None
+    if args.no_caps:
+        caps = []
+    elif args.cap or args.cap_within is not None:
+        cap_values = _parse_pairs(args.cap, int)
+        caps = [
+            Cap(cap.source, cap_values.get(cap.source, cap.cap), cap.when,
+                cap.within if args.cap_within is None else args.cap_within)
+            for cap in engine.caps
+        ]
+
+    alternate = alternate_engine(
+        engine,
+        weights=_parse_pairs(args.weight, float),
+        max_ranks=_parse_pairs(args.max_rank, int),
+        min_games=_parse_pairs(args.min_games, int),
+        caps=caps
+    )
+    diff = what_if(matrix, engine, alternate)
+
+    print(f"{meta['name']}: {diff['changed']} teams change rank")
+    for classification, teams in diff['classifications'].items():
+        shown = [team for team in teams if args.all or team['rank'] != team['previous_rank']]
+        if not shown:
+            continue
+        print(f"\n{classification}")
+        for team in shown:
+            rank = '-' if team['rank'] is None else team['rank']
+            previous = '-' if team['previous_rank'] is None else team['previous_rank']
+            change = '' if team['change'] is None else f"{team['change']:+d}"
+            print(f"  {rank:>3} (was {previous:>3}) {change:>4}  {team['team_name']}")
+
+
+if __name__ == '__main__':
+    main()
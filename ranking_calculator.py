@@ -6,14 +6,156 @@ Calculates KenPom-style efficiency ratings from box score data
 import json
 from datetime import datetime
 from pathlib import Path
-from models import BoxScore
-from collections import defaultdict
+from models import db, BoxScore
+from sqlalchemy import text
+import numpy as np
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def estimate_possessions(fg_att, ft_att, turnovers, off_reb=None):
+    """
+    Estimate possessions using the standard formula:
+    Possessions = FGA + 0.44 * FTA - OffReb + TO
+    If offensive rebounds not available, estimate as 25% of total rebounds
+    """
+    if fg_att is None or fg_att == 0:
+        return None
+
+    poss = fg_att + (0.44 * (ft_att or 0)) + (turnovers or 0)
+
+    # Subtract offensive rebounds if available (estimated)
+    if off_reb:
+        poss -= off_reb
+
+    return max(poss, 1)  # Ensure at least 1 possession
+
+
+# Columns returned by load_team_totals(); one row per (classification, team)
+TOTAL_COLUMNS = (
+    'classification', 'team_name', 'games', 'wins',
+    'points_for', 'points_against', 'possessions', 'first_game'
+)
+
+# Position of a game in (game_date, id) order as one integer (numbering the
+# games with a window function would cost more than the aggregate itself)
+_GAME_POSITION_SQL = "(COALESCE(CAST(julianday(game_date) AS INTEGER), 0) * 1000000000 + id) * 2"
+
+# Both sides of every game with field goal attempts as one team-game row;
+# team1's position is even and team2's the odd number after it
+_TEAM_GAMES_SQL = f"""
+    SELECT classification, team1_name AS team_name,
+           COALESCE(team1_score, 0) AS points_for, COALESCE(team2_score, 0) AS points_against,
+           MAX(team1_fga + 0.44 * COALESCE(team1_fta, 0) + COALESCE(team1_to, 0), 1) AS possessions,
+           {_GAME_POSITION_SQL} AS position
+    FROM box_score WHERE team1_fga > 0 {{where}}
+    UNION ALL
+    SELECT classification, team2_name,
+           COALESCE(team2_score, 0), COALESCE(team1_score, 0),
+           MAX(team2_fga + 0.44 * COALESCE(team2_fta, 0) + COALESCE(team2_to, 0), 1),
+           {_GAME_POSITION_SQL} + 1
+    FROM box_score WHERE team2_fga > 0 {{where}}
+"""
+
+
+def load_team_totals(classification=None, by_classification=True):
+    """
+    Games, wins, points and possessions per (classification, team) in one SQL aggregate (needs app context)
+
+    Possessions are estimated per game as in estimate_possessions(); a side
+    without field goal attempts doesn't count for that team. first_game is
+    the position of the team's first game by (game_date, id), team1 before
+    team2, and rows come back in that order so ties can keep it. With
+    by_classification=False every team is keyed by name alone
+    (classification is '').
+
+    Returns: dict of column name -> array
+    """
+    where = 'AND classification = :classification' if classification else ''
+    group = 'classification' if by_classification else "''"
+    rows = db.session.execute(
+        text(f"""
+            SELECT {group}, team_name, COUNT(*), SUM(points_for > points_against),
+                   SUM(points_for), SUM(points_against), SUM(possessions), MIN(position)
+            FROM ({_TEAM_GAMES_SQL.format(where=where)})
+            GROUP BY team_name, {group}
+        """),
+        {'classification': classification}
+    ).fetchall()
+    columns = list(zip(*rows)) if rows else [()] * len(TOTAL_COLUMNS)
+
+    totals = {}
+    for name, values in zip(TOTAL_COLUMNS, columns):
+        if name in ('classification', 'team_name'):
+            totals[name] = np.array(values, dtype=object)
+        elif name == 'first_game':
+            totals[name] = np.array(values, dtype=np.int64)
+        else:
+            totals[name] = np.array(values, dtype=np.float64)
+
+    order = np.argsort(totals['first_game'], kind='stable')
+    return {name: values[order] for name, values in totals.items()}
+
+
+def estimate_possessions_array(fg_att, ft_att, turnovers):
+    """Vectorized estimate_possessions: NaN where field goal attempts are missing"""
+    poss = fg_att + (0.44 * ft_att) + turnovers
+    return np.where(fg_att > 0, np.maximum(poss, 1), np.nan)
+
+
+def calculate_team_ratings(totals, limit=None):
+    """
+    Efficiency ratings for every team in every classification in one pass
+
+    Args:
+        totals: Per-team column arrays from load_team_totals(), in
+                first-appearance order
+        limit: Only build entries for the top `limit` teams per classification
+
+    Returns: dict of classification -> list of team dicts sorted by net
+             rating (ties keep first-appearance order), with ranks
+    """
+    group_classification = totals['classification']
+    team_names = totals['team_name']
+    games_played = totals['games']
+    wins = totals['wins']
+    pf_total, pa_total, poss_total = totals['points_for'], totals['points_against'], totals['possessions']
+
+    off_eff = pf_total / poss_total * 100
+    def_eff = pa_total / poss_total * 100
+    # Python round() so ties and values match the per-team calculation exactly
+    net_rating = np.array([round(net, 1) for net in (off_eff - def_eff).tolist()])
+
+    rankings = {}
+    for team_classification in dict.fromkeys(group_classification):
+        members = np.flatnonzero(group_classification == team_classification)
+        ordered = members[np.argsort(-net_rating[members], kind='stable')][:limit]
+
+        ranked_teams = []
+        for rank, index in enumerate(ordered.tolist(), 1):
+            team_wins = int(wins[index])
+            team_losses = int(games_played[index]) - team_wins
+
+            ranked_teams.append({
+                'team_name': team_names[index],
+                'wins': team_wins,
+                'losses': team_losses,
+                'record': f"{team_wins}-{team_losses}",
+                'adj_offensive_eff': round(float(off_eff[index]), 1),
+                'adj_defensive_eff': round(float(def_eff[index]), 1),
+                'net_rating': float(net_rating[index]),
+                'games_played': int(games_played[index]),
+                'classification': team_classification,
+                'rank': rank
+            })
+
+        rankings[team_classification] = ranked_teams
+
+    return rankings
+
+
 class RankingCalculator:
     """Calculate team rankings from box score data"""
 
@@ -21,21 +163,8 @@ class RankingCalculator:
         self.app = app
 
     def estimate_possessions(self, fg_att, ft_att, turnovers, off_reb=None):
-        """
-        Estimate possessions using the standard formula:
-        Possessions = FGA + 0.44 * FTA - OffReb + TO
-        If offensive rebounds not available, estimate as 25% of total rebounds
-        """
-        if fg_att is None or fg_att == 0:
-            return None
-
-        poss = fg_att + (0.44 * (ft_att or 0)) + (turnovers or 0)
-
-        # Subtract offensive rebounds if available (estimated)
-        if off_reb:
-            poss -= off_reb
-
-        return max(poss, 1)  # Ensure at least 1 possession
+        """Estimate possessions (see module-level estimate_possessions)"""
+        return estimate_possessions(fg_att, ft_att, turnovers, off_reb)
 
     def calculate_team_stats(self, classification=None):
         """Calculate statistics for all teams"""
@@ -46,100 +175,18 @@ class RankingCalculator:
             return {}
 
         with self.app.app_context():
-            # Get all box scores
-            query = BoxScore.query
-
-            if classification:
-                query = query.filter_by(classification=classification)
+            # Without a classification, rank every team together, keyed by name alone
+            totals = load_team_totals(classification, by_classification=bool(classification))
+            logger.info(f"Processing {len(totals['team_name'])} teams")
+            rankings = calculate_team_ratings(totals)
 
-            box_scores = query.all()
+        ranked_teams = next(iter(rankings.values()), [])
+        for team in ranked_teams:
+            team['classification'] = classification
 
-            logger.info(f"Processing {len(box_scores)} games")
+        logger.info(f"Calculated stats for {len(ranked_teams)} teams")
 
-            # Aggregate team stats
-            team_stats = defaultdict(lambda: {
-                'games': 0,
-                'wins': 0,
-                'losses': 0,
-                'points_for': 0,
-                'points_against': 0,
-                'possessions': 0,
-                'classification': classification
-            })
-
-            for bs in box_scores:
-                # Process Team 1
-                team1_poss = self.estimate_possessions(
-                    bs.team1_fga, bs.team1_fta, bs.team1_to
-                )
-
-                if team1_poss:
-                    stats1 = team_stats[bs.team1_name]
-                    stats1['games'] += 1
-                    stats1['points_for'] += bs.team1_score
-                    stats1['points_against'] += bs.team2_score
-                    stats1['possessions'] += team1_poss
-
-                    if bs.team1_score > bs.team2_score:
-                        stats1['wins'] += 1
-                    else:
-                        stats1['losses'] += 1
-
-                # Process Team 2
-                team2_poss = self.estimate_possessions(
-                    bs.team2_fga, bs.team2_fta, bs.team2_to
-                )
-
-                if team2_poss:
-                    stats2 = team_stats[bs.team2_name]
-                    stats2['games'] += 1
-                    stats2['points_for'] += bs.team2_score
-                    stats2['points_against'] += bs.team1_score
-                    stats2['possessions'] += team2_poss
-
-                    if bs.team2_score > bs.team1_score:
-                        stats2['wins'] += 1
-                    else:
-                        stats2['losses'] += 1
-
-            # Calculate efficiency ratings
-            ranked_teams = []
-
-            for team_name, stats in team_stats.items():
-                if stats['games'] == 0 or stats['possessions'] == 0:
-                    continue
-
-                # Offensive Efficiency: Points per 100 possessions
-                off_eff = (stats['points_for'] / stats['possessions']) * 100
-
-                # Defensive Efficiency: Points allowed per 100 possessions
-                def_eff = (stats['points_against'] / stats['possessions']) * 100
-
-                # Net Rating
-                net_rating = off_eff - def_eff
-
-                ranked_teams.append({
-                    'team_name': team_name,
-                    'wins': stats['wins'],
-                    'losses': stats['losses'],
-                    'record': f"{stats['wins']}-{stats['losses']}",
-                    'adj_offensive_eff': round(off_eff, 1),
-                    'adj_defensive_eff': round(def_eff, 1),
-                    'net_rating': round(net_rating, 1),
-                    'games_played': stats['games'],
-                    'classification': stats['classification']
-                })
-
-            # Sort by net rating
-            ranked_teams.sort(key=lambda x: x['net_rating'], reverse=True)
-
-            # Add ranks
-            for i, team in enumerate(ranked_teams, 1):
-                team['rank'] = i
-
-            logger.info(f"Calculated stats for {len(ranked_teams)} teams")
-
-            return ranked_teams
+        return ranked_teams
 
     def calculate_all_rankings(self):
         """Calculate rankings for all classifications"""
@@ -154,19 +201,29 @@ class RankingCalculator:
             'source': 'calculated_from_box_scores'
         }
 
+        if not self.app:
+            logger.error("App context required")
+            return all_rankings
+
+        # One aggregate query and one pass over every classification
+        with self.app.app_context():
+            totals = load_team_totals()
+            logger.info(f"Processing {len(totals['team_name'])} teams")
+            rankings = calculate_team_ratings(totals, limit=40)
+
         # UIL Classifications
         uil_classes = ['AAAAAA', 'AAAAA', 'AAAA', 'AAA', 'AA', 'A']
         for classification in uil_classes:
-            teams = self.calculate_team_stats(classification)
+            teams = rankings.get(classification, [])
             all_rankings['uil'][classification] = teams[:40]  # Top 40
-            logger.info(f"{classification}: {len(teams)} teams ranked")
+            logger.info(f"{classification}: top {len(teams)} teams ranked")
 
         # TAPPS Classifications
         tapps_classes = ['TAPPS_6A', 'TAPPS_5A', 'TAPPS_4A', 'TAPPS_3A', 'TAPPS_2A', 'TAPPS_1A']
         for classification in tapps_classes:
-            teams = self.calculate_team_stats(classification)
+            teams = rankings.get(classification, [])
             all_rankings['private'][classification] = teams[:10]  # Top 10
-            logger.info(f"{classification}: {len(teams)} teams ranked")
+            logger.info(f"{classification}: top {len(all_rankings['private'][classification])} teams ranked")
 
         return all_rankings
 
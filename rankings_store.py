@@ -0,0 +1,270 @@
+"""
+Rankings Store
+Keeps the parsed data/rankings.json in memory and shares it across every route
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Data file path
+DATA_FILE = Path(__file__).parent / 'data' / 'rankings.json'
+
+CLASSIFICATIONS = {
+    'AAAAAA': 'Class 6A (UIL)',
+    'AAAAA': 'Class 5A (UIL)',
+    'AAAA': 'Class 4A (UIL)',
+    'AAA': 'Class 3A (UIL)',
+    'AA': 'Class 2A (UIL)',
+    'A': 'Class 1A (UIL)',
+    'TAPPS_6A': 'TAPPS 6A / SPC 4A',
+    'TAPPS_5A': 'TAPPS 5A / SPC 3A',
+    'TAPPS_4A': 'TAPPS 4A',
+    'TAPPS_3A': 'TAPPS 3A',
+    'TAPPS_2A': 'TAPPS 2A',
+    'TAPPS_1A': 'TAPPS 1A'
+}
+
+
+def views_file_for(rankings_file):
+    """Path of the precomputed view models published next to a rankings file"""
+    rankings_file = Path(rankings_file)
+    return rankings_file.with_name(rankings_file.stem + '.views.json')
+
+
+def content_version(raw):
+    """Short content hash used as the rankings version"""
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def get_classification_teams(rankings, classification):
+    """Raw team entries for a classification (TAPPS codes live under 'private')"""
+    league = 'private' if classification.startswith('TAPPS_') else 'uil'
+    return rankings.get(league, {}).get(classification, [])
+
+
+def build_team_view(team_data):
+    """Build the ready-to-render row for one ranked team"""
+    team = {
+        'rank': team_data.get('rank'),
+        'team_name': team_data.get('team_name', 'Unknown'),
+        'wins': team_data.get('wins'),
+        'losses': team_data.get('losses'),
+        'record': '',
+        'district': team_data.get('district', ''),
+        'ppg': team_data.get('ppg'),
+        'opp_ppg': team_data.get('opp_ppg'),
+        'games': team_data.get('games'),
+        # Analytics from database
+        'net_rating': team_data.get('net_rating'),
+        'adj_offensive_eff': team_data.get('adj_offensive_eff'),
+        'adj_defensive_eff': team_data.get('adj_defensive_eff'),
+        'adj_tempo': team_data.get('adj_tempo'),
+        'sos_rating': team_data.get('sos_rating'),
+        'rpi': team_data.get('rpi'),
+        'rpi_rank': team_data.get('rpi_rank')
+    }
+
+    # Format record if available
+    if team['wins'] is not None and team['losses'] is not None:
+        team['record'] = f"{team['wins']}-{team['losses']}"
+
+    return team
+
+
+def build_classification_views(rankings):
+    """
+    Build the ordered, display-ready team list for every classification
+
+    Only teams ranked 1-25 (UIL) or 1-10 (TAPPS) are kept, sorted by rank.
+    """
+    views = {}
+
+    for classification in CLASSIFICATIONS:
+        raw_teams = get_classification_teams(rankings, classification)
+        max_rank = 10 if classification.startswith('TAPPS_') else 25
+
+        teams = [
+            build_team_view(team_data)
+            for team_data in raw_teams
+            if team_data.get('rank') is not None and 1 <= team_data['rank'] <= max_rank
+        ]
+        teams.sort(key=lambda x: x['rank'])
+        views[classification] = teams
+
+    return views
+
+
+def publish_rankings(rankings, rankings_file=DATA_FILE):
+    """
+    Write a rankings document plus its precomputed view models
+
+    The views file records the content version of the rankings it was built
+    from, so a stale views file (e.g. after a restore from the gold master)
+    is ignored and rebuilt in memory instead.
+    """
+    rankings_file = Path(rankings_file)
+    rankings_file.parent.mkdir(parents=True, exist_ok=True)
+
+    raw = json.dumps(rankings, indent=2)
+    views = {
+        'source_version': content_version(raw.encode()),
+        'classifications': build_classification_views(rankings)
+    }
+
+    # Views go first so readers that notice the new rankings find them ready
+    with open(views_file_for(rankings_file), 'w') as f:
+        json.dump(views, f)
+
+    with open(rankings_file, 'w') as f:
+        f.write(raw)
+
+
+class RankingsRepository:
+    """
+    In-process cache for the rankings document
+
+    The file is only re-read when its inode, mtime or size changes, so a page
+    view costs one stat() instead of a full JSON parse. The content hash of the
+    last load is exposed as `version` for downstream caches.
+    """
+
+    def __init__(self, data_file=DATA_FILE):
+        self.data_file = Path(data_file)
+        self._lock = threading.Lock()
+        self._derived_lock = threading.Lock()  # One build per key, even under concurrent requests
+        self._stamp = None
+        self._data = None
+        self._version = None
+        self._last_update = None
+        self._views = {}
+        self._derived = {}
+
+    def _file_stamp(self):
+        """Return (inode, mtime, size) for the rankings file, or None if missing"""
+        try:
+            stat = self.data_file.stat()
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, stamp):
+        """Parse the rankings file and swap it in (caller holds the lock)"""
+        try:
+            with open(self.data_file, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw)
+        except Exception as e:
+            print(f"Error loading rankings: {e}")
+            self._stamp = None
+            self._data = None
+            self._version = None
+            self._last_update = None
+            self._views = {}
+            self._derived = {}
+            return
+
+        self._data = data
+        self._version = content_version(raw)
+        self._last_update = _format_last_update(data)
+        self._views = self._load_views(data, self._version)
+        self._derived = {}
+        self._stamp = stamp
+        print(f"Loaded rankings data (version {self._version}) with "
+              f"{len(data.get('uil', {}))} UIL classifications")
+
+    def _load_views(self, data, version):
+        """Use the published view models if they match this version, else build them"""
+        try:
+            with open(views_file_for(self.data_file), 'r') as f:
+                views = json.load(f)
+            if views.get('source_version') == version:
+                return views['classifications']
+        except (OSError, ValueError, KeyError):
+            pass
+        return build_classification_views(data)
+
+    def _refresh(self):
+        """Reload the document if the file on disk has changed"""
+        stamp = self._file_stamp()
+        if stamp is None:
+            if self._stamp is not None:
+                with self._lock:
+                    self._stamp = None
+                    self._data = None
+                    self._version = None
+                    self._last_update = None
+                    self._views = {}
+                    self._derived = {}
+            return
+
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._load(stamp)
+
+    def get(self):
+        """Return the parsed rankings document (shared - do not mutate), or None"""
+        self._refresh()
+        return self._data
+
+    @property
+    def version(self):
+        """Content hash of the currently loaded rankings, or None"""
+        self._refresh()
+        return self._version
+
+    def classification_view(self, classification):
+        """Ordered, ready-to-render ranked teams for a classification"""
+        self._refresh()
+        return self._views.get(classification, [])
+
+    @property
+    def last_modified(self):
+        """UTC modification time of the currently loaded rankings file, or None"""
+        self._refresh()
+        if self._stamp is None:
+            return None
+        return datetime.fromtimestamp(self._stamp[1] // 1_000_000_000, tz=timezone.utc)
+
+    def derived(self, key, build):
+        """
+        Memoize a value derived from the current rankings version
+
+        `build` is called with the rankings document the first time `key` is
+        requested for a version; the result is dropped when the file changes.
+        """
+        self._refresh()
+        data, derived = self._data, self._derived
+        if key not in derived:
+            with self._derived_lock:
+                if key not in derived:
+                    derived[key] = build(data)
+        return derived[key]
+
+    def last_update(self):
+        """Formatted last update timestamp for page headers"""
+        self._refresh()
+        return self._last_update or datetime.now().strftime('%B %d, %Y')
+
+    def invalidate(self):
+        """Force the next access to re-read the file"""
+        with self._lock:
+            self._stamp = None
+
+
+def _format_last_update(data):
+    """Format the document's last_updated field, or None if missing/invalid"""
+    if data and 'last_updated' in data:
+        try:
+            dt = datetime.fromisoformat(data['last_updated'])
+            return dt.strftime('%B %d, %Y at %I:%M %p')
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+# Shared instance used by the app and blueprints
+rankings_repository = RankingsRepository()
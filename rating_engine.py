@@ -0,0 +1,298 @@
+"""
+Chronological Rating Engine
+Glicko ratings replayed from box_score in game_date order, one rating period per week
+
+Every team starts at INITIAL_RATING with the maximum rating deviation (RD).
+Each week (Monday-Sunday) is a Glicko rating period: every game of the
+week is scored against the opponents' ratings from the start of the week,
+so the order of games within a week doesn't matter. Between weeks each
+team's RD grows by RD_GROWTH per elapsed week, so idle teams become less
+certain again. Ratings start over at the first week of each season.
+Teams are ranked by their conservative rating (rating - 2 RD), so a team
+with a couple of lucky results doesn't outrank one proven over a season.
+
+The state after every completed week is stored in rating_checkpoint along
+with a fingerprint of that week's games. A run restores the latest
+checkpoint whose week (and every week before it) still has the same
+fingerprint and only replays the games after it. A backdated or edited
+game changes its week's fingerprint, which drops the checkpoints from that
+week on and replays from the one before it.
+
+Home court is not modelled: the sources don't consistently list the home
+team first (see adjusted_efficiency.py).
+
+Usage: python rating_engine.py [--rebuild] [--top N]
+"""
+
+import argparse
+import json
+import math
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine, insert, select, text
+
+from models import RatingCheckpoint
+from teams import backfill_team_ids
+from team_stats import season_for
+
+DB_PATH = Path(__file__).parent / 'instance' / 'tbbas.db'
+
+INITIAL_RATING = 1500.0
+INITIAL_RD = 350.0
+
+# RD added per idle week; a team with RD 50 is back to 350 after ~130 weeks
+RD_GROWTH = 30.0
+
+Q = math.log(10) / 400
+
+RATED_GAMES = '''
+    team1_id IS NOT NULL AND team2_id IS NOT NULL AND team1_id != team2_id
+'''
+
+# Cheap change detection for one week's games: any insert, delete or edit
+# of a date, team or score changes at least one of these sums
+FINGERPRINT_QUERY = f'''
+    SELECT date(game_date, 'weekday 0') AS week_end,
+           COUNT(*) || ':' || SUM(id) || ':' ||
+           SUM(id * team1_id) || ':' || SUM(id * team2_id) || ':' ||
+           SUM(id * team1_score) || ':' || SUM(id * team2_score) AS fingerprint
+    FROM box_score
+    WHERE {RATED_GAMES}
+    GROUP BY week_end
+    ORDER BY week_end
+'''
+
+GAMES_QUERY = f'''
+    SELECT date(game_date, 'weekday 0') AS week_end, team1_id, team2_id, team1_score, team2_score
+    FROM box_score
+    WHERE {RATED_GAMES} AND game_date > :since
+    ORDER BY game_date, id
+'''
+
+
+def _g(rd):
+    return 1 / np.sqrt(1 + 3 * Q ** 2 * rd ** 2 / math.pi ** 2)
+
+
+class RatingState:
+    """Rating, RD and games played per team id, as parallel NumPy arrays"""
+
+    def __init__(self, ratings=None, week=None):
+        ratings = ratings or {}
+        self.week = week  # week_end of the last period applied
+        self.index = {team_id: i for i, team_id in enumerate(ratings)}
+        values = np.array(list(ratings.values()), dtype=np.float64).reshape(-1, 3)
+        self.rating, self.rd, self.games = values[:, 0].copy(), values[:, 1].copy(), values[:, 2].copy()
+
+    @classmethod
+    def from_json(cls, data, week):
+        return cls({int(team_id): values for team_id, values in json.loads(data).items()}, week)
+
+    def to_json(self):
+        return json.dumps({
+            team_id: [float(self.rating[i]), float(self.rd[i]), int(self.games[i])]
+            for team_id, i in self.index.items()
+        })
+
+    def _indices(self, team_ids):
+        """Array positions for team_ids, adding new teams at the initial rating"""
+        new = [team_id for team_id in dict.fromkeys(team_ids) if team_id not in self.index]
+        if new:
+            for team_id in new:
+                self.index[team_id] = len(self.index)
+            self.rating = np.append(self.rating, np.full(len(new), INITIAL_RATING))
+            self.rd = np.append(self.rd, np.full(len(new), INITIAL_RD))
+            self.games = np.append(self.games, np.zeros(len(new)))
+        return np.array([self.index[team_id] for team_id in team_ids], dtype=np.int64)
+
+    def apply_week(self, week, team1_ids, team2_ids, team1_scores, team2_scores):
+        """Run one Glicko rating period over a week's games"""
+        if self.week is not None:
+            elapsed = (week - self.week).days // 7
+            self.rd = np.minimum(np.sqrt(self.rd ** 2 + elapsed * RD_GROWTH ** 2), INITIAL_RD)
+        self.week = week
+
+        team1, team2 = self._indices(team1_ids), self._indices(team2_ids)
+        score1 = np.where(team1_scores > team2_scores, 1.0, np.where(team1_scores < team2_scores, 0.0, 0.5))
+
+        # Each game seen from both sides: (team, opponent, score)
+        team = np.concatenate((team1, team2))
+        opponent = np.concatenate((team2, team1))
+        score = np.concatenate((score1, 1 - score1))
+
+        g = _g(self.rd[opponent])
+        expected = 1 / (1 + 10 ** (-g * (self.rating[team] - self.rating[opponent]) / 400))
+
+        size = len(self.rating)
+        information = np.bincount(team, weights=g ** 2 * expected * (1 - expected), minlength=size)
+        surprise = np.bincount(team, weights=g * (score - expected), minlength=size)
+
+        played = information > 0
+        precision = 1 / self.rd[played] ** 2 + Q ** 2 * information[played]
+        self.rating[played] += Q / precision * surprise[played]
+        self.rd[played] = np.sqrt(1 / precision)
+        self.games += np.bincount(team, minlength=size)
+
+    def ratings(self):
+        """dict of team_id -> {rating, rd, conservative_rating, games}"""
+        return {
+            team_id: {
+                'rating': round(float(self.rating[i]), 1),
+                'rd': round(float(self.rd[i]), 1),
+                'conservative_rating': round(float(self.rating[i] - 2 * self.rd[i]), 1),
+                'games': int(self.games[i])
+            }
+            for team_id, i in self.index.items()
+        }
+
+
+def _valid_checkpoints(connection):
+    """
+    Checkpoints that still match box_score, after deleting the stale ones
+
+    Returns: (latest valid checkpoint row or None, list of (week_end, fingerprint)
+             for every week with games, in order)
+    """
+    weeks = [
+        (date.fromisoformat(week), fingerprint)
+        for week, fingerprint in connection.execute(text(FINGERPRINT_QUERY))
+    ]
+    table = RatingCheckpoint.__table__
+    checkpoints = connection.execute(
+        select(table.c.week_end, table.c.fingerprint).order_by(table.c.week_end)
+    ).fetchall()
+
+    valid = 0
+    for checkpoint, week in zip(checkpoints, weeks):
+        if tuple(checkpoint) != week:
+            break
+        valid += 1
+
+    if valid < len(checkpoints):
+        stale = checkpoints[valid].week_end
+        connection.execute(table.delete().where(table.c.week_end >= stale))
+        print(f"  Games changed before the week ending {stale} was checkpointed - "
+              f"dropped {len(checkpoints) - valid} checkpoints")
+
+    latest = None
+    if valid:
+        latest = connection.execute(
+            select(table.c.week_end, table.c.ratings).where(table.c.week_end == checkpoints[valid - 1].week_end)
+        ).fetchone()
+    return latest, weeks
+
+
+def update_ratings(connection, today=None):
+    """
+    Bring ratings up to date from the latest valid checkpoint
+
+    Replays the games after that checkpoint week by week and stores a new
+    checkpoint for every week that has ended (weeks ending before `today`).
+
+    Returns: dict of team_id -> {rating, rd, conservative_rating, games}
+    """
+    today = today or date.today()
+    RatingCheckpoint.__table__.create(connection, checkfirst=True)
+    backfill_team_ids(connection)
+
+    latest, weeks = _valid_checkpoints(connection)
+    if latest is None:
+        state, since = RatingState(), date.min
+    else:
+        state, since = RatingState.from_json(latest.ratings, latest.week_end), latest.week_end
+
+    fingerprints = dict(weeks)
+    rows = connection.execute(text(GAMES_QUERY), {'since': since.isoformat()}).fetchall()
+
+    by_week = {}
+    for week, team1_id, team2_id, team1_score, team2_score in rows:
+        by_week.setdefault(week, []).append((team1_id, team2_id, team1_score, team2_score))
+
+    checkpoints = []
+    for week, games in by_week.items():
+        week = date.fromisoformat(week)
+        if state.week is not None and season_for(week) != season_for(state.week):
+            state = RatingState()
+        team1_ids, team2_ids, team1_scores, team2_scores = zip(*games)
+        state.apply_week(week, list(team1_ids), list(team2_ids),
+                         np.array(team1_scores, dtype=np.float64), np.array(team2_scores, dtype=np.float64))
+
+        if week < today:
+            checkpoints.append({
+                'week_end': week,
+                'fingerprint': fingerprints[week],
+                'ratings': state.to_json(),
+                'created_at': datetime.utcnow()
+            })
+
+    if checkpoints:
+        connection.execute(insert(RatingCheckpoint.__table__), checkpoints)
+
+    start = 'the first game' if latest is None else f'the week ending {since}'
+    print(f"  Replayed {len(rows)} games in {len(by_week)} weeks from {start} "
+          f"({len(checkpoints)} new checkpoints)")
+    return state.ratings()
+
+
+def rating_rankings(connection, today=None):
+    """
+    Teams ranked by conservative rating, best first, keyed by every alias and canonical name
+
+    Returns: dict of name -> {rank, team_id, rating, rd, conservative_rating, games}
+    """
+    ratings = update_ratings(connection, today)
+    ordered = sorted(ratings.items(), key=lambda item: (-item[1]['conservative_rating'], item[0]))
+    ranked = {
+        team_id: {'rank': rank, 'team_id': team_id, **rating}
+        for rank, (team_id, rating) in enumerate(ordered, 1)
+    }
+
+    names = connection.execute(text('''
+        SELECT name, team_id FROM team_alias
+        UNION ALL
+        SELECT name, id FROM team
+    ''')).fetchall()
+    return {name: ranked[team_id] for name, team_id in names if team_id in ranked}
+
+
+def open_database(db_path=DB_PATH):
+    """SQLAlchemy engine for the database file, for use outside the Flask app"""
+    return create_engine(f'sqlite:///{Path(db_path).resolve()}')
+
+
+def calculate_rating_rankings_from_db(db_path=DB_PATH):
+    """Update ratings in db_path and return rating_rankings()"""
+    print("\nUpdating game-by-game ratings...")
+    engine = open_database(db_path)
+    with engine.begin() as connection:
+        rankings = rating_rankings(connection)
+    engine.dispose()
+
+    teams = len({entry['team_id'] for entry in rankings.values()})
+    print(f"  Rated {teams} teams")
+    return rankings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update chronological team ratings')
+    parser.add_argument('--rebuild', action='store_true', help='drop all checkpoints and replay the season')
+    parser.add_argument('--top', type=int, default=25, help='number of teams to print')
+    args = parser.parse_args()
+
+    engine = open_database()
+    with engine.begin() as connection:
+        if args.rebuild:
+            connection.execute(RatingCheckpoint.__table__.delete())
+        ratings = update_ratings(connection)
+        names = dict(connection.execute(text('SELECT id, name FROM team')).fetchall())
+
+    ordered = sorted(ratings.items(), key=lambda item: (-item[1]['conservative_rating'], item[0]))
+    for rank, (team_id, rating) in enumerate(ordered[:args.top], 1):
+        print(f"{rank:4d}. {names.get(team_id, team_id):<40} {rating['rating']:7.1f} "
+              f"± {rating['rd']:5.1f}  ({rating['games']} games)")
+
+
+if __name__ == '__main__':
+    main()
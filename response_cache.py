@@ -0,0 +1,129 @@
+"""
+Response Cache
+Conditional GET and pre-compressed bodies for the rankings JSON API,
+plus a rendered-HTML cache for the rankings pages
+"""
+
+import gzip
+import hashlib
+import threading
+
+from flask import current_app, request, Response
+
+from rankings_store import rankings_repository
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional - fall back to gzip only
+    brotli = None
+
+# Let clients keep a copy but revalidate it on every use (a cheap 304)
+CACHE_CONTROL = 'public, no-cache'
+
+
+class EncodedBody:
+    """A JSON body serialized once, with its ETag and compressed variants"""
+
+    def __init__(self, payload):
+        self.identity = current_app.json.dumps(payload).encode('utf-8')
+        self.etag = hashlib.sha1(self.identity).hexdigest()[:20]
+        self.gzip = gzip.compress(self.identity, compresslevel=9, mtime=0)
+        self.br = brotli.compress(self.identity) if brotli else None
+
+    def negotiate(self):
+        """Pick the best encoding the client accepts: (body, content_encoding)"""
+        accepted = request.accept_encodings
+        if self.br is not None and accepted['br']:
+            return self.br, 'br'
+        if accepted['gzip']:
+            return self.gzip, 'gzip'
+        return self.identity, None
+
+
+def cached_json_response(key, build_payload):
+    """
+    Serve a JSON payload derived from the current rankings version
+
+    The payload is built, serialized and compressed once per rankings version.
+    Requests carrying a matching If-None-Match (or, without one, an
+    If-Modified-Since not older than the rankings file) get a 304.
+    """
+    body = rankings_repository.derived(
+        ('json', key),
+        lambda data: EncodedBody(build_payload(data))
+    )
+    last_modified = rankings_repository.last_modified
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(body.etag)
+    else:
+        not_modified = (
+            last_modified is not None and
+            request.if_modified_since is not None and
+            request.if_modified_since >= last_modified
+        )
+
+    if not_modified:
+        response = Response(status=304)
+    else:
+        data, encoding = body.negotiate()
+        response = Response(data, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(body.etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+class PageCache:
+    """
+    Rendered page bytes keyed on (route, classification, rankings version)
+
+    Publishing new rankings changes the version, so entries for the old
+    version are never served again and are dropped on the next miss.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, route, classification, render):
+        """Return cached HTML bytes for this page, calling `render()` on a miss"""
+        version = rankings_repository.version
+        if version is None:
+            # Nothing published yet - the page shows a "now" timestamp, don't cache it
+            return render().encode('utf-8')
+
+        key = (route, classification, version)
+        page = self._pages.get(key)
+        if page is not None:
+            with self._lock:
+                self.hits += 1
+            return page
+
+        page = render().encode('utf-8')
+        with self._lock:
+            self.misses += 1
+            self._pages = {k: v for k, v in self._pages.items() if k[2] == version}
+            self._pages[key] = page
+        return page
+
+    def stats(self):
+        """Hit/miss counters for /debug"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._pages),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None
+        }
+
+
+# Shared instance used by the app and blueprints
+page_cache = PageCache()
@@ -88,6 +88,30 @@ def collect_daily_box_scores():
         if result.returncode == 0:
             logger.info("✓ Daily box score collection completed successfully")
 
+            # Replays only the games since the last weekly rating checkpoint
+            ratings = subprocess.run(
+                [sys.executable, 'rating_engine.py', '--top', '0'],
+                capture_output=True,
+                text=True,
+                timeout=300
+            )
+            if ratings.stdout:
+                logger.info(ratings.stdout)
+            if ratings.returncode != 0:
+                logger.error(f"Rating update failed: {ratings.stderr}")
+
+            # Playoff odds from the new ratings; the web app only reads the saved file
+            odds = subprocess.run(
+                [sys.executable, 'playoff_simulation.py', '--top', '0'],
+                capture_output=True,
+                text=True,
+                timeout=600
+            )
+            if odds.stdout:
+                logger.info(odds.stdout)
+            if odds.returncode != 0:
+                logger.error(f"Playoff odds update failed: {odds.stderr}")
+
             # Send success notification
             email_notifier.notify_daily_collection(
                 games_collected=0,  # Parse from output if needed
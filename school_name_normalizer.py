@@ -3,13 +3,25 @@ School Name Normalizer and Deduplication Utility
 Handles Texas high school name variations, abbreviations, and duplicates
 """
 
+import bisect
+import math
 import re
+from collections import Counter
 from difflib import SequenceMatcher
+from functools import lru_cache
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Names kept by the normalize()/name_keys() memo (shared by every instance)
+NAME_CACHE_SIZE = 65536
+
+# Similarity at which are_duplicates() treats two names as the same school
+DUPLICATE_THRESHOLD = 0.90
+
+PUNCTUATION = re.compile(r'[.,\-\'"]')
+
 
 class SchoolNameNormalizer:
     """
@@ -67,9 +79,6 @@ class SchoolNameNormalizer:
         'riverside', 'lakeside', 'hillside', 'parkside'
     }
 
-    def __init__(self):
-        self.known_schools = {}  # Cache of normalized names
-
     def normalize(self, school_name):
         """
         Normalize a school name to a standard format
@@ -77,26 +86,36 @@ class SchoolNameNormalizer:
         """
         if not school_name:
             return ""
+        return _normalize(school_name)
 
+    def name_keys(self, school_name):
+        """
+        (normalized name, city, base name) for a school name, memoized
+
+        The keys extract_city(), extract_school_base_name() and
+        are_duplicates() compare, computed once per distinct name.
+        """
+        if not school_name:
+            return ("", None, "")
+        return _name_keys(school_name)
+
+    def _normalize(self, school_name):
+        """normalize() without the memo"""
         original = school_name
         name = school_name.lower().strip()
 
-        # Remove common punctuation
-        name = re.sub(r'[.,\-\'"]', ' ', name)
-
-        # Normalize whitespace
-        name = ' '.join(name.split())
+        # Remove common punctuation and normalize whitespace
+        words = PUNCTUATION.sub(' ', name).split()
 
         # Expand city abbreviations at the beginning
-        words = name.split()
         if words and words[0] in self.CITY_ABBREVIATIONS:
             words[0] = self.CITY_ABBREVIATIONS[words[0]]
-            name = ' '.join(words)
+        name = ' '.join(words)
 
         # Remove school suffixes from the end
-        for suffix in self.SCHOOL_SUFFIXES:
-            if name.endswith(' ' + suffix):
-                name = name[:-len(suffix)-1].strip()
+        for ending, length in _SUFFIX_ENDINGS:
+            if name.endswith(ending):
+                name = name[:-length].strip()
 
         logger.debug(f"Normalized: '{original}' -> '{name}'")
         return name
@@ -106,7 +125,17 @@ class SchoolNameNormalizer:
         Try to extract city name from school name
         Returns: city name or None
         """
-        normalized = self.normalize(school_name)
+        return self.name_keys(school_name)[1]
+
+    def extract_school_base_name(self, school_name):
+        """
+        Extract the base school name (without city prefix)
+        e.g., "Arlington Sam Houston" -> "sam houston"
+        """
+        return self.name_keys(school_name)[2]
+
+    def _extract_city(self, normalized):
+        """extract_city() for an already normalized name"""
         words = normalized.split()
 
         if not words:
@@ -130,14 +159,8 @@ class SchoolNameNormalizer:
 
         return None
 
-    def extract_school_base_name(self, school_name):
-        """
-        Extract the base school name (without city prefix)
-        e.g., "Arlington Sam Houston" -> "sam houston"
-        """
-        normalized = self.normalize(school_name)
-        city = self.extract_city(school_name)
-
+    def _extract_school_base_name(self, normalized, city):
+        """extract_school_base_name() for an already normalized name and its city"""
         if city:
             # Remove city from beginning
             for variation in self.CITY_EXPANSIONS.get(city, [city]):
@@ -156,7 +179,7 @@ class SchoolNameNormalizer:
 
         return SequenceMatcher(None, norm1, norm2).ratio()
 
-    def are_duplicates(self, name1, name2, threshold=0.90):
+    def are_duplicates(self, name1, name2, threshold=DUPLICATE_THRESHOLD):
         """
         Determine if two school names refer to the same school
         Uses fuzzy matching and city detection
@@ -165,23 +188,21 @@ class SchoolNameNormalizer:
             return False
 
         # Exact match after normalization
-        norm1 = self.normalize(name1)
-        norm2 = self.normalize(name2)
+        norm1, city1, base1 = self.name_keys(name1)
+        norm2, city2, base2 = self.name_keys(name2)
 
         if norm1 == norm2:
             return True
 
-        # High similarity score
-        similarity = self.similarity_score(name1, name2)
-        if similarity >= threshold:
-            return True
+        # High similarity score (the length and character-count bounds
+        # skip SequenceMatcher.ratio() for pairs that can't reach it)
+        total_length = len(norm1) + len(norm2)
+        if 2.0 * min(len(norm1), len(norm2)) / total_length >= threshold:
+            matcher = SequenceMatcher(None, norm1, norm2)
+            if matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold:
+                return True
 
         # Check if they have the same base name and city
-        city1 = self.extract_city(name1)
-        city2 = self.extract_city(name2)
-        base1 = self.extract_school_base_name(name1)
-        base2 = self.extract_school_base_name(name2)
-
         if city1 and city2 and base1 and base2:
             if city1 == city2 and base1 == base2:
                 return True
@@ -225,10 +246,108 @@ class SchoolNameNormalizer:
         scored.sort(reverse=True)
         return scored[0][1]
 
+    def duplicate_candidates(self, names, threshold=DUPLICATE_THRESHOLD):
+        """
+        Pairs (i, j) of indexes into names that deduplication has to compare
+
+        Names sharing a normalized name, or a city and base name, are
+        duplicates outright and are paired with the first such name. For the
+        similarity test, a ratio of 0.9 means the matching blocks cover
+        0.45 * T characters of each name (T = combined length) in at most
+        0.1 * T + 1 pieces, so the names share at least T/4 - 2 trigrams and
+        one of them is among the len - t + 1 rarest trigrams of each name
+        (t = trigrams needed). Only names of similar length sharing one of
+        those rare trigrams, T/4 - 2 trigrams overall and enough characters
+        to pass SequenceMatcher.quick_ratio() are paired. Names too short to
+        need a shared trigram are paired with each other, and indexed under
+        every trigram so longer names still find them.
+        """
+        keys = {}  # Normalized name -> first index, then (city, base) -> first index
+        distinct = []
+        for i, name in enumerate(names):
+            if not name:
+                continue  # Never a duplicate of anything
+            normalized, city, base = self.name_keys(name)
+            first = keys.setdefault(('name', normalized), i)
+            if first != i:
+                yield (first, i)
+                continue
+            distinct.append(i)
+            if city and base:
+                first = keys.setdefault(('city', city, base), i)
+                if first != i:
+                    yield (first, i)
+
+        grams, lengths = {}, {}
+        frequency = {}
+        for i in distinct:
+            normalized = self.name_keys(names[i])[0]
+            lengths[i] = len(normalized)
+            seen = {}
+            name_grams = []
+            for position in range(len(normalized) - 2):
+                gram = normalized[position:position + 3]
+                seen[gram] = seen.get(gram, 0) + 1
+                name_grams.append((gram, seen[gram]))  # Repeats are separate tokens
+                frequency[name_grams[-1]] = frequency.get(name_grams[-1], 0) + 1
+            grams[i] = name_grams
+        tokens = {i: set(name_grams) for i, name_grams in grams.items()}
+        characters = {i: Counter(self.name_keys(names[i])[0]) for i in distinct}
+
+        if threshold <= 0.8:
+            # Too loose for the trigram bound: every pair is a candidate
+            for a, i in enumerate(distinct):
+                for j in distinct[a + 1:]:
+                    yield (i, j)
+            return
+
+        # Fewest trigrams a duplicate needs to share, per character of this name
+        shared_per_char = (2.5 * threshold - 2) * 2 / (2 - threshold)
+        min_length_ratio = threshold / (2 - threshold)
+
+        # Shortest names first, so each name is only paired with names already indexed
+        index = {}
+        short = []
+        for i in sorted(distinct, key=lengths.get):
+            length = lengths[i]
+            needed = math.ceil(shared_per_char * length - 2 - 1e-9)
+            if needed <= 0:
+                for j in short:
+                    yield (min(i, j), max(i, j))
+                short.append(i)
+                # A longer duplicate must still share a trigram with it, one of any of its trigrams
+                for gram in grams[i]:
+                    posting_lengths, postings = index.setdefault(gram, ([], []))
+                    posting_lengths.append(length)
+                    postings.append(i)
+                continue
+
+            rarest = sorted(grams[i], key=lambda gram: (frequency[gram], gram))[:len(grams[i]) - needed + 1]
+            candidates = set()
+            for gram in rarest:
+                posting_lengths, postings = index.setdefault(gram, ([], []))
+                # Postings are in length order: skip the names too short to match
+                candidates.update(postings[bisect.bisect_left(posting_lengths, min_length_ratio * length):])
+                posting_lengths.append(length)
+                postings.append(i)
+            for j in sorted(candidates):
+                total_length = length + lengths[j]
+                if len(tokens[i] & tokens[j]) < (2.5 * threshold - 2) * total_length - 2 - 1e-9:
+                    continue
+                # The character-count bound of SequenceMatcher.quick_ratio()
+                if 2.0 * sum((characters[i] & characters[j]).values()) / total_length < threshold:
+                    continue
+                yield (min(i, j), max(i, j))
+
     def deduplicate_schools(self, school_list, key_func=None):
         """
         Deduplicate a list of schools
 
+        Only the pairs duplicate_candidates() finds are compared, and
+        duplicates are merged with union-find, so a group holds every name
+        linked to another by are_duplicates(). Groups are ordered by their
+        first item.
+
         Args:
             school_list: List of school names or school dictionaries
             key_func: Optional function to extract school name from item
@@ -244,29 +363,26 @@ class SchoolNameNormalizer:
         if key_func is None:
             key_func = lambda x: x if isinstance(x, str) else x.get('team_name', '')
 
-        # Group similar schools
-        groups = []
-        used = set()
+        # Cluster duplicates; a pair already in one cluster isn't compared again
+        item_names = [key_func(item) for item in school_list]
+        parent = list(range(len(school_list)))
 
-        for i, item in enumerate(school_list):
-            if i in used:
-                continue
-
-            name1 = key_func(item)
-            group = [item]
-            used.add(i)
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
 
-            # Find all similar schools
-            for j, other_item in enumerate(school_list[i+1:], start=i+1):
-                if j in used:
-                    continue
-
-                name2 = key_func(other_item)
-                if self.are_duplicates(name1, name2):
-                    group.append(other_item)
-                    used.add(j)
+        for i, j in self.duplicate_candidates(item_names):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j and self.are_duplicates(item_names[i], item_names[j]):
+                # The earliest item stays the root, so groups keep list order
+                parent[max(root_i, root_j)] = min(root_i, root_j)
 
-            groups.append(group)
+        groups = {}
+        for i, item in enumerate(school_list):
+            groups.setdefault(find(i), []).append(item)
+        groups = list(groups.values())
 
         # Select best representative from each group
         deduplicated = []
@@ -301,6 +417,22 @@ class SchoolNameNormalizer:
         return deduplicated
 
 
+_SUFFIX_ENDINGS = [(' ' + suffix, len(suffix) + 1) for suffix in SchoolNameNormalizer.SCHOOL_SUFFIXES]
+_default = SchoolNameNormalizer()
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _normalize(school_name):
+    return _default._normalize(school_name)
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _name_keys(school_name):
+    normalized = _normalize(school_name)
+    city = _default._extract_city(normalized)
+    return (normalized, city, _default._extract_school_base_name(normalized, city))
+
+
 def test_normalizer():
     """Test the school name normalizer"""
     normalizer = SchoolNameNormalizer()
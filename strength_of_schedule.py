@@ -0,0 +1,137 @@
+"""
+Strength of Schedule and RPI
+Opponents' winning percentage, opponents' opponents' winning percentage
+and RPI for every team, from sparse game matrices
+
+With W[i, j] = games team i won against team j and G = W + W.T:
+
+    WP    = wins / games
+    OWP   = per-game average of each opponent's WP, leaving out that
+            opponent's games against the team being rated
+    OOWP  = per-game average of opponents' OWP  (G @ OWP / games)
+    RPI   = 0.25 * WP + 0.50 * OWP + 0.25 * OOWP
+
+The rating-based SOS (per-game average of opponents' adjusted net rating)
+comes with the adjusted ratings themselves (adjusted_efficiency.py);
+rpi_by_classification() copies it from there rather than solving again.
+
+A game is a win for the team that scored more; anything else counts as a
+loss for both, as in the team records.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from adjusted_efficiency import load_rated_games
+from models import Team
+
+
+def _game_matrices(games):
+    """Team ids plus the W (wins) and G (games) matrices over the team index"""
+    game_count = len(games['team1_id'])
+    team_ids, team_index = np.unique(
+        np.concatenate((games['team1_id'], games['team2_id'])), return_inverse=True
+    )
+    team_count = len(team_ids)
+    team1, team2 = team_index[:game_count], team_index[game_count:]
+
+    team1_won = games['team1_score'] > games['team2_score']
+    team2_won = games['team2_score'] > games['team1_score']
+
+    winners = np.concatenate((team1[team1_won], team2[team2_won]))
+    losers = np.concatenate((team2[team1_won], team1[team2_won]))
+    wins = csr_matrix(
+        (np.ones(len(winners)), (winners, losers)), shape=(team_count, team_count)
+    )
+    played = csr_matrix(
+        (np.ones(2 * game_count), (np.concatenate((team1, team2)), np.concatenate((team2, team1)))),
+        shape=(team_count, team_count)
+    )
+    return team_ids, wins, played
+
+
+def calculate_rpi(games):
+    """
+    WP, OWP, OOWP and RPI for every team in `games`
+
+    Args:
+        games: Arrays from adjusted_efficiency.load_rated_games()
+
+    Returns: dict of team_id -> {games, wins, losses, wp, owp, oowp, rpi}
+    """
+    if not len(games['team1_id']):
+        return {}
+
+    team_ids, wins, played = _game_matrices(games)
+
+    team_wins = np.asarray(wins.sum(axis=1)).ravel()
+    team_games = np.asarray(played.sum(axis=1)).ravel()
+    wp = team_wins / team_games
+
+    # Opponent j's WP with its games against i removed, for every pair (i, j) that met
+    pairs = played.tocoo()
+    i, j, meetings = pairs.row, pairs.col, pairs.data
+    wins_vs_i = np.asarray(wins[j, i]).ravel()
+    remaining_games = team_games[j] - meetings
+    opponent_wp = np.divide(
+        team_wins[j] - wins_vs_i, remaining_games,
+        out=np.zeros(len(j)), where=remaining_games > 0
+    )
+
+    # Opponents with no other games carry no information - leave them out
+    counted = np.where(remaining_games > 0, meetings, 0)
+    counted_games = np.bincount(i, weights=counted, minlength=len(team_ids))
+    owp = np.divide(
+        np.bincount(i, weights=counted * opponent_wp, minlength=len(team_ids)), counted_games,
+        out=np.zeros(len(team_ids)), where=counted_games > 0
+    )
+
+    oowp = (played @ owp) / team_games
+    rpi = 0.25 * wp + 0.50 * owp + 0.25 * oowp
+
+    return {
+        team_id: {
+            'games': int(team_games[index]),
+            'wins': int(team_wins[index]),
+            'losses': int(team_games[index] - team_wins[index]),
+            'wp': round(float(wp[index]), 4),
+            'owp': round(float(owp[index]), 4),
+            'oowp': round(float(oowp[index]), 4),
+            'rpi': round(float(rpi[index]), 4)
+        }
+        for index, team_id in enumerate(team_ids.tolist())
+    }
+
+
+def rpi_by_classification(results=None, ratings=None):
+    """
+    RPI results grouped by each team's classification, best RPI first (needs app context)
+
+    Args:
+        results: calculate_rpi() output; computed from the database if not given
+        ratings: Optional adjusted_efficiency.adjusted_ratings() output to take
+                 each team's sos_rating from
+
+    Returns: dict of classification -> list of dicts (team_id, team_name,
+             rpi_rank, sos_rating plus the calculate_rpi fields)
+    """
+    if results is None:
+        results = calculate_rpi(load_rated_games())
+    ratings = ratings or {}
+
+    classifications = {}
+    for team in Team.query.filter(Team.id.in_(list(results))):
+        entry = {
+            'team_id': team.id,
+            'team_name': team.name,
+            **results[team.id],
+            'sos_rating': ratings.get(team.id, {}).get('sos_rating')
+        }
+        classifications.setdefault(team.classification or 'Unknown', []).append(entry)
+
+    for teams in classifications.values():
+        teams.sort(key=lambda x: (-x['rpi'], x['team_name']))
+        for rank, entry in enumerate(teams, 1):
+            entry['rpi_rank'] = rank
+
+    return classifications
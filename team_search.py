@@ -0,0 +1,131 @@
+"""
+Team Search Index
+SQLite FTS5 index over box score team names for the /boxscores team filter
+"""
+
+import re
+
+from sqlalchemy import text
+
+from models import db, BoxScore
+from school_abbreviations import CITY_ABBREVIATIONS
+
+FTS_TABLE = 'box_score_team_fts'
+
+# External-content FTS5 table over box_score, kept in sync by triggers so that
+# inserts from the app, the scrapers and raw sqlite3 scripts are all indexed.
+FTS_SCHEMA = [
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        team1_name, team2_name,
+        content='box_score', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS box_score_team_fts_ai AFTER INSERT ON box_score BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, team1_name, team2_name)
+        VALUES (new.id, new.team1_name, new.team2_name);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS box_score_team_fts_ad AFTER DELETE ON box_score BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, team1_name, team2_name)
+        VALUES ('delete', old.id, old.team1_name, old.team2_name);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS box_score_team_fts_au AFTER UPDATE OF team1_name, team2_name ON box_score BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, team1_name, team2_name)
+        VALUES ('delete', old.id, old.team1_name, old.team2_name);
+        INSERT INTO {FTS_TABLE}(rowid, team1_name, team2_name)
+        VALUES (new.id, new.team1_name, new.team2_name);
+    END
+    ''',
+]
+
+# Lowercase abbreviation -> full city name ('sa' -> 'san antonio')
+_CITY_EXPANSIONS = {abbr.lower(): full.lower() for abbr, full in CITY_ABBREVIATIONS.items()}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Set by ensure_team_search_index(); None until checked
+_fts_enabled = None
+
+
+def ensure_team_search_index():
+    """
+    Create the FTS5 index and its sync triggers if they don't exist yet
+
+    Must run inside an app context. Does nothing (and leaves the team filter
+    on ILIKE) when the database is not SQLite or FTS5 is not compiled in.
+    """
+    global _fts_enabled
+
+    if db.engine.dialect.name != 'sqlite':
+        _fts_enabled = False
+        return False
+
+    try:
+        with db.engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).first()
+
+            for statement in FTS_SCHEMA:
+                conn.execute(text(statement))
+
+            if not exists:
+                # First run - index every game already in the table
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                print(f"Built team search index over {BoxScore.query.count()} games")
+    except Exception as e:
+        print(f"Team search index unavailable, falling back to ILIKE: {e}")
+        _fts_enabled = False
+        return False
+
+    _fts_enabled = True
+    return True
+
+
+def build_match_query(team):
+    """
+    Turn free text into an FTS5 MATCH expression
+
+    Every token must prefix-match a word in the same team name, and known
+    city abbreviations also match the spelled-out city:
+        'seven lakes' -> "seven"* AND "lakes"*
+        'SA Bren'     -> ("sa"* OR "san antonio") AND "bren"*
+
+    Returns None if the text has no searchable tokens.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(team.lower()):
+        term = f'"{token}"*'
+        if token in _CITY_EXPANSIONS:
+            term = f'({term} OR "{_CITY_EXPANSIONS[token]}")'
+        terms.append(term)
+
+    if not terms:
+        return None
+
+    expression = ' AND '.join(terms)
+    return f'team1_name : ({expression}) OR team2_name : ({expression})'
+
+
+def team_filter(team):
+    """SQLAlchemy criterion matching box scores where either team matches `team`"""
+    match_query = build_match_query(team) if _fts_enabled else None
+
+    if match_query is None:
+        return (
+            (BoxScore.team1_name.ilike(f'%{team}%')) |
+            (BoxScore.team2_name.ilike(f'%{team}%'))
+        )
+
+    matching_ids = text(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match_query"
+    ).bindparams(match_query=match_query)
+    return BoxScore.id.in_(matching_ids)
@@ -0,0 +1,245 @@
+"""
+Team Season Aggregates
+Per-team season totals kept current by applying each game's delta
+
+Inserting, editing or deleting a box score adds (or subtracts) that one
+game's result for its two teams in team_season_stats, inside the same
+transaction. On SQLite this is done by triggers on box_score, so rows
+written by raw sqlite3 scripts are counted too (once backfill_team_ids()
+has given them team ids); other databases use the equivalent ORM hooks.
+Rankings entries for just the affected teams can then be refreshed without
+re-reading the season (update_rankings_for_teams).
+"""
+
+import copy
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.orm.attributes import get_history
+
+from models import BoxScore, TeamSeasonStats
+from rankings_store import rankings_repository, publish_rankings
+from school_name_normalizer import SchoolNameNormalizer
+from teams import apply_team_record, find_team_record, team_records_by_name
+
+STAT_FIELDS = ('games', 'wins', 'losses', 'points_for', 'points_against')
+
+UPSERT_SQL = text('''
+    INSERT INTO team_season_stats (team_id, season, games, wins, losses, points_for, points_against)
+    VALUES (:team_id, :season, :games, :wins, :losses, :points_for, :points_against)
+    ON CONFLICT (team_id, season) DO UPDATE SET
+        games = team_season_stats.games + excluded.games,
+        wins = team_season_stats.wins + excluded.wins,
+        losses = team_season_stats.losses + excluded.losses,
+        points_for = team_season_stats.points_for + excluded.points_for,
+        points_against = team_season_stats.points_against + excluded.points_against
+''')
+
+
+# SQLite expressions matching season_for() and game_deltas() for one side of a game
+_SEASON_SQL = "CAST(strftime('%Y', {row}.game_date) AS INTEGER) - (CAST(strftime('%m', {row}.game_date) AS INTEGER) < 8)"
+
+
+def _trigger_upsert(row, side, other, sign):
+    """Trigger statement applying one side of the `row` (new/old) game with the given sign"""
+    return f'''
+        INSERT INTO team_season_stats (team_id, season, games, wins, losses, points_for, points_against)
+        SELECT {row}.{side}_id, {_SEASON_SQL.format(row=row)}, {sign},
+               {sign} * ({row}.{side}_score > {row}.{other}_score),
+               {sign} * ({row}.{side}_score <= {row}.{other}_score),
+               {sign} * {row}.{side}_score, {sign} * {row}.{other}_score
+        WHERE {row}.{side}_id IS NOT NULL
+        ON CONFLICT (team_id, season) DO UPDATE SET
+            games = team_season_stats.games + excluded.games,
+            wins = team_season_stats.wins + excluded.wins,
+            losses = team_season_stats.losses + excluded.losses,
+            points_for = team_season_stats.points_for + excluded.points_for,
+            points_against = team_season_stats.points_against + excluded.points_against;
+    '''
+
+
+def _trigger_body(row, sign):
+    return _trigger_upsert(row, 'team1', 'team2', sign) + _trigger_upsert(row, 'team2', 'team1', sign)
+
+
+TRIGGERS = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS team_season_stats_ai AFTER INSERT ON box_score BEGIN
+        {_trigger_body('new', 1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS team_season_stats_ad AFTER DELETE ON box_score BEGIN
+        {_trigger_body('old', -1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS team_season_stats_au
+    AFTER UPDATE OF game_date, team1_id, team2_id, team1_score, team2_score ON box_score BEGIN
+        {_trigger_body('old', -1)}
+        {_trigger_body('new', 1)}
+    END
+    ''',
+]
+
+
+def create_team_stats_triggers(connection):
+    """Install the box_score triggers that maintain team_season_stats (SQLite only)"""
+    for statement in TRIGGERS:
+        connection.execute(text(statement))
+
+
+def _maintained_by_triggers(connection):
+    return connection.dialect.name == 'sqlite'
+
+
+def season_for(game_date):
+    """Season a game belongs to, by starting year: Nov 2025 and Feb 2026 are both 2025"""
+    return game_date.year if game_date.month >= 8 else game_date.year - 1
+
+
+def game_deltas(game_date, team1_id, team2_id, team1_score, team2_score, sign=1):
+    """
+    Stat deltas one game contributes to its two teams
+
+    Returns: list of dicts (team_id, season and STAT_FIELDS), sign=-1 to remove the game
+    """
+    if game_date is None or team1_score is None or team2_score is None:
+        return []
+
+    season = season_for(game_date)
+    deltas = []
+
+    for team_id, points_for, points_against in (
+        (team1_id, team1_score, team2_score),
+        (team2_id, team2_score, team1_score),
+    ):
+        if team_id is None:
+            continue
+        won = points_for > points_against
+        deltas.append({
+            'team_id': team_id,
+            'season': season,
+            'games': sign,
+            'wins': sign if won else 0,
+            'losses': 0 if won else sign,
+            'points_for': sign * points_for,
+            'points_against': sign * points_against
+        })
+
+    return deltas
+
+
+def _apply_deltas(connection, deltas):
+    if deltas:
+        connection.execute(UPSERT_SQL, deltas)
+
+
+def _game_values(target, old=False):
+    """(game_date, team1_id, team2_id, team1_score, team2_score) as stored before/after a flush"""
+    values = []
+    for attribute in ('game_date', 'team1_id', 'team2_id', 'team1_score', 'team2_score'):
+        if old:
+            history = get_history(target, attribute)
+            if history.deleted:
+                values.append(history.deleted[0])
+                continue
+        values.append(getattr(target, attribute))
+    return values
+
+
+@event.listens_for(BoxScore, 'after_insert')
+def _add_game(mapper, connection, target):
+    if _maintained_by_triggers(connection):
+        return
+    _apply_deltas(connection, game_deltas(*_game_values(target)))
+
+
+@event.listens_for(BoxScore, 'after_delete')
+def _remove_game(mapper, connection, target):
+    if _maintained_by_triggers(connection):
+        return
+    _apply_deltas(connection, game_deltas(*_game_values(target, old=True), sign=-1))
+
+
+@event.listens_for(BoxScore, 'after_update')
+def _update_game(mapper, connection, target):
+    if _maintained_by_triggers(connection):
+        return
+    old, new = _game_values(target, old=True), _game_values(target)
+    if old != new:
+        _apply_deltas(connection, game_deltas(*old, sign=-1) + game_deltas(*new))
+
+
+def rebuild_team_season_stats(connection):
+    """
+    Recompute every team's season totals from box_score
+
+    Used by the migration that creates the table, and to resync after bulk
+    writes that bypass the ORM. Returns the number of rows written.
+    """
+    table = BoxScore.__table__
+    rows = connection.execute(select(
+        table.c.game_date, table.c.team1_id, table.c.team2_id, table.c.team1_score, table.c.team2_score
+    ))
+
+    totals = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for row in rows:
+        for delta in game_deltas(*row):
+            total = totals[(delta['team_id'], delta['season'])]
+            for field in STAT_FIELDS:
+                total[field] += delta[field]
+
+    connection.execute(TeamSeasonStats.__table__.delete())
+    if totals:
+        connection.execute(insert(TeamSeasonStats.__table__), [
+            {'team_id': team_id, 'season': season, **total}
+            for (team_id, season), total in totals.items()
+        ])
+    return len(totals)
+
+
+def update_rankings_for_teams(team_ids):
+    """
+    Refresh the rankings entries of just these teams
+
+    Matches entries and applies records exactly as update_rankings_with_records()
+    does (find_team_record/apply_team_record over team_records_by_name(), i.e.
+    every season's totals), but only touches entries whose record belongs to
+    one of team_ids. Districts and adjusted ratings are left to the scheduled
+    full update. Needs an app context.
+
+    Returns: number of rankings entries changed (the file is only
+             republished when this is non-zero)
+    """
+    team_ids = {team_id for team_id in team_ids if team_id is not None}
+    rankings = rankings_repository.get()
+    if not team_ids or not rankings:
+        return 0
+
+    team_records = team_records_by_name()
+    normalizer = SchoolNameNormalizer()
+
+    # The repository's document is shared - edit a copy
+    rankings = copy.deepcopy(rankings)
+    updated = 0
+
+    for category in ('uil', 'private'):
+        for teams in rankings.get(category, {}).values():
+            for entry in teams:
+                record = find_team_record(entry.get('team_name', ''), team_records, normalizer=normalizer)
+                if record is None or record['team_id'] not in team_ids:
+                    continue
+
+                before = dict(entry)
+                apply_team_record(entry, record)
+                if entry != before:
+                    updated += 1
+
+    if updated:
+        rankings['last_updated'] = datetime.now().isoformat()
+        publish_rankings(rankings, rankings_repository.data_file)
+        print(f"Updated {updated} rankings entries for {len(team_ids)} teams")
+
+    return updated
@@ -0,0 +1,330 @@
+"""
+Team Identity
+Resolves free-text box score team names to Team rows and integer ids
+
+Every exact name seen in box_score gets a TeamAlias row. Names that only
+differ by a poll-rank prefix ("(#5)Brennan"), case, punctuation, a city
+abbreviation ("SA Roosevelt") or a trailing "HS" share one Team. BoxScore
+team1_id/team2_id are filled in at ingest by an ORM hook, and
+backfill_team_ids() catches rows written by raw sqlite3 scripts.
+"""
+
+import re
+from collections import Counter, defaultdict
+
+from sqlalchemy import event, insert, select, text
+
+from models import db, BoxScore, Team, TeamAlias
+from ranking_calculator import estimate_possessions
+from school_abbreviations import CITY_ABBREVIATIONS, get_search_variations
+from school_name_normalizer import SchoolNameNormalizer
+from manual_district_mappings import get_manual_district
+from tapps_district_mappings import get_tapps_district
+
+RANK_PREFIX_RE = re.compile(r'^\s*\(#\d+\)\s*')
+PUNCTUATION_RE = re.compile(r"[.,\-'\"()]")
+
+_CITY_EXPANSIONS = {abbr.lower(): full.lower() for abbr, full in CITY_ABBREVIATIONS.items()}
+_TRAILING_SUFFIXES = (' high school', ' hs')
+
+
+def clean_team_name(name):
+    """Strip the poll-rank prefix scrapers leave on names: '(#5)Brennan' -> 'Brennan'"""
+    return RANK_PREFIX_RE.sub('', name or '').strip()
+
+
+def team_key(name):
+    """
+    Identity key shared by all spellings of one team
+
+    'SA Roosevelt', 'San Antonio Roosevelt' and '(#3)San Antonio Roosevelt HS'
+    all map to 'san antonio roosevelt'.
+    """
+    key = PUNCTUATION_RE.sub(' ', clean_team_name(name).lower())
+    words = key.split()
+
+    if words and words[0] in _CITY_EXPANSIONS:
+        words[0] = _CITY_EXPANSIONS[words[0]]
+
+    key = ' '.join(words)
+    for suffix in _TRAILING_SUFFIXES:
+        if key.endswith(suffix):
+            key = key[:-len(suffix)]
+
+    return key
+
+
+def lookup_district(name, classification):
+    """District from the manual UIL / TAPPS mappings, if known"""
+    if not classification:
+        return None
+    if classification.startswith('TAPPS_'):
+        return get_tapps_district(name, classification)
+    return get_manual_district(name, classification)
+
+
+def _create_team(conn, name, key, classification):
+    """Insert a Team row and return its id"""
+    result = conn.execute(insert(Team.__table__).values(
+        name=name,
+        name_key=key,
+        classification=classification,
+        district=lookup_district(name, classification)
+    ))
+    return result.inserted_primary_key[0]
+
+
+def resolve_team_id(conn, name, classification=None):
+    """
+    Team id for an exact box score name, creating the Team/alias if needed
+
+    Works on a raw connection so it can run inside a flush.
+    """
+    team_id = conn.execute(
+        select(TeamAlias.__table__.c.team_id).where(TeamAlias.__table__.c.name == name)
+    ).scalar()
+    if team_id is not None:
+        return team_id
+
+    key = team_key(name)
+    team_id = conn.execute(
+        select(Team.__table__.c.id).where(Team.__table__.c.name_key == key)
+    ).scalar()
+    if team_id is None:
+        team_id = _create_team(conn, clean_team_name(name), key, classification)
+
+    conn.execute(insert(TeamAlias.__table__).values(name=name, team_id=team_id))
+    return team_id
+
+
+@event.listens_for(BoxScore, 'before_insert')
+@event.listens_for(BoxScore, 'before_update')
+def _assign_team_ids(mapper, connection, target):
+    """Fill team1_id/team2_id from the team names on every ORM write"""
+    target.team1_id = resolve_team_id(connection, target.team1_name, target.classification)
+    target.team2_id = resolve_team_id(connection, target.team2_name, target.classification)
+
+
+def _primary_classification(game_counts):
+    """Classification most of a team's games are filed under, ignoring 'Unknown' when possible"""
+    for classification, _ in game_counts.most_common():
+        if classification and classification != 'Unknown':
+            return classification
+    return game_counts.most_common(1)[0][0]
+
+
+def backfill_team_ids(conn):
+    """
+    Resolve team ids for box scores written outside the ORM
+
+    Groups every unresolved name by team_key, creates missing Teams (canonical
+    name picked by SchoolNameNormalizer, classification = the one most of
+    their games are filed under) and fills the NULL id columns.
+
+    Returns: number of new aliases created
+    """
+    rows = conn.execute(text('''
+        SELECT name, classification, COUNT(*) FROM (
+            SELECT team1_name AS name, classification FROM box_score WHERE team1_id IS NULL
+            UNION ALL
+            SELECT team2_name AS name, classification FROM box_score WHERE team2_id IS NULL
+        )
+        GROUP BY name, classification
+    ''')).fetchall()
+
+    if not rows:
+        return 0
+
+    known_aliases = {
+        name for (name,) in conn.execute(select(TeamAlias.__table__.c.name))
+    }
+    teams_by_key = {
+        key: team_id for team_id, key in
+        conn.execute(select(Team.__table__.c.id, Team.__table__.c.name_key))
+    }
+
+    names_by_key = defaultdict(set)
+    classifications_by_key = defaultdict(Counter)
+    for name, classification, games in rows:
+        key = team_key(name)
+        if name not in known_aliases:
+            names_by_key[key].add(name)
+        classifications_by_key[key][classification] += games
+
+    normalizer = SchoolNameNormalizer()
+    created = 0
+
+    for key in sorted(names_by_key):
+        names = sorted(names_by_key[key])
+        team_id = teams_by_key.get(key)
+
+        if team_id is None:
+            canonical = normalizer.find_canonical_name(sorted({clean_team_name(n) for n in names}))
+            classification = _primary_classification(classifications_by_key[key])
+            team_id = _create_team(conn, canonical, key, classification)
+            teams_by_key[key] = team_id
+
+        conn.execute(
+            insert(TeamAlias.__table__),
+            [{'name': name, 'team_id': team_id} for name in names]
+        )
+        created += len(names)
+
+    for side in ('team1', 'team2'):
+        conn.execute(text(f'''
+            UPDATE box_score
+            SET {side}_id = (SELECT team_id FROM team_alias WHERE team_alias.name = box_score.{side}_name)
+            WHERE {side}_id IS NULL
+        '''))
+
+    return created
+
+
+def team_records_by_name():
+    """
+    Season totals per team, read from the team_season_stats aggregates
+
+    Backfills team ids first so games written by raw sqlite3 scripts are
+    counted; the table itself is kept current by triggers (see team_stats.py).
+
+    Returns: dict of every alias and canonical name -> record dict
+             (games, wins, losses, points_for, points_against, team_id);
+             all names of one team share the same record
+    """
+    with db.engine.begin() as conn:
+        backfill_team_ids(conn)
+
+        totals = conn.execute(text('''
+            SELECT team_id,
+                   SUM(games) AS games,
+                   SUM(wins) AS wins,
+                   SUM(losses) AS losses,
+                   SUM(points_for) AS points_for,
+                   SUM(points_against) AS points_against
+            FROM team_season_stats
+            GROUP BY team_id
+            HAVING SUM(games) > 0
+        ''')).fetchall()
+
+        records = {
+            team_id: {
+                'team_id': team_id,
+                'games': games,
+                'wins': wins,
+                'losses': losses,
+                'points_for': points_for,
+                'points_against': points_against
+            }
+            for team_id, games, wins, losses, points_for, points_against in totals
+        }
+
+        names = conn.execute(text('''
+            SELECT name, team_id FROM team_alias
+            UNION ALL
+            SELECT name, id FROM team
+        ''')).fetchall()
+
+    return {name: records[team_id] for name, team_id in names if team_id in records}
+
+
+def find_team_record(team_name, team_records, variations=get_search_variations, normalizer=None):
+    """
+    Record for a rankings entry name out of team_records_by_name()
+
+    Exact name first, then every search variation (abbreviation expansions
+    and special cases), then the normalizer's canonical name. Pass a
+    memoized `variations` (NameResolver.variations) when matching many names.
+    """
+    record = team_records.get(team_name)
+
+    if not record:
+        for variation in variations(team_name):
+            record = team_records.get(variation)
+            if record:
+                break
+
+    if not record:
+        canonical_name = (normalizer or SchoolNameNormalizer()).find_canonical_name([team_name])
+        if canonical_name:
+            record = team_records.get(canonical_name)
+
+    return record
+
+
+def apply_team_record(entry, record):
+    """
+    Copy a database record onto a rankings entry
+
+    Games, PPG and Opp PPG always come from the box scores; wins/losses only
+    fill in a 0-0 record so TABC records (from weekly rankings) keep priority.
+
+    Returns: True if the entry's wins/losses were filled in
+    """
+    filled = False
+    if entry.get('wins', 0) == 0 and entry.get('losses', 0) == 0:
+        entry['wins'] = record['wins']
+        entry['losses'] = record['losses']
+        filled = True
+
+    entry['games'] = record['games']
+    entry['ppg'] = round(record['points_for'] / record['games'], 1) if record['games'] > 0 else 0
+    entry['opp_ppg'] = round(record['points_against'] / record['games'], 1) if record['games'] > 0 else 0
+    return filled
+
+
+def find_team(name):
+    """Team for a name: exact alias first, then the shared identity key (needs app context)"""
+    alias = TeamAlias.query.filter_by(name=name).first()
+    if alias:
+        return alias.team
+    return Team.query.filter_by(name_key=team_key(name)).first()
+
+
+def team_game_log(team):
+    """
+    A team's games in chronological order with a running record
+
+    Served by the team1_id/team2_id indexes, so cost depends only on the
+    team's own schedule. Possessions are estimated from the team's own box
+    score line and are None when shooting stats weren't reported.
+
+    Returns: list of per-game dicts
+    """
+    games = BoxScore.query.filter(
+        (BoxScore.team1_id == team.id) | (BoxScore.team2_id == team.id)
+    ).order_by(BoxScore.game_date, BoxScore.id).all()
+
+    wins = losses = 0
+    log = []
+
+    for game in games:
+        side, other = ('team1', 'team2') if game.team1_id == team.id else ('team2', 'team1')
+        points_for = getattr(game, f'{side}_score')
+        points_against = getattr(game, f'{other}_score')
+        possessions = estimate_possessions(
+            getattr(game, f'{side}_fga'), getattr(game, f'{side}_fta'), getattr(game, f'{side}_to')
+        )
+
+        won = points_for > points_against
+        if won:
+            wins += 1
+        else:
+            losses += 1
+
+        log.append({
+            'id': game.id,
+            'game_date': game.game_date.isoformat(),
+            'classification': game.classification,
+            'home': side == 'team1',
+            'team_name': getattr(game, f'{side}_name'),
+            'opponent': getattr(game, f'{other}_name'),
+            'opponent_id': getattr(game, f'{other}_id'),
+            'points_for': points_for,
+            'points_against': points_against,
+            'result': 'W' if won else 'L',
+            'record': f"{wins}-{losses}",
+            'possessions': round(possessions, 1) if possessions else None,
+            'offensive_eff': round(points_for / possessions * 100, 1) if possessions else None
+        })
+
+    return log
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the consensus engine: weights, coverage rules, caps and ranking
+across classifications in one matrix
+"""
+
+from consensus import Cap, ConsensusEngine, RankMatrix, Source
+from merge_rankings_weighted import merge_classification_rankings
+
+
+def row(classification, team_name, games=0, **ranks):
+    return {'classification': classification, 'team_name': team_name, 'ranks': ranks, 'games': games}
+
+
+def test_weights_and_coverage():
+    engine = ConsensusEngine(
+        [Source('a', 0.5, max_rank=50), Source('b', 0.4, max_rank=50), Source('c', 0.1, max_rank=50)],
+        unranked=999, decimals=2
+    )
+    matrix = RankMatrix(['a', 'b', 'c'], [
+        row('X', 'both', a=1, b=3),            # (0.5 + 1.2) / 0.9
+        row('X', 'outside top 50', a=60, c=2),  # only c counts
+        row('X', 'nobody', b=51),              # unranked
+    ])
+    scores = engine.scores(matrix)
+    assert scores.tolist() == [round(1.7 / 0.9, 2), 2.0, 999.0]
+
+
+def test_caps_and_min_games():
+    engine = ConsensusEngine(
+        [Source('calc', min_games=15), Source('x'), Source('y')],
+        caps=[Cap('calc', 30, when=('x', 'y'), within=15)]
+    )
+    matrix = RankMatrix(['calc', 'x', 'y'], [
+        row('X', 'capped', games=20, calc=100, x=1, y=5),    # (30 + 1 + 5) / 3
+        row('X', 'not capped', games=20, calc=100, x=1, y=16),
+        row('X', 'few games', games=10, calc=1, x=4, y=8),   # calc ignored
+        row('X', 'no ranks', games=30),                     # dropped
+    ])
+    scores = engine.scores(matrix)
+    assert scores[:3].tolist() == [12.0, 39.0, 6.0]
+
+    ranked = engine.rank(matrix)
+    assert [matrix.rows[i]['team_name'] for i, _ in ranked['X']] == ['few games', 'capped', 'not capped']
+
+
+def test_ranks_each_classification_with_limits():
+    engine = ConsensusEngine([Source('a')])
+    matrix = RankMatrix(['a'], [
+        row('X', 'x2', a=2), row('Y', 'y1', a=1), row('X', 'x1', a=1),
+        row('X', 'x1 tie', a=1), row('Y', 'y2', a=2),
+    ], limits={'X': 2})
+    ranked = engine.rank(matrix)
+    assert [matrix.rows[i]['team_name'] for i, _ in ranked['X']] == ['x1', 'x1 tie']
+    assert [matrix.rows[i]['team_name'] for i, _ in ranked['Y']] == ['y1', 'y2']
+
+
+def test_weighted_merge():
+    tabc = [{'team_name': 'Katy Seven Lakes', 'rank': 1, 'wins': 20, 'losses': 1},
+            {'team_name': 'Allen', 'rank': 2, 'wins': 18, 'losses': 3}]
+    maxpreps = [{'team_name': 'Allen', 'rank': 1}, {'team_name': 'Seven Lakes', 'rank': 3},
+                {'team_name': 'Duncanville', 'rank': 60}]
+    gaso = [{'team_name': 'Seven Lakes (Katy, TX)', 'rank': 2}]
+
+    merged = merge_classification_rankings(tabc, maxpreps, gaso, 'AAAAAA')
+    assert [(t['rank'], t['team_name'], t['consensus_rank']) for t in merged] == [
+        (1, 'Allen', 1.56), (2, 'Katy Seven Lakes', 1.9), (3, 'Duncanville', 999)
+    ]
+    assert merged[0]['record'] == '18-3' and merged[2]['record'] == ''
+
+
+if __name__ == '__main__':
+    test_weights_and_coverage()
+    test_caps_and_min_games()
+    test_ranks_each_classification_with_limits()
+    test_weighted_merge()
+    print("✓ Consensus engine tests passed")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Regression test: set-based calculate_efficiency_rankings_from_db matches
+the original per-team query loop exactly (ranks, efficiency, PPG)
+"""
+
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from update_weekly_rankings import calculate_efficiency_rankings_from_db, DB_PATH
+
+
+def legacy_efficiency_rankings(db_path):
+    """The original implementation: one DISTINCT query, then one query per team"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT DISTINCT team1_name FROM box_score
+        UNION
+        SELECT DISTINCT team2_name FROM box_score
+    ''')
+    teams = [row[0] for row in cursor.fetchall()]
+
+    team_ratings = {}
+    for team in teams:
+        cursor.execute('''
+            SELECT
+                CASE WHEN team1_name = ? THEN team1_score ELSE team2_score END as points_for,
+                CASE WHEN team1_name = ? THEN team2_score ELSE team1_score END as points_against,
+                CASE WHEN team1_name = ? THEN team1_fg ELSE team2_fg END as fg,
+                CASE WHEN team1_name = ? THEN team1_fga ELSE team2_fga END as fga,
+                CASE WHEN team1_name = ? THEN team1_to ELSE team2_to END as turnovers
+            FROM box_score
+            WHERE team1_name = ? OR team2_name = ?
+        ''', (team, team, team, team, team, team, team))
+        games = cursor.fetchall()
+        if not games:
+            continue
+
+        total_for = sum(g[0] for g in games if g[0] is not None)
+        total_against = sum(g[1] for g in games if g[1] is not None)
+        game_count = len(games)
+        team_ratings[team] = {
+            'efficiency': (total_for - total_against) / game_count,
+            'games': game_count,
+            'ppg': round(total_for / game_count, 1),
+            'opp_ppg': round(total_against / game_count, 1)
+        }
+
+    conn.close()
+
+    sorted_teams = sorted(team_ratings.items(), key=lambda x: x[1]['efficiency'], reverse=True)
+    return {
+        team_name: {'rank': rank, **stats}
+        for rank, (team_name, stats) in enumerate(sorted_teams, 1)
+    }
+
+
+def make_edge_case_db(path):
+    """Small database with ties, a self-game, case variants and repeat matchups"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE box_score (
+            id INTEGER PRIMARY KEY, game_date DATE, classification VARCHAR(20),
+            team1_name VARCHAR(100), team1_score INTEGER, team1_fg INTEGER, team1_fga INTEGER, team1_to INTEGER,
+            team2_name VARCHAR(100), team2_score INTEGER, team2_fg INTEGER, team2_fga INTEGER, team2_to INTEGER
+        )
+    ''')
+    games = [
+        ('2025-11-14', 'Allen', 60, 'Plano', 50),
+        ('2025-11-15', 'Plano', 70, 'Allen', 62),
+        ('2025-11-15', 'McKinney', 55, 'Frisco', 45),   # ties Allen/Plano on efficiency
+        ('2025-11-16', 'Frisco', 45, 'McKinney', 55),
+        ('2025-11-17', 'Wylie', 48, 'Wylie', 44),       # same name on both sides
+        ('2025-11-18', 'allen', 30, 'Zephyr', 70),      # case differs from 'Allen'
+        ('2025-11-19', 'Zephyr', 51, 'Plano', 51),      # tied score counts as a game
+        ('2025-11-20', 'Wylie', 40, 'Allen', 41),
+    ]
+    conn.executemany('''
+        INSERT INTO box_score (game_date, classification, team1_name, team1_score, team2_name, team2_score)
+        VALUES (?, 'AAAAAA', ?, ?, ?, ?)
+    ''', games)
+    conn.commit()
+    conn.close()
+
+
+def assert_matches_legacy(db_path):
+    expected = legacy_efficiency_rankings(db_path)
+    actual = calculate_efficiency_rankings_from_db(db_path)
+
+    assert list(actual) == list(expected), "team order differs"
+    for team_name, stats in expected.items():
+        assert actual[team_name] == stats, f"{team_name}: {actual[team_name]} != {stats}"
+    return len(expected)
+
+
+def test_edge_cases_match_legacy():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'edge_cases.db'
+        make_edge_case_db(db_path)
+        assert_matches_legacy(db_path)
+
+
+def test_database_matches_legacy():
+    if not DB_PATH.exists():
+        print(f"Skipping: {DB_PATH} not found")
+        return
+
+    # Work on a copy so a concurrent scraper can't change the data between runs
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'tbbas.db'
+        shutil.copyfile(DB_PATH, db_path)
+        teams = assert_matches_legacy(db_path)
+        print(f"✓ {teams} teams match the per-team implementation")
+
+
+if __name__ == '__main__':
+    test_edge_cases_match_legacy()
+    print("✓ Edge cases match the per-team implementation")
+    test_database_matches_legacy()
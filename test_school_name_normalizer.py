@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for SchoolNameNormalizer deduplication: blocked candidate pairs,
+union-find groups and the canonical name of each group
+"""
+
+from school_name_normalizer import SchoolNameNormalizer
+
+
+def test_deduplicate_keeps_canonical_names():
+    normalizer = SchoolNameNormalizer()
+    schools = [
+        "Arlington Sam Houston",
+        "Arl Sam Houston HS",
+        "Houston Westside",
+        "Houston Westside High School",
+        "Dallas Skyline",
+        "Fort Worth Eastern Hills",
+        "",
+    ]
+    assert normalizer.deduplicate_schools(schools) == [
+        "Arlington Sam Houston", "Houston Westside High School",
+        "Dallas Skyline", "Fort Worth Eastern Hills", "",
+    ]
+
+
+def test_groups_are_transitive():
+    normalizer = SchoolNameNormalizer()
+    # Granger is a duplicate of both others, which are not duplicates of each other
+    names = ["Ranger", "Grange", "Granger"]
+    assert normalizer.are_duplicates(names[0], names[2]) and normalizer.are_duplicates(names[1], names[2])
+    assert not normalizer.are_duplicates(names[0], names[1])
+    assert normalizer.deduplicate_schools(names) == ["Ranger"]
+
+
+def test_candidates_cover_every_duplicate_pair():
+    normalizer = SchoolNameNormalizer()
+    names = ["Anderson", "Sanderson", "El Dorado", "Eldorado", "(#1)Wheeler", "(#4)Wheeler",
+             "SA Central", "San Angelo Central HS", "Ira", "Irb", "Lubbock Estacado", "Allen"]
+    candidates = set(normalizer.duplicate_candidates(names))
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            if normalizer.are_duplicates(names[i], names[j]):
+                assert (i, j) in candidates, (names[i], names[j])
+
+
+def test_candidates_at_other_thresholds():
+    normalizer = SchoolNameNormalizer()
+    # At 0.85 the shorter name needs no shared trigram of its own but the longer one does
+    names = ["qwertyuio", "qwertyuiopzx", "Ira", "Iraan", "Allen", "Allens", "Lubbock Estacado", "Estacado"]
+    for threshold in (0.85, 0.95):
+        candidates = set(normalizer.duplicate_candidates(names, threshold))
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                if normalizer.are_duplicates(names[i], names[j], threshold):
+                    assert (i, j) in candidates, (names[i], names[j], threshold)
+    assert (0, 1) in set(normalizer.duplicate_candidates(names, 0.85))
+
+
+def test_deduplicate_dicts():
+    normalizer = SchoolNameNormalizer()
+    teams = [{'team_name': 'Dallas Skyline HS', 'rank': 3}, {'team_name': 'Dallas Skyline', 'rank': 1}]
+    assert normalizer.deduplicate_schools(teams) == [{'team_name': 'Dallas Skyline HS', 'rank': 3}]
+
+
+if __name__ == '__main__':
+    test_deduplicate_keeps_canonical_names()
+    test_groups_are_transitive()
+    test_candidates_cover_every_duplicate_pair()
+    test_candidates_at_other_thresholds()
+    test_deduplicate_dicts()
+    print("✓ School name normalizer tests passed")
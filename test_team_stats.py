@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests that refreshing the rankings entries of a few teams after a form
+submission gives the same entries as the full update_rankings_with_records()
+"""
+
+import copy
+
+import team_stats
+from rankings_store import RankingsRepository, publish_rankings
+from teams import apply_team_record, find_team_record
+
+
+def record(team_id, games, wins, points_for, points_against):
+    return {'team_id': team_id, 'games': games, 'wins': wins, 'losses': games - wins,
+            'points_for': points_for, 'points_against': points_against}
+
+
+# Totals summed over every season, keyed by alias and canonical name
+BRENNAN = record(1, 30, 25, 1950, 1620)
+SKYLINE = record(2, 28, 20, 1904, 1700)
+ALLEN = record(3, 31, 27, 2170, 1705)
+TEAM_RECORDS = {
+    'San Antonio Brennan': BRENNAN, 'Brennan': BRENNAN,
+    'Dallas Skyline': SKYLINE,
+    'Allen': ALLEN,
+}
+
+RANKINGS = {
+    'last_updated': '2026-02-09T14:15:56',
+    'uil': {'AAAAAA': [
+        {'rank': 1, 'team_name': 'Allen', 'wins': 26, 'losses': 3},
+        {'rank': 2, 'team_name': 'SA Brennan', 'wins': 0, 'losses': 0},  # only matched by a search variation
+        {'rank': 3, 'team_name': 'Dallas Skyline'},
+        {'rank': 4, 'team_name': 'Unknown School', 'wins': 5, 'losses': 5},
+    ]},
+    'private': {},
+}
+
+
+def full_update(rankings):
+    """The records part of update_rankings_with_records()"""
+    rankings = copy.deepcopy(rankings)
+    for teams in rankings['uil'].values():
+        for team in teams:
+            found = find_team_record(team['team_name'], TEAM_RECORDS)
+            if found:
+                apply_team_record(team, found)
+    return rankings
+
+
+def incremental_update(tmp_path, monkeypatch, team_ids):
+    repository = RankingsRepository(tmp_path / 'rankings.json')
+    publish_rankings(RANKINGS, repository.data_file)
+    monkeypatch.setattr(team_stats, 'rankings_repository', repository)
+    monkeypatch.setattr(team_stats, 'team_records_by_name', lambda: TEAM_RECORDS)
+    updated = team_stats.update_rankings_for_teams(team_ids)
+    return updated, repository.get()
+
+
+def test_incremental_update_matches_full_update(tmp_path, monkeypatch):
+    updated, rankings = incremental_update(tmp_path, monkeypatch, [1, 2, 3])
+    expected = full_update(RANKINGS)
+
+    assert updated == 3
+    assert rankings['uil'] == expected['uil']
+    brennan = rankings['uil']['AAAAAA'][1]
+    assert (brennan['wins'], brennan['losses'], brennan['games'], brennan['ppg']) == (25, 5, 30, 65.0)
+
+
+def test_incremental_update_only_touches_given_teams(tmp_path, monkeypatch):
+    updated, rankings = incremental_update(tmp_path, monkeypatch, [1, None])
+    expected = full_update(RANKINGS)
+
+    assert updated == 1
+    assert rankings['uil']['AAAAAA'][1] == expected['uil']['AAAAAA'][1]
+    assert rankings['uil']['AAAAAA'][0] == RANKINGS['uil']['AAAAAA'][0]
+    assert rankings['uil']['AAAAAA'][2] == RANKINGS['uil']['AAAAAA'][2]
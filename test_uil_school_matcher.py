@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for UILSchoolMatcher: the trigram index must pick the same fuzzy
+match as scoring every school in the classification
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from uil_school_matcher import FUZZY_THRESHOLD, UILSchoolMatcher
+
+SCHOOLS = {
+    '6A': ['Katy Seven Lakes', 'Allen', 'North Crowley', 'Duncanville', 'Cypress Falls', 'Cypress Park'],
+    '3A': ['Jefferson', 'Shallowater', 'Lubbock Estacado', 'Dallas Lincoln'],
+    '1A': ['Jayton', 'Nazareth', 'Ira'],
+}
+
+
+def build_matcher(directory):
+    uil_data = {
+        classification: [
+            {'school_name': name, 'district': str(i + 1), 'classification': classification,
+             'classification_code': 'A' * int(classification[0])}
+            for i, name in enumerate(names)
+        ]
+        for classification, names in SCHOOLS.items()
+    }
+    path = Path(directory) / 'uil_schools.json'
+    path.write_text(json.dumps(uil_data))
+    return UILSchoolMatcher(str(path))
+
+
+def brute_force(matcher, team_name, classification):
+    """Best fuzzy match scoring every school, as find_school_match() used to"""
+    normalized = matcher.normalize_team_name(team_name)
+    best, best_score = None, 0.0
+    for school in matcher.uil_schools[classification]:
+        score = matcher.similarity_score(normalized, matcher.normalize_team_name(school['school_name']))
+        if score > best_score and score >= FUZZY_THRESHOLD:
+            best, best_score = school['school_name'], score
+    return best
+
+
+def test_exact_and_fuzzy_matches():
+    with tempfile.TemporaryDirectory() as directory:
+        matcher = build_matcher(directory)
+
+        match = matcher.find_school_match('Allen HS', 'AAAAAA')
+        assert (match['confidence'], match['official_name']) == ('exact', 'Allen')
+
+        queries = [('Katy Seven Lake', '6A'), ('Cypres Falls', '6A'), ('Cypress Pk', '6A'),
+                   ('Shalowater', '3A'), ('Jeferson', '3A'), ('Nazarth', '1A'), ('Irb', '1A'),
+                   ('Completely Different', '6A')]
+        for team_name, classification in queries:
+            match = matcher.find_school_match(team_name, matcher.uil_to_classification_code(classification))
+            expected = brute_force(matcher, team_name, classification)
+            assert match.get('official_name') == expected, (team_name, match, expected)
+            assert match['matched'] == (expected is not None)
+
+
+if __name__ == '__main__':
+    test_exact_and_fuzzy_matches()
+    print("✓ UIL school matcher tests passed")
@@ -4,10 +4,24 @@ Ensures data integrity by verifying schools against official UIL data
 """
 
 import json
+from collections import Counter, defaultdict
 from pathlib import Path
 from difflib import SequenceMatcher
 from school_name_normalizer import SchoolNameNormalizer
 
+FUZZY_THRESHOLD = 0.85  # Minimum SequenceMatcher ratio for a fuzzy match
+
+
+def trigrams(text):
+    """Character trigrams of text, with repeats"""
+    return Counter(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def ratio_bound(matches, total_length):
+    """SequenceMatcher ratio for `matches` matched characters (as difflib computes it)"""
+    return 2.0 * matches / total_length if total_length else 1.0
+
+
 class UILSchoolMatcher:
     """Matches team names to official UIL schools"""
 
@@ -28,6 +42,17 @@ class UILSchoolMatcher:
                     self.school_by_name[name] = []
                 self.school_by_name[name].append(school)
 
+        # Pre-normalized UIL names: exact matches become one dict lookup
+        self.normalized_by_name = {name: self.normalize_team_name(name) for name in self.school_by_name}
+        self.schools_by_normalized = {}
+        for name, schools in self.school_by_name.items():
+            self.schools_by_normalized.setdefault(self.normalized_by_name[name], schools)
+
+        self.fuzzy_indexes = {
+            classification: self.build_fuzzy_index(schools)
+            for classification, schools in self.uil_schools.items()
+        }
+
     def load_uil_data(self):
         """Load UIL school data from JSON"""
         if not self.uil_data_path.exists():
@@ -37,6 +62,74 @@ class UILSchoolMatcher:
         with open(self.uil_data_path, 'r') as f:
             return json.load(f)
 
+    def build_fuzzy_index(self, schools):
+        """
+        Trigram inverted index over the normalized names of one classification
+
+        Returns: dict with names (distinct normalized names in file order),
+                 schools (first school with each name), chars (character
+                 counts of each name), postings (trigram -> list of (name
+                 index, count)) and short (indexes of names of 16 characters
+                 or fewer)
+        """
+        names, first_school, positions = [], [], {}
+        for school in schools:
+            normalized = self.normalized_by_name[school['school_name']]
+            if normalized not in positions:
+                positions[normalized] = len(names)
+                names.append(normalized)
+                first_school.append(school)
+
+        postings = defaultdict(list)
+        for i, name in enumerate(names):
+            for gram, count in trigrams(name).items():
+                postings[gram].append((i, count))
+
+        return {
+            'names': names,
+            'schools': first_school,
+            'chars': [Counter(name) for name in names],
+            'postings': dict(postings),
+            'short': [i for i, name in enumerate(names) if len(name) <= 16]
+        }
+
+    def fuzzy_candidates(self, normalized_name, index):
+        """
+        Indexes of the names that could reach FUZZY_THRESHOLD, in file order
+
+        A ratio of 0.85 means the matching blocks cover at least 0.425 * T
+        characters of each name (T = combined length), split over at most
+        0.15 * T + 1 blocks. A block of L characters holds L - 2 shared
+        trigrams, so the names share at least T/8 - 2 trigrams and anything
+        sharing fewer can be skipped without scoring it. Only very short
+        pairs (T <= 16) have to be checked without any shared trigram.
+
+        Candidates must also pass the length and character-count upper
+        bounds SequenceMatcher.real_quick_ratio() and quick_ratio() use.
+        """
+        length = len(normalized_name)
+        names = index['names']
+
+        shared = defaultdict(int)
+        for gram, count in trigrams(normalized_name).items():
+            for i, name_count in index['postings'].get(gram, ()):
+                shared[i] += min(count, name_count)
+
+        candidates = {i for i, count in shared.items() if length + len(names[i]) <= 8 * (count + 2)}
+        if length < 16:
+            candidates.update(i for i in index['short'] if length + len(names[i]) <= 16)
+
+        chars = Counter(normalized_name)
+        kept = []
+        for i in sorted(candidates):
+            total_length = length + len(names[i])
+            if ratio_bound(min(length, len(names[i])), total_length) < FUZZY_THRESHOLD:
+                continue
+            if ratio_bound(sum((chars & index['chars'][i]).values()), total_length) < FUZZY_THRESHOLD:
+                continue
+            kept.append(i)
+        return kept
+
     def find_school_match(self, team_name, classification_code=None):
         """
         Find the best UIL school match for a team name
@@ -58,59 +151,59 @@ class UILSchoolMatcher:
 
         # Try exact match first
         normalized_name = self.normalize_team_name(team_name)
-        for uil_name, schools in self.school_by_name.items():
-            if self.normalize_team_name(uil_name) == normalized_name:
-                # If multiple schools with same name, use classification to disambiguate
-                if len(schools) > 1 and classification:
-                    for school in schools:
-                        if school['classification'] == classification:
-                            return {
-                                'matched': True,
-                                'confidence': 'exact',
-                                'official_name': school['school_name'],
-                                'district': school['district'],
-                                'classification': school['classification'],
-                                'classification_code': school['classification_code'],
-                                'ambiguous': False
-                            }
-                    # Classification provided but didn't match - ambiguous
-                    return {
-                        'matched': True,
-                        'confidence': 'exact_name_wrong_class',
-                        'official_name': schools[0]['school_name'],
-                        'district': schools[0]['district'],
-                        'classification': schools[0]['classification'],
-                        'classification_code': schools[0]['classification_code'],
-                        'ambiguous': True,
-                        'possible_schools': schools
-                    }
-                else:
-                    # Single match or no classification to disambiguate
-                    school = schools[0]
-                    return {
-                        'matched': True,
-                        'confidence': 'exact',
-                        'official_name': school['school_name'],
-                        'district': school['district'],
-                        'classification': school['classification'],
-                        'classification_code': school['classification_code'],
-                        'ambiguous': len(schools) > 1
-                    }
+        schools = self.schools_by_normalized.get(normalized_name)
+        if schools:
+            # If multiple schools with same name, use classification to disambiguate
+            if len(schools) > 1 and classification:
+                for school in schools:
+                    if school['classification'] == classification:
+                        return {
+                            'matched': True,
+                            'confidence': 'exact',
+                            'official_name': school['school_name'],
+                            'district': school['district'],
+                            'classification': school['classification'],
+                            'classification_code': school['classification_code'],
+                            'ambiguous': False
+                        }
+                # Classification provided but didn't match - ambiguous
+                return {
+                    'matched': True,
+                    'confidence': 'exact_name_wrong_class',
+                    'official_name': schools[0]['school_name'],
+                    'district': schools[0]['district'],
+                    'classification': schools[0]['classification'],
+                    'classification_code': schools[0]['classification_code'],
+                    'ambiguous': True,
+                    'possible_schools': schools
+                }
+            else:
+                # Single match or no classification to disambiguate
+                school = schools[0]
+                return {
+                    'matched': True,
+                    'confidence': 'exact',
+                    'official_name': school['school_name'],
+                    'district': school['district'],
+                    'classification': school['classification'],
+                    'classification_code': school['classification_code'],
+                    'ambiguous': len(schools) > 1
+                }
 
         # Try fuzzy matching
         best_match = None
         best_score = 0.0
 
-        for classification_key, schools in self.uil_schools.items():
+        for classification_key, index in self.fuzzy_indexes.items():
             # If classification specified, only search that classification
             if classification and classification_key != classification:
                 continue
 
-            for school in schools:
-                uil_name = school['school_name']
-                score = self.similarity_score(normalized_name, self.normalize_team_name(uil_name))
+            for i in self.fuzzy_candidates(normalized_name, index):
+                score = self.similarity_score(normalized_name, index['names'][i])
 
-                if score > best_score and score >= 0.85:  # 85% similarity threshold
+                if score > best_score and score >= FUZZY_THRESHOLD:
+                    school = index['schools'][i]
                     best_score = score
                     best_match = {
                         'matched': True,
@@ -186,7 +279,7 @@ class UILSchoolMatcher:
 
         for classification, schools in self.uil_schools.items():
             for school in schools:
-                normalized_school = self.normalize_team_name(school['school_name'])
+                normalized_school = self.normalized_by_name[school['school_name']]
                 if normalized_search in normalized_school or normalized_school in normalized_search:
                     matches.append(school)
 
@@ -5,16 +5,24 @@ Runs every Monday at 4 PM CST to calculate and publish new rankings
 Process:
 1. Load TABC + MaxPreps rankings from 2 PM scrape
 2. Calculate efficiency rankings from box score database
-3. Calculate stats from database (PPG, Opp PPG, W-L)
-4. Compute weighted average: 33% Calculated + 33% TABC + 33% MaxPreps
-5. Update rankings.json and rankings.json.master
+3. Update chronological ratings from the last weekly checkpoint (rating_engine.py)
+4. Calculate stats from database (PPG, Opp PPG, W-L)
+5. Compute weighted average: equal weight for Calculated, Rating, TABC and MaxPreps
+   (the source rank matrix is saved to data/rank_matrices/ for what-if runs)
+6. Update rankings.json and rankings.json.master
 """
 
 import json
+import re
 import sqlite3
+from collections import defaultdict
 from pathlib import Path
 from datetime import datetime
 from ranking_calculator import RankingCalculator
+from rankings_store import publish_rankings
+from rating_engine import calculate_rating_rankings_from_db
+from consensus import Cap, ConsensusEngine, RankMatrix, Source
+from rank_matrices import save_rank_matrix
 
 def load_weekly_scraped_rankings():
     """Load the most recent weekly rankings scrape"""
@@ -33,57 +41,46 @@ def load_weekly_scraped_rankings():
     with open(latest_file, 'r') as f:
         return json.load(f)
 
-def calculate_efficiency_rankings_from_db():
+DB_PATH = Path(__file__).parent / 'instance' / 'tbbas.db'
+
+def calculate_efficiency_rankings_from_db(db_path=DB_PATH):
     """Calculate efficiency rankings from box score database"""
     print("Calculating efficiency rankings from database...")
 
-    db_path = Path(__file__).parent / 'instance' / 'tbbas.db'
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
-    # Get all teams with games
+    # Every team's totals in one pass: each game counted once from each
+    # side (a team listed on both sides only counts as team1)
     cursor.execute('''
-        SELECT DISTINCT team1_name FROM box_score
-        UNION
-        SELECT DISTINCT team2_name FROM box_score
+        SELECT team_name,
+               COUNT(*) AS games,
+               COALESCE(SUM(points_for), 0) AS total_for,
+               COALESCE(SUM(points_against), 0) AS total_against
+        FROM (
+            SELECT team1_name AS team_name, team1_score AS points_for, team2_score AS points_against
+            FROM box_score
+            UNION ALL
+            SELECT team2_name, team2_score, team1_score
+            FROM box_score
+            WHERE team2_name != team1_name
+        )
+        GROUP BY team_name
+        ORDER BY team_name
     ''')
 
-    teams = [row[0] for row in cursor.fetchall()]
-
     # Calculate efficiency rating for each team
     team_ratings = {}
 
-    for team in teams:
-        # Get all games for this team
-        cursor.execute('''
-            SELECT
-                CASE WHEN team1_name = ? THEN team1_score ELSE team2_score END as points_for,
-                CASE WHEN team1_name = ? THEN team2_score ELSE team1_score END as points_against,
-                CASE WHEN team1_name = ? THEN team1_fg ELSE team2_fg END as fg,
-                CASE WHEN team1_name = ? THEN team1_fga ELSE team2_fga END as fga,
-                CASE WHEN team1_name = ? THEN team1_to ELSE team2_to END as turnovers
-            FROM box_score
-            WHERE team1_name = ? OR team2_name = ?
-        ''', (team, team, team, team, team, team, team))
-
-        games = cursor.fetchall()
-
-        if not games:
-            continue
-
+    for team, game_count, total_for, total_against in cursor.fetchall():
         # Simple efficiency calculation: avg points scored - avg points allowed
-        total_for = sum(g[0] for g in games if g[0] is not None)
-        total_against = sum(g[1] for g in games if g[1] is not None)
-        game_count = len(games)
-
-        if game_count > 0:
-            efficiency = (total_for - total_against) / game_count
-            team_ratings[team] = {
-                'efficiency': efficiency,
-                'games': game_count,
-                'ppg': round(total_for / game_count, 1),
-                'opp_ppg': round(total_against / game_count, 1)
-            }
+        efficiency = (total_for - total_against) / game_count
+        team_ratings[team] = {
+            'efficiency': efficiency,
+            'games': game_count,
+            'ppg': round(total_for / game_count, 1),
+            'opp_ppg': round(total_against / game_count, 1)
+        }
 
     conn.close()
 
@@ -105,82 +102,128 @@ def calculate_efficiency_rankings_from_db():
 
     return calculated_rankings
 
-def get_team_stats_from_db(team_name):
-    """Get PPG, Opp PPG, and game count from database for a specific team with fuzzy matching"""
-    db_path = Path(__file__).parent / 'instance' / 'tbbas.db'
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def fuzzy_search_terms(team_name):
+    """Fallback substrings to search for when a team has no exact-name games, best first"""
+    name_parts = team_name.split()
+    search_terms = []
 
-    # Try exact match first
-    cursor.execute('''
-        SELECT COUNT(*) as game_count,
-               SUM(CASE WHEN team1_name = ? THEN team1_score ELSE team2_score END) as total_points,
-               SUM(CASE WHEN team1_name = ? THEN team2_score ELSE team1_score END) as total_opp_points
-        FROM box_score
-        WHERE team1_name = ? OR team2_name = ?
-    ''', (team_name, team_name, team_name, team_name))
-
-    result = cursor.fetchone()
-
-    # If no exact match, try fuzzy matching with name variations
-    if result[0] == 0:
-        # Try multiple search strategies
-        name_parts = team_name.split()
-        search_terms = []
-
-        # Strategy 1: Last significant word (skip common suffixes)
-        if len(name_parts) > 0:
-            last_word = name_parts[-1].replace('-', ' ').strip()
-            if last_word.lower() not in ['academy', 'school', 'christian', 'catholic', 'prep', 'preparatory']:
-                search_terms.append(last_word)
-
-        # Strategy 2: Last two words
-        if len(name_parts) >= 2:
-            last_two = ' '.join(name_parts[-2:])
-            search_terms.append(last_two)
-
-        # Strategy 3: First two words (for "First Baptist", "Holy Cross", etc.)
-        if len(name_parts) >= 2:
-            first_two = ' '.join(name_parts[:2])
-            search_terms.append(first_two)
-
-        # Strategy 4: Remove city suffix (e.g., "Academy-Dallas" → "Academy")
-        for part in name_parts:
-            if '-' in part:
-                base = part.split('-')[0]
-                if base:
-                    search_terms.append(base)
-
-        # Try each search term until we find matches
-        for search_term in search_terms:
-            if not search_term:
-                continue
-
-            cursor.execute('''
-                SELECT COUNT(*) as game_count,
-                       SUM(CASE WHEN team1_name LIKE ? THEN team1_score ELSE team2_score END) as total_points,
-                       SUM(CASE WHEN team1_name LIKE ? THEN team2_score ELSE team1_score END) as total_opp_points
-                FROM box_score
-                WHERE team1_name LIKE ? OR team2_name LIKE ?
-            ''', (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
-
-            result = cursor.fetchone()
-            if result[0] > 0:  # Found matches
-                break
+    # Strategy 1: Last significant word (skip common suffixes)
+    if len(name_parts) > 0:
+        last_word = name_parts[-1].replace('-', ' ').strip()
+        if last_word.lower() not in ['academy', 'school', 'christian', 'catholic', 'prep', 'preparatory']:
+            search_terms.append(last_word)
 
-    conn.close()
+    # Strategy 2: Last two words
+    if len(name_parts) >= 2:
+        last_two = ' '.join(name_parts[-2:])
+        search_terms.append(last_two)
+
+    # Strategy 3: First two words (for "First Baptist", "Holy Cross", etc.)
+    if len(name_parts) >= 2:
+        first_two = ' '.join(name_parts[:2])
+        search_terms.append(first_two)
+
+    # Strategy 4: Remove city suffix (e.g., "Academy-Dallas" → "Academy")
+    for part in name_parts:
+        if '-' in part:
+            base = part.split('-')[0]
+            if base:
+                search_terms.append(base)
+
+    return [term for term in search_terms if term]
 
-    if result[0] > 0:
-        games = result[0]
-        ppg = round(result[1] / games, 1) if games > 0 else None
-        opp_ppg = round(result[2] / games, 1) if games > 0 else None
-        return {
-            'games': games,
-            'ppg': ppg,
-            'opp_ppg': opp_ppg
-        }
 
-    return None
+def _like_pattern(term):
+    """Regex equivalent to SQLite's LIKE '%term%' (ASCII-only case folding)"""
+    pattern = ''.join(
+        '.*' if char == '%' else '.' if char == '_' else re.escape(char)
+        for char in term
+    )
+    return re.compile(pattern, re.ASCII | re.IGNORECASE | re.DOTALL)
+
+
+class TeamStatsIndex:
+    """
+    Every game loaded once, with per-name indexes for team stats lookups
+
+    Answers the same questions as the old per-team queries: exact name
+    first, then each fuzzy search term as a case-insensitive substring of
+    either team's name (a game counts from team1's side when team1 matches).
+    Results are memoized per name and per search term.
+    """
+
+    def __init__(self, games):
+        self.games = games
+        self.team1_games = defaultdict(list)
+        self.team2_games = defaultdict(list)
+        for index, (team1_name, team2_name, _, _) in enumerate(games):
+            self.team1_games[team1_name].append(index)
+            self.team2_games[team2_name].append(index)
+        self.names = sorted(set(self.team1_games) | set(self.team2_games))
+        self._term_totals = {}
+        self._stats = {}
+
+    @classmethod
+    def from_db(cls, db_path=DB_PATH):
+        conn = sqlite3.connect(db_path)
+        games = conn.execute(
+            'SELECT team1_name, team2_name, team1_score, team2_score FROM box_score'
+        ).fetchall()
+        conn.close()
+        return cls(games)
+
+    def _totals(self, matching_names):
+        """(games, points, opp points) over games where either team name is in matching_names"""
+        game_count = points = opp_points = 0
+
+        for name in matching_names:
+            for index in self.team1_games.get(name, ()):
+                _, _, team1_score, team2_score = self.games[index]
+                game_count += 1
+                points += team1_score or 0
+                opp_points += team2_score or 0
+
+            for index in self.team2_games.get(name, ()):
+                team1_name, _, team1_score, team2_score = self.games[index]
+                if team1_name in matching_names:
+                    continue  # Already counted from team1's side
+                game_count += 1
+                points += team2_score or 0
+                opp_points += team1_score or 0
+
+        return game_count, points, opp_points
+
+    def _search(self, term):
+        if term not in self._term_totals:
+            pattern = _like_pattern(term)
+            matching = {name for name in self.names if pattern.search(name)}
+            self._term_totals[term] = self._totals(matching)
+        return self._term_totals[term]
+
+    def get(self, team_name):
+        """Games, PPG and Opp PPG for a team, or None"""
+        if team_name in self._stats:
+            return self._stats[team_name]
+
+        totals = self._totals({team_name})
+        if totals[0] == 0:
+            for search_term in fuzzy_search_terms(team_name):
+                totals = self._search(search_term)
+                if totals[0] > 0:
+                    break
+
+        stats = None
+        game_count, points, opp_points = totals
+        if game_count > 0:
+            stats = {
+                'games': game_count,
+                'ppg': round(points / game_count, 1),
+                'opp_ppg': round(opp_points / game_count, 1)
+            }
+
+        self._stats[team_name] = stats
+        return stats
+
 
 def normalize_team_name(name):
     """
@@ -248,255 +291,136 @@ def get_base_school_name(name):
     # This preserves: Allen, Plano, Plano East, McKinney, Lancaster, etc.
     return norm
 
-def calculate_weighted_rank(calculated_rank, tabc_rank, maxpreps_rank, db_games=0):
-    """
-    Calculate weighted average rank using 33/33/33 formula
-
-    If a team has fewer than 15 games in the database, we exclude the calculated rank
-    to avoid penalizing teams for incomplete data. In that case, we use 50/50 TABC/MaxPreps.
-
-    Args:
-        calculated_rank: Rank from efficiency calculations (or None)
-        tabc_rank: Rank from TABC (or None)
-        maxpreps_rank: Rank from MaxPreps (or None)
-        db_games: Number of games in database for this team (default 0)
-
-    Returns:
-        Weighted average rank (lower is better)
-    """
-    ranks = []
-
-    # Only include calculated rank if team has sufficient database games (15+)
-    # This prevents penalizing teams that appear highly ranked but have incomplete game data
-    # Example: McKinney (#20 TABC) has only 11 games with poor efficiency, would rank #513 weighted
-    if calculated_rank is not None and db_games >= 15:
-        ranks.append(calculated_rank)
-
-    if tabc_rank is not None:
-        ranks.append(tabc_rank)
-
-    if maxpreps_rank is not None:
-        ranks.append(maxpreps_rank)
-
-    if not ranks:
-        return None
-
-    # Calculate average (equal weight for each source present)
-    return sum(ranks) / len(ranks)
-
-def merge_rankings_3way(tabc_rankings, maxpreps_rankings, calculated_rankings):
+# Equal weights; the database-derived ranks need 15+ games in the database
+# and are capped at 30 when TABC and MaxPreps both have the team in their top 15
+WEEKLY_SOURCES = ['calculated', 'rating', 'tabc', 'maxpreps']
+
+WEEKLY_ENGINE = ConsensusEngine(
+    [
+        Source('calculated', min_games=15),
+        Source('rating', min_games=15),
+        Source('tabc'),
+        Source('maxpreps'),
+    ],
+    caps=[
+        Cap('calculated', 30, when=('tabc', 'maxpreps'), within=15),
+        Cap('rating', 30, when=('tabc', 'maxpreps'), within=15),
+    ]
+)
+
+UIL_CLASSIFICATIONS = {
+    '6A': 'AAAAAA',
+    '5A': 'AAAAA',
+    '4A': 'AAAA',
+    '3A': 'AAA',
+    '2A': 'AA',
+    '1A': 'A'
+}
+TAPPS_CLASSIFICATIONS = ['TAPPS_6A', 'TAPPS_5A', 'TAPPS_4A', 'TAPPS_3A', 'TAPPS_2A', 'TAPPS_1A']
+
+
+def _base_name_lookup(teams):
+    """Base school name (without city prefix) -> first team entry with that name"""
+    lookup = {}
+    for t in teams:
+        base_name = get_base_school_name(t['team_name'])
+        if base_name not in lookup:
+            lookup[base_name] = t
+    return lookup
+
+
+def build_weekly_rank_matrix(tabc_rankings, maxpreps_rankings, calculated_rankings,
+                             rating_rankings=None, stats_index=None):
     """
-    Merge TABC, MaxPreps, and Calculated rankings using 33/33/33 weighted average
+    Match every classification's teams across sources into one RankMatrix
 
-    Returns: Dictionary of merged rankings by classification
+    Teams are matched on base school name; the database ranks and stats are
+    looked up by the TABC name (or MaxPreps name if TABC doesn't rank the team).
     """
-    print("\nMerging rankings with 33/33/33 weighting...")
-
-    merged = {}
-
-    # Process UIL classifications
-    uil_classifications = {
-        '6A': 'AAAAAA',
-        '5A': 'AAAAA',
-        '4A': 'AAAA',
-        '3A': 'AAA',
-        '2A': 'AA',
-        '1A': 'A'
-    }
-
-    for short_code, long_code in uil_classifications.items():
-        # Get teams from each source with normalized name lookup
-        tabc_teams_raw = tabc_rankings.get(short_code, [])
-        maxpreps_teams_raw = maxpreps_rankings.get(short_code, [])
-
-        # Create lookup with base school names pointing to original team data
-        # Use base name (without city prefix) to match teams across sources
-        tabc_lookup = {}
-        for t in tabc_teams_raw:
-            base_name = get_base_school_name(t['team_name'])
-            if base_name not in tabc_lookup:
-                tabc_lookup[base_name] = t
-
-        maxpreps_lookup = {}
-        for t in maxpreps_teams_raw:
-            base_name = get_base_school_name(t['team_name'])
-            if base_name not in maxpreps_lookup:
-                maxpreps_lookup[base_name] = t
-
-        # Collect all unique base school names
-        all_teams = set(tabc_lookup.keys()) | set(maxpreps_lookup.keys())
-
-        team_scores = []
-
-        for norm_team_name in all_teams:
+    rating_rankings = rating_rankings or {}
+    if stats_index is None:
+        # One read of box_score serves every team's stats lookup below
+        stats_index = TeamStatsIndex.from_db()
+
+    rows = []
+    limits = {}
+    classifications = [(short_code, long_code, 25) for short_code, long_code in UIL_CLASSIFICATIONS.items()]
+    classifications += [(cls_code, cls_code, 10) for cls_code in TAPPS_CLASSIFICATIONS]
+
+    for source_code, classification, max_teams in classifications:
+        limits[classification] = max_teams
+        tabc_lookup = _base_name_lookup(tabc_rankings.get(source_code, []))
+        maxpreps_lookup = _base_name_lookup(maxpreps_rankings.get(source_code, []))
+
+        # TABC teams first, then MaxPreps-only teams, each in source order
+        for norm_team_name in dict.fromkeys(list(tabc_lookup) + list(maxpreps_lookup)):
             tabc_team = tabc_lookup.get(norm_team_name, {})
             maxpreps_team = maxpreps_lookup.get(norm_team_name, {})
 
-            tabc_rank = tabc_team.get('rank')
-            maxpreps_rank = maxpreps_team.get('rank')
-
             # Use TABC name if available (most authoritative), otherwise MaxPreps
             display_name = tabc_team.get('team_name') or maxpreps_team.get('team_name')
 
-            # Check calculated rankings with both original and normalized names
-            calculated_rank = calculated_rankings.get(display_name, {}).get('rank')
-            if calculated_rank is None:
-                # Try normalized name
-                calculated_rank = calculated_rankings.get(norm_team_name, {}).get('rank')
+            # Check database rankings with both original and normalized names
+            ranks = {'tabc': tabc_team.get('rank'), 'maxpreps': maxpreps_team.get('rank')}
+            for source, rankings in (('calculated', calculated_rankings), ('rating', rating_rankings)):
+                rank = rankings.get(display_name, {}).get('rank')
+                if rank is None:
+                    rank = rankings.get(norm_team_name, {}).get('rank')
+                ranks[source] = rank
 
             # Get stats from database (need this for db_games count)
-            stats = get_team_stats_from_db(display_name)
-            db_games = stats['games'] if stats else 0
-
-            # Smart consensus: Cap calculated rank penalty when TABC and MaxPreps both rank team in top 15
-            # This prevents extreme outliers in one source from skewing results when other sources agree
-            capped_calc = calculated_rank
-            if tabc_rank and maxpreps_rank and tabc_rank <= 15 and maxpreps_rank <= 15:
-                if calculated_rank:
-                    capped_calc = min(calculated_rank, 30)
-
-            # Calculate weighted average (passing db_games to avoid penalizing teams with few database games)
-            weighted_rank = calculate_weighted_rank(capped_calc, tabc_rank, maxpreps_rank, db_games)
-
-            if weighted_rank is None:
-                continue
-
-            # Build team data
-            team_data = {
-                'team_name': display_name,
-                'weighted_rank': weighted_rank,
-                'tabc_rank': tabc_rank,
-                'maxpreps_rank': maxpreps_rank,
-                'calculated_rank': calculated_rank
-            }
+            stats = stats_index.get(display_name)
 
             # Get record from TABC (most up-to-date), fall back to MaxPreps
-            if tabc_team:
-                team_data['wins'] = tabc_team.get('wins')
-                team_data['losses'] = tabc_team.get('losses')
-                team_data['record'] = tabc_team.get('record')
-            elif maxpreps_team:
-                # Use MaxPreps record if TABC not available
-                team_data['wins'] = maxpreps_team.get('wins')
-                team_data['losses'] = maxpreps_team.get('losses')
-                team_data['record'] = maxpreps_team.get('record')
+            payload = {}
+            record_source = tabc_team or maxpreps_team
+            if record_source:
+                payload['wins'] = record_source.get('wins')
+                payload['losses'] = record_source.get('losses')
+                payload['record'] = record_source.get('record')
 
             # Add stats to team data
             if stats:
-                team_data['ppg'] = stats['ppg']
-                team_data['opp_ppg'] = stats['opp_ppg']
-                team_data['games'] = stats['games']
-
-            team_scores.append(team_data)
-
-        # Sort by weighted rank and assign final ranks
-        team_scores.sort(key=lambda x: x['weighted_rank'])
-
-        for rank, team in enumerate(team_scores[:25], 1):  # Top 25 for UIL
-            team['rank'] = rank
-
-        merged[long_code] = team_scores[:25]
-        print(f"  UIL {short_code}: {len(merged[long_code])} teams")
-
-    # Process TAPPS classifications
-    tapps_classifications = ['TAPPS_6A', 'TAPPS_5A', 'TAPPS_4A', 'TAPPS_3A', 'TAPPS_2A', 'TAPPS_1A']
-
-    for cls_code in tapps_classifications:
-        # Get teams from each source with normalized name lookup
-        tabc_teams_raw = tabc_rankings.get(cls_code, [])
-        maxpreps_teams_raw = maxpreps_rankings.get(cls_code, [])
-
-        # Create lookup with base school names pointing to original team data
-        # Use base name (without city prefix) to match teams across sources
-        tabc_lookup = {}
-        for t in tabc_teams_raw:
-            base_name = get_base_school_name(t['team_name'])
-            if base_name not in tabc_lookup:
-                tabc_lookup[base_name] = t
-
-        maxpreps_lookup = {}
-        for t in maxpreps_teams_raw:
-            base_name = get_base_school_name(t['team_name'])
-            if base_name not in maxpreps_lookup:
-                maxpreps_lookup[base_name] = t
-
-        # Collect all unique base school names
-        all_teams = set(tabc_lookup.keys()) | set(maxpreps_lookup.keys())
-
-        team_scores = []
-
-        for norm_team_name in all_teams:
-            tabc_team = tabc_lookup.get(norm_team_name, {})
-            maxpreps_team = maxpreps_lookup.get(norm_team_name, {})
-
-            tabc_rank = tabc_team.get('rank')
-            maxpreps_rank = maxpreps_team.get('rank')
-
-            # Use TABC name if available (most authoritative), otherwise MaxPreps
-            display_name = tabc_team.get('team_name') or maxpreps_team.get('team_name')
-
-            # Check calculated rankings with both original and normalized names
-            calculated_rank = calculated_rankings.get(display_name, {}).get('rank')
-            if calculated_rank is None:
-                # Try normalized name
-                calculated_rank = calculated_rankings.get(norm_team_name, {}).get('rank')
-
-            # Get stats from database (need this for db_games count)
-            stats = get_team_stats_from_db(display_name)
-            db_games = stats['games'] if stats else 0
-
-            # Smart consensus: Cap calculated rank penalty when TABC and MaxPreps both rank team in top 15
-            # This prevents extreme outliers in one source from skewing results when other sources agree
-            capped_calc = calculated_rank
-            if tabc_rank and maxpreps_rank and tabc_rank <= 15 and maxpreps_rank <= 15:
-                if calculated_rank:
-                    capped_calc = min(calculated_rank, 30)
-
-            # Calculate weighted average (passing db_games to avoid penalizing teams with few database games)
-            weighted_rank = calculate_weighted_rank(capped_calc, tabc_rank, maxpreps_rank, db_games)
+                payload['ppg'] = stats['ppg']
+                payload['opp_ppg'] = stats['opp_ppg']
+                payload['games'] = stats['games']
 
-            if weighted_rank is None:
-                continue
-
-            # Build team data
-            team_data = {
+            rows.append({
+                'classification': classification,
                 'team_name': display_name,
-                'weighted_rank': weighted_rank,
-                'tabc_rank': tabc_rank,
-                'maxpreps_rank': maxpreps_rank,
-                'calculated_rank': calculated_rank
-            }
-
-            # Get record from TABC (most up-to-date), fall back to MaxPreps
-            if tabc_team:
-                team_data['wins'] = tabc_team.get('wins')
-                team_data['losses'] = tabc_team.get('losses')
-                team_data['record'] = tabc_team.get('record')
-            elif maxpreps_team:
-                # Use MaxPreps record if TABC not available
-                team_data['wins'] = maxpreps_team.get('wins')
-                team_data['losses'] = maxpreps_team.get('losses')
-                team_data['record'] = maxpreps_team.get('record')
-
-            # Add stats to team data
-            if stats:
-                team_data['ppg'] = stats['ppg']
-                team_data['opp_ppg'] = stats['opp_ppg']
-                team_data['games'] = stats['games']
+                'ranks': ranks,
+                'games': stats['games'] if stats else 0,
+                'payload': payload
+            })
 
-            team_scores.append(team_data)
+    return RankMatrix(WEEKLY_SOURCES, rows, limits)
 
-        # Sort by weighted rank and assign final ranks
-        team_scores.sort(key=lambda x: x['weighted_rank'])
 
-        for rank, team in enumerate(team_scores[:10], 1):  # Top 10 for TAPPS
-            team['rank'] = rank
-
-        merged[cls_code] = team_scores[:10]
-        print(f"  {cls_code}: {len(merged[cls_code])} teams")
+def rank_weekly_matrix(matrix, engine=WEEKLY_ENGINE):
+    """
+    Consensus rankings for every classification in the matrix
 
+    Returns: Dictionary of merged rankings by classification
+    """
+    merged = {}
+    for classification, ranked in engine.rank(matrix).items():
+        teams = []
+        for rank, (row_index, weighted_rank) in enumerate(ranked, 1):
+            row = matrix.rows[row_index]
+            teams.append({
+                'team_name': row['team_name'],
+                'weighted_rank': weighted_rank,
+                'tabc_rank': row['ranks'].get('tabc'),
+                'maxpreps_rank': row['ranks'].get('maxpreps'),
+                'calculated_rank': row['ranks'].get('calculated'),
+                'rating_rank': row['ranks'].get('rating'),
+                **row['payload'],
+                'rank': rank
+            })
+        merged[classification] = teams
     return merged
 
+
 def update_weekly_rankings():
     """Main function to update weekly rankings"""
     print("=" * 80)
@@ -520,12 +444,26 @@ def update_weekly_rankings():
 
     # 2. Calculate efficiency rankings from database
     calculated_rankings = calculate_efficiency_rankings_from_db()
-
-    # 3. Merge UIL rankings (33/33/33)
-    uil_merged = merge_rankings_3way(tabc_uil, maxpreps_uil, calculated_rankings)
-
-    # 4. Merge TAPPS rankings (33/33/33)
-    tapps_merged = merge_rankings_3way(tabc_private, maxpreps_tapps, calculated_rankings)
+    rating_rankings = calculate_rating_rankings_from_db()
+
+    # 3. Match UIL and TAPPS teams across sources into one rank matrix (UIL
+    #    uses 6A-style codes, TAPPS uses TAPPS_6A, so the dicts don't collide)
+    #    and keep it for what-if weight experiments (rank_matrices.py)
+    print("\nMerging rankings with equal weighting...")
+    matrix = build_weekly_rank_matrix(
+        {**tabc_uil, **tabc_private},
+        {**maxpreps_uil, **maxpreps_tapps},
+        calculated_rankings,
+        rating_rankings
+    )
+    save_rank_matrix('weekly', matrix, WEEKLY_ENGINE)
+
+    # 4. Rank all 12 classifications (equal weights)
+    ranked = rank_weekly_matrix(matrix)
+    uil_merged = {long_code: ranked.get(long_code, []) for long_code in UIL_CLASSIFICATIONS.values()}
+    tapps_merged = {cls_code: ranked.get(cls_code, []) for cls_code in TAPPS_CLASSIFICATIONS}
+    for classification, teams in {**uil_merged, **tapps_merged}.items():
+        print(f"  {classification}: {len(teams)} teams")
 
     # 5. Create final rankings structure
     final_rankings = {
@@ -534,12 +472,9 @@ def update_weekly_rankings():
         'private': tapps_merged
     }
 
-    # 6. Save to rankings.json
+    # 6. Save to rankings.json (plus per-classification view models)
     rankings_file = Path(__file__).parent / 'data' / 'rankings.json'
-    rankings_file.parent.mkdir(exist_ok=True)
-
-    with open(rankings_file, 'w') as f:
-        json.dump(final_rankings, f, indent=2)
+    publish_rankings(final_rankings, rankings_file)
 
     print(f"\n✓ Updated {rankings_file}")
 